@@ -0,0 +1,73 @@
+"""
+Throughput of the TextChunker on large synthetic inputs.
+
+Run from the src directory:
+    python -m benchmarks.chunker_benchmark --size-mb 50
+"""
+from utils.text_chunker import TextChunker
+from models import ChunkSizeUnitEnums
+import argparse
+import random
+import time
+
+WORDS = ["retrieval", "augmented", "generation", "vector", "index", "chunk", "overlap",
+         "embedding", "query", "answer", "the", "of", "and", "a", "to", "in", "is", "for"]
+
+def make_pages(size_mb: float, page_size: int, long_lines: bool):
+    rng = random.Random(13)
+    target_size = int(size_mb * 1024 * 1024)
+    
+    pages = []
+    total_size = 0
+    while total_size < target_size:
+        words = rng.choices(WORDS, k=page_size // 7)
+        if long_lines:
+            page_text = " ".join(words)
+        else:
+            page_text = "\n".join(" ".join(words[i:i + 12]) for i in range(0, len(words), 12))
+        
+        pages.append((page_text, {"source": "benchmark", "page": len(pages)}))
+        total_size += len(page_text)
+    
+    return pages, total_size
+
+def run_case(pages, total_size: int, chunk_size: int, overlap_size: int, size_unit: str, repeat: int):
+    chunker = TextChunker(chunk_size=chunk_size, overlap_size=overlap_size, size_unit=size_unit)
+    
+    best_seconds = None
+    chunks_count = 0
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        chunks_count = sum(1 for _ in chunker.iter_chunks(pages))
+        elapsed = time.perf_counter() - started_at
+        best_seconds = elapsed if best_seconds is None else min(best_seconds, elapsed)
+    
+    return total_size / (1024 * 1024) / best_seconds, chunks_count
+
+def main():
+    parser = argparse.ArgumentParser(description="TextChunker throughput benchmark")
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--page-size", type=int, default=4000, help="characters per page")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    cases = [
+        (ChunkSizeUnitEnums.CHAR.value, 1000, 0),
+        (ChunkSizeUnitEnums.CHAR.value, 1000, 200),
+        (ChunkSizeUnitEnums.TOKEN.value, 256, 0),
+        (ChunkSizeUnitEnums.TOKEN.value, 256, 64),
+    ]
+    
+    for long_lines in (False, True):
+        pages, total_size = make_pages(args.size_mb, args.page_size, long_lines)
+        input_name = "single-line pages" if long_lines else "multi-line pages"
+        
+        print(f"{input_name}: {total_size / (1024 * 1024):.1f} MB in {len(pages)} pages")
+        for size_unit, chunk_size, overlap_size in cases:
+            throughput, chunks_count = run_case(pages, total_size, chunk_size, overlap_size,
+                                                size_unit, args.repeat)
+            print(f"  {size_unit:>5} size={chunk_size:<5} overlap={overlap_size:<4} "
+                  f"{throughput:8.1f} MB/s  {chunks_count} chunks")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Per-request RAG prompt build time with the compiled template registry,
+against rendering through string.Template with a module lookup on every call.
+
+Run from the src directory:
+    python -m benchmarks.prompt_benchmark --documents 10
+"""
+from stores.llm.templates.template_parser import TemplateParser
+import argparse
+import time
+import os
+
+class FileTemplateParser:
+    # the lookup every call used to do: path checks, module import, Template.substitute
+    
+    def __init__(self, current_path: str, language: str, default_language: str = "en"):
+        self.current_path = current_path
+        self.language = language
+        self.default_language = default_language
+    
+    def get(self, group: str, key: str, vars: dict={}):
+        group_path = os.path.join(self.current_path, "locales", self.language, f"{group}.py")
+        targeted_language = self.language
+        if not os.path.exists(group_path):
+            group_path = os.path.join(self.current_path, "locales", self.default_language, f"{group}.py")
+            targeted_language = self.default_language
+        
+        if not os.path.exists(group_path):
+            return None
+        
+        module = __import__(f"stores.llm.templates.locales.{targeted_language}.{group}", fromlist=[group])
+        return getattr(module, key).substitute(vars)
+
+def build_with_file_parser(template_parser: FileTemplateParser, query: str, chunks: list) -> str:
+    system_prompt = template_parser.get("rag", "system_prompt")
+    document_prompts = "\n".join([
+        template_parser.get("rag", "document_prompt", {"doc_num": i + 1, "chunk_text": chunk})
+        for i, chunk in enumerate(chunks)
+    ])
+    footer_prompt = template_parser.get("rag", "footer_prompt", {"query": query})
+    return "\n\n".join([system_prompt, document_prompts, footer_prompt])
+
+def build_with_registry(template_parser: TemplateParser, query: str, chunks: list) -> str:
+    system_prompt = template_parser.get("rag", "system_prompt")
+    document_prompts = template_parser.get_joined("rag", "document_prompt", [
+        {"doc_num": i + 1, "chunk_text": chunk}
+        for i, chunk in enumerate(chunks)
+    ])
+    footer_prompt = template_parser.get("rag", "footer_prompt", {"query": query})
+    return "\n\n".join([system_prompt, document_prompts, footer_prompt])
+
+def time_builds(build, template_parser, query: str, chunks: list, iterations: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        build(template_parser, query, chunks)
+    return (time.perf_counter() - started_at) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG prompt build benchmark")
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="characters per document")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+    
+    query = "What does the contract say about early termination?"
+    chunks = [ ("lorem ipsum dolor sit amet " * (args.chunk_size // 27 + 1))[:args.chunk_size] ] * args.documents
+    
+    registry_parser = TemplateParser(language=args.language)
+    file_parser = FileTemplateParser(current_path=registry_parser.current_path, language=registry_parser.language)
+    
+    assert build_with_registry(registry_parser, query, chunks) == build_with_file_parser(file_parser, query, chunks)
+    
+    file_us = time_builds(build_with_file_parser, file_parser, query, chunks, args.iterations)
+    registry_us = time_builds(build_with_registry, registry_parser, query, chunks, args.iterations)
+    
+    print(f"{args.documents} documents of {args.chunk_size} characters, {args.iterations} builds")
+    print(f"  per-call file lookup: {file_us:8.1f} us/prompt")
+    print(f"  compiled registry   : {registry_us:8.1f} us/prompt  ({file_us / registry_us:.1f}x)")
+
+if __name__ == "__main__":
+    main()
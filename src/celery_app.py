@@ -1,11 +1,28 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from helpers.config import get_settings
 from stores.llm.LLMProviderFactory import LLMProviderFactory
 from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
 from stores.llm.templates.template_parser import TemplateParser
+from stores.cache.EmbeddingCache import EmbeddingCache
+from utils.metrics import start_worker_metrics_server
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from concurrent.futures import ProcessPoolExecutor
+from billiard.process import current_process
+import redis.asyncio as redis
+import multiprocessing
+import asyncio
+import logging
+import os
 
 settings = get_settings()
+logger = logging.getLogger("celery.worker")
+
+# worker-lifetime state, created once per worker process and reused by every task
+worker_loop = None
+worker_resources = None
+worker_process_pool = None
+worker_process_manager = None
 
 async def get_setup_utils():
     settings = get_settings()
@@ -20,6 +37,10 @@ async def get_setup_utils():
         expire_on_commit=False,
     )
     
+    redis_client = None
+    if settings.CACHE_REDIS_URL:
+        redis_client = redis.from_url(settings.CACHE_REDIS_URL)
+    
     llm_provider_factory = LLMProviderFactory(settings)
     vector_db_provider_factory = VectorDBProviderFactory(config=settings, db_client=db_client)
     
@@ -30,6 +51,7 @@ async def get_setup_utils():
     generation_client.set_generation_model(
         model_id = settings.GENERATION_MODEL_ID,
     )
+    await asyncio.to_thread(generation_client.load_tokenizer)
     
     # embedding client
     embedding_client = llm_provider_factory.create(
@@ -39,6 +61,13 @@ async def get_setup_utils():
         model_id = settings.EMBEDDING_MODEL_ID,
         embedding_size = settings.EMBEDDING_SIZE,
     )
+    embedding_client = EmbeddingCache(
+        embedding_client=embedding_client,
+        provider=settings.EMBEDDING_BACKEND,
+        redis_client=redis_client,
+        lru_size=settings.EMBEDDING_CACHE_LRU_SIZE,
+        ttl=settings.EMBEDDING_CACHE_TTL,
+    )
     
     # vector db client
     vector_db_client = vector_db_provider_factory.create(
@@ -49,11 +78,114 @@ async def get_setup_utils():
     template_parser = TemplateParser(
         language=settings.PRIMARY_LANG,
         default_language=settings.DEFAULT_LANG,
+        reload_interval=settings.TEMPLATES_RELOAD_INTERVAL,
     )
 
-    return (db_engine, db_client, llm_provider_factory, vector_db_provider_factory,
+    return (db_engine, db_client, redis_client, llm_provider_factory, vector_db_provider_factory,
             generation_client, embedding_client, vector_db_client, template_parser)
 
+async def close_setup_utils(resources: tuple):
+    (db_engine, db_client, redis_client, llm_provider_factory, vector_db_provider_factory,
+     generation_client, embedding_client, vector_db_client, template_parser) = resources
+    
+    await db_engine.dispose()
+    await vector_db_client.disconnect()
+    await llm_provider_factory.disconnect()
+    if redis_client:
+        await redis_client.aclose()
+
+def run_in_worker_loop(coro):
+    """
+    Run a coroutine on the persistent event loop of this worker process.
+    Pooled connections and clients are bound to this loop, so tasks must not use asyncio.run.
+    """
+    global worker_loop
+    
+    if worker_loop is None or worker_loop.is_closed():
+        worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(worker_loop)
+    
+    return worker_loop.run_until_complete(coro)
+
+async def get_worker_resources():
+    global worker_resources
+    
+    if worker_resources is None:
+        worker_resources = await get_setup_utils()
+    
+    return worker_resources
+
+def get_worker_process_pool_size() -> int:
+    # every Celery process gets its share of the cores unless FILE_PROCESSING_WORKERS is set
+    return settings.FILE_PROCESSING_WORKERS or max(
+        1, (os.cpu_count() or 1) // max(1, settings.CELERY_WORKER_CONCURRENY)
+    )
+
+def get_worker_process_pool() -> ProcessPoolExecutor:
+    # CPU-bound file parsing pool of this worker process
+    global worker_process_pool
+    
+    if worker_process_pool is None:
+        # spawn, as forking a process with a running event loop and open sockets is unsafe
+        worker_process_pool = ProcessPoolExecutor(
+            max_workers=get_worker_process_pool_size(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    
+    return worker_process_pool
+
+def get_worker_process_manager():
+    # serves the bounded queues that stream chunks back from the parsing pool
+    global worker_process_manager
+    
+    if worker_process_manager is None:
+        worker_process_manager = multiprocessing.get_context("spawn").Manager()
+    
+    return worker_process_manager
+
+def reset_worker_process_pool():
+    # a pool whose child died is unusable, the next task starts a fresh one
+    global worker_process_pool
+    
+    if worker_process_pool is not None:
+        worker_process_pool.shutdown(wait=False, cancel_futures=True)
+        worker_process_pool = None
+
+@worker_process_init.connect
+def init_worker_resources(**kwargs):
+    # pool processes keep their index when replaced, so the port of a slot never changes
+    start_worker_metrics_server(
+        base_port=settings.CELERY_WORKER_METRICS_PORT,
+        process_index=getattr(current_process(), "index", 0) or 0,
+    )
+    
+    try:
+        run_in_worker_loop(get_worker_resources())
+        logger.info("Worker resources were loaded")
+    except Exception as e:
+        # tasks retry the setup lazily through get_worker_resources
+        logger.error(f"Error while loading worker resources: {e}")
+
+@worker_process_shutdown.connect
+def shutdown_worker_resources(**kwargs):
+    global worker_loop, worker_resources, worker_process_manager
+    
+    reset_worker_process_pool()
+    if worker_process_manager is not None:
+        worker_process_manager.shutdown()
+        worker_process_manager = None
+    
+    try:
+        if worker_resources is not None:
+            run_in_worker_loop(close_setup_utils(worker_resources))
+    except Exception as e:
+        logger.error(f"Error while closing worker resources: {e}")
+    finally:
+        worker_resources = None
+        if worker_loop is not None:
+            worker_loop.close()
+            worker_loop = None
+
 # create celery application instance
 celery_app = Celery(
     "minirag",
@@ -95,6 +227,8 @@ celery_app.conf.update(
     task_routes={
         "tasks.file_processing.process_project_files": {"queue": "file_processing"},
         "tasks.data_indexing.index_data_content": {"queue": "data_indexing"},
+        "tasks.data_indexing.index_chunk_range": {"queue": "data_indexing"},
+        "tasks.data_indexing.finalize_data_indexing": {"queue": "data_indexing"},
     }
 )
 
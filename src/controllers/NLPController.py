@@ -1,17 +1,26 @@
 from .BaseController import BaseController
-from models.db_schemes import Project, DataChunk
+from models.db_schemes import Project, DataChunk, RetrievedDocument
 from stores.llm.LLMEnums import DocumentTypeEnums
-from typing import List
+from stores.vectordb.VectorDBEnums import VectorRecordMetadataEnums
+from utils.context_builder import ContextBuilder
+from utils.metrics import observe_stage, observe_stream_stage
+from typing import List, Optional
+import unicodedata
+import hashlib
 import json
 
 class NLPController(BaseController):
     
-    def __init__(self, vector_db_client, generation_client, embedding_client, template_parser):
+    def __init__(self, vector_db_client, generation_client, embedding_client, template_parser,
+                 answer_cache=None, single_flight=None, context_builder=None):
         super().__init__()
         self.vector_db_client = vector_db_client
         self.generation_client = generation_client
         self.embedding_client = embedding_client
         self.template_parser = template_parser
+        self.answer_cache = answer_cache
+        self.single_flight = single_flight
+        self.context_builder = context_builder
     
     def create_collection_name(self, project_id) -> str:
         return f"collection_{self.vector_db_client.default_vector_size}_{project_id}".strip()
@@ -30,15 +39,23 @@ class NLPController(BaseController):
     async def index_into_vector_db(self, project: Project, 
                              chunks: List[DataChunk], 
                              chunks_ids: List[int],
-                             do_reset: bool = False):
+                             do_reset: bool = False,
+                             create_index: bool = True):
         
         # step1: get collection name
         collection_name = self.create_collection_name(project_id=project.project_id)
         
         # step2: manage items
         texts = [c.chunk_text for c in chunks]
-        metadata = [c.chunk_metadata for c in chunks]
-        vectors = self.embedding_client.embed_text(
+        metadata = [
+            {
+                **(c.chunk_metadata or {}),
+                VectorRecordMetadataEnums.CHUNK_HASH.value: getattr(c, "chunk_hash", None),
+                VectorRecordMetadataEnums.ASSET_ID.value: c.chunk_asset_id,
+            }
+            for c in chunks
+        ]
+        vectors = await self.embedding_client.embed_text(
             text=texts, 
             document_type=DocumentTypeEnums.DOCUMENT.value
         )
@@ -57,84 +74,414 @@ class NLPController(BaseController):
             vectors=vectors,
             metadata=metadata,
             record_ids=chunks_ids,
+            create_index=create_index,
         )
         
         return True
 
-    async def search_vector_db_collection(self, project: Project, text: str, limit: int = 10):
+    async def get_changed_chunks(self, project: Project, chunks: List[DataChunk]) -> List[DataChunk]:
+        """
+        Keep only the chunks that are missing from the collection or whose content hash
+        differs from the one stored with their vector.
+        """
         
-        # step1: get collection name
-        query_vector = None
         collection_name = self.create_collection_name(project_id=project.project_id)
-
-        # step2: get text embedding vector
-        vectors = self.embedding_client.embed_text(
-            text=text,
-            document_type=DocumentTypeEnums.QUERY.value,
+        indexed_hashes = await self.vector_db_client.get_record_hashes(
+            collection_name=collection_name,
+            record_ids=[ c.chunk_id for c in chunks ],
         )
         
+        return [
+            c for c in chunks
+            if c.chunk_id not in indexed_hashes or indexed_hashes[c.chunk_id] != c.chunk_hash
+        ]
+
+    async def list_vector_db_record_ids(self, project: Project, after_record_id: int = 0, limit: int = 1000):
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        return await self.vector_db_client.list_record_ids(collection_name=collection_name,
+                                                           after_record_id=after_record_id, limit=limit)
+
+    async def delete_vector_db_records(self, project: Project, record_ids: List[int]):
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        return await self.vector_db_client.delete_by_record_ids(collection_name=collection_name,
+                                                                record_ids=record_ids)
+
+    async def delete_vector_db_assets(self, project: Project, asset_ids: List[int]):
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        return await self.vector_db_client.delete_by_asset_ids(collection_name=collection_name,
+                                                               asset_ids=asset_ids)
+
+    async def create_vector_db_index(self, project: Project):
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        return await self.vector_db_client.create_vector_index(collection_name=collection_name)
+
+    async def get_query_vector(self, text: str) -> Optional[List[float]]:
+        
+        with observe_stage("embedding"):
+            vectors = await self.embedding_client.embed_text(
+                text=text,
+                document_type=DocumentTypeEnums.QUERY.value,
+            )
+        
         if not vectors or len(vectors) == 0:
-            return False
+            return None
+        
+        return vectors[0] if isinstance(vectors, list) else None
+
+    def get_single_flight_key(self, kind: str, project: Project, text: str, limit: int,
+                              ef_search: Optional[int], hybrid: bool) -> str:
+        normalized_text = " ".join(unicodedata.normalize("NFC", text).split())
+        request_key = json.dumps([
+            normalized_text, limit, ef_search, bool(hybrid),
+            self.generation_client.generation_model_id,
+            self.embedding_client.embedding_model_id,
+        ], ensure_ascii=False)
+        
+        return f"{kind}:{project.project_id}:{hashlib.sha256(request_key.encode('utf-8')).hexdigest()}"
+
+    async def search_vector_db_collection(self, project: Project, text: str, limit: int = 10,
+                                          ef_search: Optional[int] = None, hybrid: bool = False,
+                                          query_vector: Optional[List[float]] = None):
+        """
+        Identical concurrent searches share one embedding and vector search when a single
+        flight coordinator is configured.
+        """
+        
+        if self.single_flight is None:
+            return await self._search_vector_db_collection(
+                project=project, text=text, limit=limit, ef_search=ef_search,
+                hybrid=hybrid, query_vector=query_vector,
+            )
+        
+        return await self.single_flight.run(
+            key=self.get_single_flight_key("search", project, text, limit, ef_search, hybrid),
+            func=lambda: self._search_vector_db_collection(
+                project=project, text=text, limit=limit, ef_search=ef_search,
+                hybrid=hybrid, query_vector=query_vector,
+            ),
+            encode=lambda results: json.dumps([ doc.dict() for doc in results ]) if results else None,
+            decode=lambda payload: [ RetrievedDocument(**doc) for doc in json.loads(payload) ],
+        )
+
+    async def _search_vector_db_collection(self, project: Project, text: str, limit: int = 10,
+                                           ef_search: Optional[int] = None, hybrid: bool = False,
+                                           query_vector: Optional[List[float]] = None):
         
-        if isinstance(vectors, list) and len(vectors) > 0:
-            query_vector = vectors[0]
+        # step1: get collection name
+        collection_name = self.create_collection_name(project_id=project.project_id)
+
+        # step2: get text embedding vector, unless the caller already has it
+        if query_vector is None:
+            query_vector = await self.get_query_vector(text=text)
             
         if not query_vector:
             return False
         
-        # step3: do semantic search
-        results = await self.vector_db_client.search_by_vector(
-            collection_name=collection_name,
-            vector=query_vector,
-            limit=limit,
-        )
+        # step3: do semantic search, optionally fused with lexical matches
+        with observe_stage("vector_search"):
+            if hybrid:
+                results = await self.vector_db_client.hybrid_search(
+                    collection_name=collection_name,
+                    text=text,
+                    vector=query_vector,
+                    limit=limit,
+                    ef_search=ef_search,
+                )
+            else:
+                results = await self.vector_db_client.search_by_vector(
+                    collection_name=collection_name,
+                    vector=query_vector,
+                    limit=limit,
+                    ef_search=ef_search,
+                )
         
         if not results:
             return False
         
         return results
 
-    async def answer_rag_query(self, project: Project, query: str, limit: int = 10):
+    def get_context_builder(self) -> ContextBuilder:
+        if self.context_builder is None:
+            self.context_builder = ContextBuilder(
+                count_tokens=self.generation_client.count_tokens,
+                token_budget=self.app_settings.RAG_CONTEXT_TOKEN_BUDGET,
+            )
+        
+        return self.context_builder
+
+    async def build_rag_prompt(self, project: Project, query: str, limit: int = 10,
+                               ef_search: Optional[int] = None, hybrid: bool = False,
+                               query_vector: Optional[List[float]] = None):
         
-        answer, full_prompt, chat_history = None, None, None
+        full_prompt, chat_history = None, None
         
         # step1: retrieve related documents
         retrived_documents = await self.search_vector_db_collection(
             project=project,
             text=query,
             limit=limit,
+            ef_search=ef_search,
+            hybrid=hybrid,
+            query_vector=query_vector,
         )
         
         if not retrived_documents or len(retrived_documents) == 0 or not self.template_parser:
-            return answer, full_prompt, chat_history
+            return retrived_documents, full_prompt, chat_history
 
         # step2: construct LLM prompt
-        system_prompt = self.template_parser.get("rag", "system_prompt")
+        with observe_stage("prompt_build"):
+            system_prompt = self.template_parser.get("rag", "system_prompt")
+        
+            # fill the token budget with the best non-overlapping content
+            context_builder = self.get_context_builder()
+            document_overhead_tokens = context_builder.get_token_count(
+                self.template_parser.get("rag", "document_prompt", {"doc_num": len(retrived_documents), "chunk_text": ""})
+            )
+            packed_documents = context_builder.pack(
+                documents=retrived_documents,
+                document_overhead_tokens=document_overhead_tokens,
+            )
         
-        document_prompts = "\n".join([
-            self.template_parser.get("rag", "document_prompt", {
-                "doc_num": i + 1,
-                "chunk_text": self.generation_client._process_text(doc.text),
+            document_prompts = self.template_parser.get_joined("rag", "document_prompt", [
+                {
+                    "doc_num": i + 1,
+                    "chunk_text": chunk_text,
+                }
+                for i, (_, chunk_text) in enumerate(packed_documents)
+            ])
+        
+            footer_prompt = self.template_parser.get("rag", "footer_prompt", {
+                "query": query,
             })
-            for i, doc in enumerate(retrived_documents)
-        ])
         
-        footer_prompt = self.template_parser.get("rag", "footer_prompt", {
-            "query": query,
-        })
+            chat_history = [
+                self.generation_client.construct_prompt(
+                    prompt=system_prompt,
+                    role=self.generation_client.enums.SYSTEM.value,
+                )
+            ]
+        
+            full_prompt = "\n\n".join([document_prompts, footer_prompt])
+        
+        return retrived_documents, full_prompt, chat_history
+
+    def get_answer_cache_scope(self, limit: int, ef_search: Optional[int], hybrid: bool) -> dict:
+        # everything besides the query that changes the answer of a project
+        return {
+            "generation_model_id": self.generation_client.generation_model_id,
+            "embedding_model_id": self.embedding_client.embedding_model_id,
+            "limit": limit,
+            "ef_search": ef_search,
+            "hybrid": bool(hybrid),
+        }
+
+    async def get_cached_answer(self, project: Project, query: str, limit: int = 10,
+                                ef_search: Optional[int] = None, hybrid: bool = False):
+        """
+        Look the query up in the semantic answer cache.
+        Returns (cached_answer, cache_context), where cache_context is what `set_cached_answer`
+        needs to store a fresh answer. Both are None when no cache is configured.
+        """
+        
+        if self.answer_cache is None:
+            return None, None
+        
+        query_vector = await self.get_query_vector(text=query)
+        if not query_vector:
+            return None, None
+        
+        cache_context = {
+            "version": await self.answer_cache.get_version(project_id=project.project_id),
+            "scope": self.get_answer_cache_scope(limit=limit, ef_search=ef_search, hybrid=hybrid),
+            "query_vector": query_vector,
+        }
+        
+        cached_answer = await self.answer_cache.get(
+            project_id=project.project_id,
+            version=cache_context["version"],
+            scope=cache_context["scope"],
+            query_vector=query_vector,
+        )
+        
+        return cached_answer, cache_context
+
+    async def set_cached_answer(self, project: Project, cache_context: Optional[dict], answer: str,
+                                full_prompt: str, chat_history: list, retrived_documents: list):
         
-        chat_history = [
-            self.generation_client.construct_prompt(
-                prompt=system_prompt,
-                role=self.generation_client.enums.SYSTEM.value,
+        if self.answer_cache is None or cache_context is None or not answer:
+            return None
+        
+        await self.answer_cache.set(
+            project_id=project.project_id,
+            version=cache_context["version"],
+            scope=cache_context["scope"],
+            query_vector=cache_context["query_vector"],
+            payload={
+                "answer": answer,
+                "full_prompt": full_prompt,
+                "chat_history": chat_history,
+                "documents": [ doc.dict() for doc in retrived_documents or [] ],
+            },
+        )
+
+    async def invalidate_cached_answers(self, project: Project):
+        if self.answer_cache is None:
+            return None
+        
+        return await self.answer_cache.invalidate(project_id=project.project_id)
+
+    async def answer_rag_query(self, project: Project, query: str, limit: int = 10,
+                               ef_search: Optional[int] = None, hybrid: bool = False):
+        """
+        Return the answer, the prompt, the chat history and the retrieved documents.
+        Identical concurrent questions share one retrieval and generation when a single
+        flight coordinator is configured.
+        """
+        
+        if self.single_flight is None:
+            return await self._answer_rag_query(
+                project=project, query=query, limit=limit, ef_search=ef_search, hybrid=hybrid,
             )
-        ]
         
-        full_prompt = "\n\n".join([document_prompts, footer_prompt])
+        return await self.single_flight.run(
+            key=self.get_single_flight_key("answer", project, query, limit, ef_search, hybrid),
+            func=lambda: self._answer_rag_query(
+                project=project, query=query, limit=limit, ef_search=ef_search, hybrid=hybrid,
+            ),
+            encode=self.encode_rag_answer,
+            decode=self.decode_rag_answer,
+        )
 
-        answer = self.generation_client.generate_text(
-            prompt=full_prompt,
+    def encode_rag_answer(self, result: tuple) -> Optional[str]:
+        answer, full_prompt, chat_history, retrived_documents = result
+        if not answer:
+            return None
+        
+        return json.dumps([
+            answer, full_prompt, chat_history,
+            [ doc.dict() for doc in retrived_documents or [] ],
+        ], ensure_ascii=False)
+
+    def decode_rag_answer(self, payload: str) -> tuple:
+        answer, full_prompt, chat_history, documents = json.loads(payload)
+        return answer, full_prompt, chat_history, [ RetrievedDocument(**doc) for doc in documents ]
+
+    async def _answer_rag_query(self, project: Project, query: str, limit: int = 10,
+                                ef_search: Optional[int] = None, hybrid: bool = False):
+        
+        answer = None
+        
+        cached_answer, cache_context = await self.get_cached_answer(
+            project=project,
+            query=query,
+            limit=limit,
+            ef_search=ef_search,
+            hybrid=hybrid,
+        )
+        
+        if cached_answer:
+            retrived_documents = [ RetrievedDocument(**doc) for doc in cached_answer["documents"] ]
+            return (cached_answer["answer"], cached_answer["full_prompt"],
+                    cached_answer["chat_history"], retrived_documents)
+        
+        retrived_documents, full_prompt, chat_history = await self.build_rag_prompt(
+            project=project,
+            query=query,
+            limit=limit,
+            ef_search=ef_search,
+            hybrid=hybrid,
+            query_vector=cache_context["query_vector"] if cache_context else None,
+        )
+        
+        if not full_prompt:
+            return answer, full_prompt, chat_history, retrived_documents
+
+        with observe_stage("generation"):
+            answer = await self.generation_client.generate_text(
+                prompt=full_prompt,
+                chat_history=chat_history,
+            )
+        
+        await self.set_cached_answer(
+            project=project,
+            cache_context=cache_context,
+            answer=answer,
+            full_prompt=full_prompt,
             chat_history=chat_history,
+            retrived_documents=retrived_documents,
+        )
+        
+        return answer, full_prompt, chat_history, retrived_documents
+
+    async def answer_rag_query_stream(self, project: Project, query: str, limit: int = 10,
+                                      ef_search: Optional[int] = None, hybrid: bool = False):
+        """
+        Same as answer_rag_query but returns the retrieved documents and an async
+        iterator of generated tokens instead of the full answer.
+        """
+        
+        token_stream = None
+        
+        cached_answer, cache_context = await self.get_cached_answer(
+            project=project,
+            query=query,
+            limit=limit,
+            ef_search=ef_search,
+            hybrid=hybrid,
+        )
+        
+        if cached_answer:
+            retrived_documents = [ RetrievedDocument(**doc) for doc in cached_answer["documents"] ]
+            return retrived_documents, self.replay_cached_answer(cached_answer["answer"])
+        
+        retrived_documents, full_prompt, chat_history = await self.build_rag_prompt(
+            project=project,
+            query=query,
+            limit=limit,
+            ef_search=ef_search,
+            hybrid=hybrid,
+            query_vector=cache_context["query_vector"] if cache_context else None,
         )
         
-        return answer, full_prompt, chat_history
+        if not full_prompt:
+            return retrived_documents, token_stream
+        
+        token_stream = observe_stream_stage("generation", self.generation_client.generate_text_stream(
+            prompt=full_prompt,
+            chat_history=chat_history,
+        ))
+        
+        if cache_context is not None:
+            token_stream = self.cache_streamed_answer(
+                project=project,
+                cache_context=cache_context,
+                token_stream=token_stream,
+                full_prompt=full_prompt,
+                chat_history=chat_history,
+                retrived_documents=retrived_documents,
+            )
+        
+        return retrived_documents, token_stream
+
+    async def replay_cached_answer(self, answer: str):
+        yield answer
+
+    async def cache_streamed_answer(self, project: Project, cache_context: dict, token_stream,
+                                    full_prompt: str, chat_history: list, retrived_documents: list):
+        # only a stream that ran to the end is stored, a disconnected client leaves no partial answer
+        tokens = []
+        try:
+            async for token in token_stream:
+                tokens.append(token)
+                yield token
+        finally:
+            await token_stream.aclose()
+        
+        await self.set_cached_answer(
+            project=project,
+            cache_context=cache_context,
+            answer="".join(tokens),
+            full_prompt=full_prompt,
+            chat_history=chat_history,
+            retrived_documents=retrived_documents,
+        )
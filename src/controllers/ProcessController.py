@@ -1,10 +1,12 @@
 from .BaseController import BaseController
 from .ProjectController import ProjectController
-from langchain_community.document_loaders import TextLoader
-from langchain_community.document_loaders import PyMuPDFLoader
-from models import ProcessingEnums
+from models import ProcessingEnums, ChunkSizeUnitEnums
+from utils.text_chunker import TextChunker
+from utils.chunk_deduplicator import ChunkDeduplicator
 from dataclasses import dataclass
-from typing import List
+from typing import List, Iterator, Optional
+import hashlib
+import fitz
 import os
 
 @dataclass
@@ -14,6 +16,9 @@ class Document:
 
 class ProcessController(BaseController):
     
+    # bump whenever the splitting output changes, so processed assets are chunked again
+    SPLITTER_VERSION = "linear-2"
+    
     def __init__(self, project_id: str):
         super().__init__()
         self.project_id = project_id
@@ -22,9 +27,8 @@ class ProcessController(BaseController):
     def get_file_extenstion(self, file_id: str):
         return os.path.splitext(file_id)[-1]
     
-    def get_file_loader(self, file_id: str):
+    def get_file_hash(self, file_id: str):
         
-        file_ext = self.get_file_extenstion(file_id=file_id)
         file_path = os.path.join(
             self.project_path,
             file_id
@@ -33,69 +37,179 @@ class ProcessController(BaseController):
         if not os.path.exists(file_path):
             return None
         
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunck := f.read(self.app_settings.FILE_DEFAULT_CHUNCK_SIZE):
+                file_hash.update(chunck)
+        
+        return file_hash.hexdigest()
+    
+    def get_processing_signature(self, file_hash: str, chunk_size: int, overlap_size: int,
+                                 chunk_size_unit: str = ChunkSizeUnitEnums.CHAR.value,
+                                 tokenizer_name: Optional[str] = None):
+        processing_signature = {
+            "file_hash": file_hash,
+            "chunk_size": chunk_size,
+            "overlap_size": overlap_size,
+            "chunk_size_unit": chunk_size_unit,
+            "splitter_version": self.SPLITTER_VERSION,
+        }
+        
+        # token chunks change with the tokenizer, char chunks keep their old signature
+        if chunk_size_unit == ChunkSizeUnitEnums.TOKEN.value:
+            processing_signature["tokenizer"] = tokenizer_name
+        
+        return processing_signature
+    
+    def get_file_path(self, file_id: str):
+        
+        file_path = os.path.join(
+            self.project_path,
+            file_id
+        )
+        
+        if not os.path.exists(file_path):
+            return None
+        
+        return file_path
+    
+    def iter_file_pages(self, file_id: str) -> Optional[Iterator[Document]]:
+        """
+        Lazily yield the file one page at a time, so only the current page is held in memory.
+        PDFs are iterated page by page with PyMuPDF, text files are read in buffered blocks
+        cut at line boundaries.
+        """
+        
+        file_ext = self.get_file_extenstion(file_id=file_id)
+        file_path = self.get_file_path(file_id=file_id)
+        
+        if file_path is None:
+            return None
+        
         if file_ext == ProcessingEnums.TXT.value:
-            return TextLoader(file_path=file_path, encoding="utf-8")
+            return self.iter_text_pages(file_path=file_path)
         
         if file_ext == ProcessingEnums.PDF.value:
-            return PyMuPDFLoader(file_path=file_path)
+            return self.iter_pdf_pages(file_path=file_path)
 
         return None
     
-    def get_file_content(self, file_id: str):
-        
-        loader = self.get_file_loader(file_id=file_id)
+    def iter_pdf_pages(self, file_path: str) -> Iterator[Document]:
+        
+        with fitz.open(file_path) as pdf_document:
+            total_pages = pdf_document.page_count
+            for page in pdf_document:
+                yield Document(
+                    page_content=page.get_text(),
+                    metadata={
+                        "source": file_path,
+                        "file_path": file_path,
+                        "page": page.number,
+                        "total_pages": total_pages,
+                    },
+                )
+    
+    def iter_text_pages(self, file_path: str) -> Iterator[Document]:
         
-        if loader:
-            return loader.load()
+        block_size = self.app_settings.FILE_DEFAULT_CHUNCK_SIZE
+        remainder = ""
         
-        return None
+        with open(file_path, "r", encoding="utf-8") as f:
+            while block := f.read(block_size):
+                block = remainder + block
+                
+                # carry the unfinished last line over to the next block
+                line_end = block.rfind("\n")
+                if line_end == -1:
+                    remainder = block
+                    continue
+                
+                remainder = block[line_end + 1:]
+                yield Document(
+                    page_content=block[:line_end + 1],
+                    metadata={"source": file_path},
+                )
+        
+        if remainder:
+            yield Document(
+                page_content=remainder,
+                metadata={"source": file_path},
+            )
 
-    def process_file_content(self, file_content: list, file_id: str, 
-                             chunk_size: int, overlap_size: int):
-        
-        file_content_txts = [
-            rec.page_content
-            for rec in file_content
-        ]
-        
-        file_content_metadata = [
-            rec.metadata
-            for rec in file_content
-        ]
-        
-        # chunks = text_splitter.create_documents(
-        #     file_content_txts,
-        #     metadatas=file_content_metadata,
-        # )
-        
-        chunks = self.process_simpler_splitter(
-            texts=file_content_txts,
-            metadatas=file_content_metadata,
+    def iter_file_chunks(self, file_id: str, chunk_size: int, overlap_size: int,
+                         chunk_size_unit: str = ChunkSizeUnitEnums.CHAR.value,
+                         tokenizer_name: Optional[str] = None) -> Optional[Iterator[Document]]:
+        
+        file_pages = self.iter_file_pages(file_id=file_id)
+        if file_pages is None:
+            return None
+        
+        text_chunker = TextChunker(
             chunk_size=chunk_size,
+            overlap_size=overlap_size,
+            size_unit=chunk_size_unit,
+            tokenizer_name=tokenizer_name,
         )
         
-        return chunks    
+        return (
+            Document(page_content=chunk_text, metadata=chunk_metadata)
+            for chunk_text, chunk_metadata in text_chunker.iter_chunks(
+                (page.page_content, page.metadata) for page in file_pages
+            )
+        )
+
+def stream_file_chunks(project_id: str, file_id: str, chunk_size: int, overlap_size: int,
+                       chunk_size_unit: str, file_key: int, chunks_queue, batch_size: int = 500,
+                       cancel_event=None, dedup_options: Optional[dict] = None,
+                       tokenizer_name: Optional[str] = None):
+    """
+    Load and chunk a single file inside the file processing pool, pushing chunk batches
+    to `chunks_queue` as they are produced. The queue is bounded, so a slow writer
+    pauses the parser instead of letting chunks pile up in memory.
+    Every file ends with a ("done", file_key, error) message.
+    With `dedup_options` (ChunkDeduplicator arguments) every chunk also carries its text hash
+    and MinHash signature, so the writer only has to look them up.
+    """
     
-    def process_simpler_splitter(self, texts: List[str], metadatas: List[dict], chunk_size: int, splitter_tag: str = "\n"):
-        
-        full_text = " ".join(texts)
+    error = None
+    try:
+        process_controller = ProcessController(project_id=project_id)
+        chunk_deduplicator = ChunkDeduplicator(**dedup_options) if dedup_options else None
         
-        lines = [doc.strip() for doc in full_text.split(splitter_tag) if len(doc.strip()) > 1]    
-
-        chunks = []
-        current_chunk = ""
-        
-        for line in lines:
-            current_chunk += line + splitter_tag
-            if len(current_chunk) >= chunk_size:
-                chunks.append(Document(
-                    page_content=current_chunk.strip(),
-                    metadata={},
-                ))
+        file_chunks = process_controller.iter_file_chunks(
+            file_id=file_id,
+            chunk_size=chunk_size,
+            overlap_size=overlap_size,
+            chunk_size_unit=chunk_size_unit,
+            tokenizer_name=tokenizer_name,
+        )
+        if file_chunks is None:
+            raise ValueError(f"Unsupported or missing file: {file_id}")
+        
+        batch = []
+        for chunk in file_chunks:
+            chunk_record = {
+                "chunk_text": chunk.page_content,
+                "chunk_metadata": chunk.metadata,
+            }
+            if chunk_deduplicator is not None:
+                chunk_record["chunk_text_hash"] = chunk_deduplicator.get_text_hash(chunk.page_content)
+                chunk_record["chunk_minhash"] = chunk_deduplicator.signature_to_bytes(
+                    chunk_deduplicator.get_signature(chunk.page_content)
+                )
+            
+            batch.append(chunk_record)
+            
+            if len(batch) >= batch_size:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
                 
-                current_chunk = ""
-
-        if len(current_chunk) > 0:
-            chunks.append(current_chunk)
-
-        return chunks
+                chunks_queue.put(("chunks", file_key, batch))
+                batch = []
+        
+        if batch:
+            chunks_queue.put(("chunks", file_key, batch))
+    except Exception as e:
+        error = str(e)
+    
+    chunks_queue.put(("done", file_key, error))
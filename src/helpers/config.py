@@ -9,6 +9,13 @@ class Settings(BaseSettings):
     FILE_ALLOWED_TYPES: list
     FILE_MAX_SIZE: int
     FILE_DEFAULT_CHUNCK_SIZE: int
+    FILE_PROCESSING_WORKERS: Optional[int] = None
+    FILE_PROCESSING_BATCH_SIZE: int = 500
+    FILE_PROCESSING_QUEUE_SIZE: int = 16
+    CHUNK_DEDUP_ENABLED: bool = True
+    CHUNK_DEDUP_THRESHOLD: float = 0.9
+    CHUNK_DEDUP_NUM_PERM: int = 64
+    CHUNK_DEDUP_BANDS: int = 8
     
     POSTGRES_USERNAME:str
     POSTGRES_PASSWORD:str
@@ -22,24 +29,55 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     OPENAI_API_URL: str
     COHERE_API_KEY: str
+    
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_TIMEOUT: float = 60.0
+    OPENAI_MAX_CONCURRENCY: int = 16
+    COHERE_MAX_CONCURRENCY: int = 16
 
     GENERATION_MODEL_ID_LITERAL: Optional[List[str]] = None
     GENERATION_MODEL_ID: str
     EMBEDDING_MODEL_ID: str
     EMBEDDING_SIZE: int
 
+    CACHE_REDIS_URL: Optional[str] = None
+    EMBEDDING_CACHE_LRU_SIZE: int = 10000
+    EMBEDDING_CACHE_TTL: int = 2592000
+    EMBEDDING_BATCH_MAX_WAIT_MS: int = 5
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_THRESHOLD: float = 0.95
+    ANSWER_CACHE_LOOKUP_WINDOW: int = 32
+    ANSWER_CACHE_TTL: int = 86400
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_TIMEOUT: int = 60
+
     INPUT_DEFAULT_MAX_CHARACTERS: int
     GENERATION_DEFAULT_MAX_TOKENS: int
     GENERATION_DEFAULT_TEMPERATURE: float
+    RAG_CONTEXT_TOKEN_BUDGET: int = 3000
     
     VECTOR_DB_BACKEND_LITERAL: Optional[List[str]] = None
     VECTOR_DB_BACKEND: str
     VECTOR_DB_PATH: str
     VECOTR_DB_DISTANCE_METHOD: str
     VECTOR_DB_PGVEC_INDEX_THRESHOLD: int = 100
+    VECTOR_DB_PGVEC_USE_COPY: bool = True
+    VECTOR_DB_HNSW_EF_SEARCH: Optional[int] = None
+    VECTOR_DB_PGVEC_LISTEN_CHANGES: bool = False
+    VECTOR_DB_PGVEC_TEXT_SEARCH_CONFIG: str = "simple"
+    VECTOR_DB_HYBRID_CANDIDATES: int = 50
+    VECTOR_DB_HYBRID_RRF_K: int = 60
+
+    INDEXING_PAGE_SIZE: int = 100
+    INDEXING_CONCURRENCY: int = 4
+    INDEXING_QUEUE_SIZE: int = 8
+    INDEXING_RANGE_SIZE: int = 10000
 
     PRIMARY_LANG: str
     DEFAULT_LANG: str
+    TEMPLATES_RELOAD_INTERVAL: int = 0
     
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
@@ -48,6 +86,7 @@ class Settings(BaseSettings):
     CELERY_TASK_ACKS_LATE: bool
     CELERY_WORKER_CONCURRENY: int
     CELERY_FLOWER_PASSWORD: str
+    CELERY_WORKER_METRICS_PORT: int = 0
     
     class Config:
         env_file = ".env"
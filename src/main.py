@@ -5,8 +5,15 @@ from contextlib import asynccontextmanager
 from stores.llm.LLMProviderFactory import LLMProviderFactory
 from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
 from stores.llm.templates.template_parser import TemplateParser
+from stores.llm.EmbeddingBatcher import EmbeddingBatcher
+from stores.cache.EmbeddingCache import EmbeddingCache
+from stores.cache.SemanticAnswerCache import SemanticAnswerCache
+from stores.cache.SingleFlight import SingleFlight
+from utils.context_builder import ContextBuilder
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from utils.metrics import setup_metrics
+from utils.metrics import setup_metrics, instrument_db_engine
+import redis.asyncio as redis
+import asyncio
 
 
 @asynccontextmanager
@@ -16,6 +23,7 @@ async def lifespan(app: FastAPI):
     postgres_conn = f"postgresql+asyncpg://{settings.POSTGRES_USERNAME}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_MAIN_DATABASE}"
     
     app.state.db_engine = create_async_engine(url=postgres_conn)
+    instrument_db_engine(app.state.db_engine)
     
     app.state.db_client = async_sessionmaker(
         bind=app.state.db_engine, 
@@ -23,6 +31,10 @@ async def lifespan(app: FastAPI):
         expire_on_commit=False,
     )
     
+    app.state.redis_client = None
+    if settings.CACHE_REDIS_URL:
+        app.state.redis_client = redis.from_url(settings.CACHE_REDIS_URL)
+    
     llm_provider_factory = LLMProviderFactory(settings)
     vector_db_provider_factory = VectorDBProviderFactory(config=settings, db_client=app.state.db_client)
     
@@ -33,15 +45,52 @@ async def lifespan(app: FastAPI):
     app.state.generation_client.set_generation_model(
         model_id = settings.GENERATION_MODEL_ID,
     )
+    # the tokenizer may be downloaded, keep that off the event loop
+    await asyncio.to_thread(app.state.generation_client.load_tokenizer)
+    
+    # one builder per process, so its token counts are cached across requests
+    app.state.context_builder = ContextBuilder(
+        count_tokens=app.state.generation_client.count_tokens,
+        token_budget=settings.RAG_CONTEXT_TOKEN_BUDGET,
+    )
     
     # embedding client
-    app.state.embedding_client = llm_provider_factory.create(
+    embedding_client = llm_provider_factory.create(
         provider=settings.EMBEDDING_BACKEND,
     )
-    app.state.embedding_client.set_embedding_model(
+    embedding_client.set_embedding_model(
         model_id = settings.EMBEDDING_MODEL_ID,
         embedding_size = settings.EMBEDDING_SIZE,
     )
+    # concurrent query misses share one provider call
+    embedding_client = EmbeddingBatcher(
+        embedding_client=embedding_client,
+        max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+    )
+    app.state.embedding_client = EmbeddingCache(
+        embedding_client=embedding_client,
+        provider=settings.EMBEDDING_BACKEND,
+        redis_client=app.state.redis_client,
+        lru_size=settings.EMBEDDING_CACHE_LRU_SIZE,
+        ttl=settings.EMBEDDING_CACHE_TTL,
+    )
+    
+    app.state.answer_cache = None
+    if settings.ANSWER_CACHE_ENABLED and app.state.redis_client:
+        app.state.answer_cache = SemanticAnswerCache(
+            redis_client=app.state.redis_client,
+            threshold=settings.ANSWER_CACHE_THRESHOLD,
+            ttl=settings.ANSWER_CACHE_TTL,
+            lookup_window=settings.ANSWER_CACHE_LOOKUP_WINDOW,
+        )
+    
+    app.state.single_flight = None
+    if settings.SINGLE_FLIGHT_ENABLED:
+        app.state.single_flight = SingleFlight(
+            redis_client=app.state.redis_client,
+            timeout=settings.SINGLE_FLIGHT_TIMEOUT,
+        )
     
     # vector db client
     app.state.vector_db_client = vector_db_provider_factory.create(
@@ -52,12 +101,16 @@ async def lifespan(app: FastAPI):
     app.state.template_parser = TemplateParser(
         language=settings.PRIMARY_LANG,
         default_language=settings.DEFAULT_LANG,
+        reload_interval=settings.TEMPLATES_RELOAD_INTERVAL,
     )
     
     yield
     
     await app.state.db_engine.dispose()
     await app.state.vector_db_client.disconnect()
+    await llm_provider_factory.disconnect()
+    if app.state.redis_client:
+        await app.state.redis_client.aclose()
 
 app = FastAPI(lifespan=lifespan)
 setup_metrics(app)
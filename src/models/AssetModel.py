@@ -1,6 +1,6 @@
 from .db_schemes import Asset
 from .BaseDataModel import BaseDataModel
-from sqlalchemy import func
+from sqlalchemy import func, update
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
@@ -47,3 +47,13 @@ class AssetModel(BaseDataModel):
             records = results.scalar_one_or_none()
         
         return records
+    
+    async def update_asset_processing(self, asset_id: int, asset_hash: str, asset_config: dict):
+        
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = update(Asset).where(Asset.asset_id == asset_id).values(
+                    asset_hash=asset_hash,
+                    asset_config=asset_config,
+                )
+                await session.execute(stmt)
@@ -1,8 +1,12 @@
 from .db_schemes import DataChunk
 from .BaseDataModel import BaseDataModel
-from sqlalchemy import func, delete
+from sqlalchemy import func, delete, insert, update, cast, or_, String
 from sqlalchemy.future import select
+from sqlalchemy.sql import text as sql_text
 from sqlalchemy.ext.asyncio import async_sessionmaker
+from typing import List, Optional
+import json
+import uuid
 
 
 class ChunkModel(BaseDataModel):
@@ -44,6 +48,97 @@ class ChunkModel(BaseDataModel):
         
         return len(chunks)
 
+    async def bulk_insert_chunks(self, chunks: List[dict], batch_size: int = 5000) -> List[int]:
+        """
+        Insert plain chunk dicts (chunk_text, chunk_metadata, chunk_order, chunk_project_id,
+        chunk_asset_id and optionally chunk_text_hash, chunk_minhash, chunk_duplicate_of_id)
+        without building ORM objects and return the new chunk ids in order.
+        Ids are reserved from the table sequence first, unless every chunk already carries
+        a chunk_id from `reserve_chunk_ids`, then rows are streamed with COPY.
+        """
+        
+        chunk_ids = []
+        if not chunks:
+            return chunk_ids
+        
+        columns = ["chunk_id", "chunk_uuid", "chunk_text", "chunk_metadata",
+                   "chunk_order", "chunk_project_id", "chunk_asset_id",
+                   "chunk_text_hash", "chunk_minhash", "chunk_duplicate_of_id"]
+        
+        async with self.db_client() as session:
+            async with session.begin():
+                for i in range(0, len(chunks), batch_size):
+                    batch = chunks[i: min(len(chunks), i + batch_size)]
+                    
+                    if all("chunk_id" in chunk for chunk in batch):
+                        batch_ids = [ chunk["chunk_id"] for chunk in batch ]
+                    else:
+                        # executing through the session also opens the driver-level transaction
+                        result = await session.execute(self.get_reserve_ids_sql(), {
+                            "table_name": DataChunk.__tablename__,
+                            "count": len(batch),
+                        })
+                        batch_ids = result.scalars().all()
+                    
+                    records = [
+                        (
+                            chunk_id,
+                            uuid.uuid4(),
+                            chunk["chunk_text"],
+                            json.dumps(chunk["chunk_metadata"] or {}, ensure_ascii=False),
+                            chunk["chunk_order"],
+                            chunk["chunk_project_id"],
+                            chunk["chunk_asset_id"],
+                            chunk.get("chunk_text_hash"),
+                            chunk.get("chunk_minhash"),
+                            chunk.get("chunk_duplicate_of_id"),
+                        )
+                        for chunk_id, chunk in zip(batch_ids, batch)
+                    ]
+                    
+                    connection = await session.connection()
+                    raw_connection = await connection.get_raw_connection()
+                    driver_connection = raw_connection.driver_connection
+                    
+                    if hasattr(driver_connection, "copy_records_to_table"):
+                        await driver_connection.copy_records_to_table(
+                            DataChunk.__tablename__,
+                            records=records,
+                            columns=columns,
+                        )
+                    else:
+                        await session.execute(
+                            insert(DataChunk),
+                            [ dict(zip(columns, record)) for record in records ],
+                        )
+                    
+                    chunk_ids.extend(batch_ids)
+        
+        return chunk_ids
+
+    def get_reserve_ids_sql(self):
+        return sql_text(
+            "SELECT nextval(pg_get_serial_sequence(:table_name, 'chunk_id')) "
+            "FROM generate_series(1, :count)"
+        )
+    
+    async def reserve_chunk_ids(self, count: int) -> List[int]:
+        """
+        Take `count` ids from the chunks sequence, so rows can reference each other before insertion.
+        """
+        
+        if count <= 0:
+            return []
+        
+        async with self.db_client() as session:
+            result = await session.execute(self.get_reserve_ids_sql(), {
+                "table_name": DataChunk.__tablename__,
+                "count": count,
+            })
+            chunk_ids = result.scalars().all()
+        
+        return chunk_ids
+
     async def delete_chunks_by_project_id(self, project_id: str):
         
         async with self.db_client() as session:
@@ -53,6 +148,46 @@ class ChunkModel(BaseDataModel):
         
         return result.rowcount
 
+    async def delete_chunks_by_asset_id(self, asset_id: int):
+        """
+        Delete the chunks of an asset. Chunks of other assets that were collapsed into one
+        of them are handed over first: the oldest duplicate becomes the new original and
+        the rest point to it, so the content stays in the project.
+        The promoted chunk never had a vector, so it is marked as not embedded and the next
+        push embeds it even though its chunk id is older than the chunks indexed since.
+        Returns the number of deleted chunks and the promoted chunk ids.
+        """
+        
+        promote_sql = sql_text(
+            f"WITH promoted AS ("
+            f"SELECT DISTINCT ON (duplicate.chunk_duplicate_of_id) "
+            f"duplicate.chunk_duplicate_of_id AS original_id, duplicate.chunk_id AS promoted_id "
+            f"FROM {DataChunk.__tablename__} AS duplicate "
+            f"JOIN {DataChunk.__tablename__} AS original ON original.chunk_id = duplicate.chunk_duplicate_of_id "
+            f"WHERE original.chunk_asset_id = :asset_id AND duplicate.chunk_asset_id <> :asset_id "
+            f"ORDER BY duplicate.chunk_duplicate_of_id, duplicate.chunk_id"
+            f") "
+            f"UPDATE {DataChunk.__tablename__} SET chunk_duplicate_of_id = "
+            f"CASE WHEN {DataChunk.__tablename__}.chunk_id = promoted.promoted_id THEN NULL ELSE promoted.promoted_id END, "
+            f"chunk_indexed_generation = "
+            f"CASE WHEN {DataChunk.__tablename__}.chunk_id = promoted.promoted_id THEN NULL "
+            f"ELSE {DataChunk.__tablename__}.chunk_indexed_generation END "
+            f"FROM promoted "
+            f"WHERE {DataChunk.__tablename__}.chunk_duplicate_of_id = promoted.original_id "
+            f"AND {DataChunk.__tablename__}.chunk_asset_id <> :asset_id "
+            f"RETURNING {DataChunk.__tablename__}.chunk_id, {DataChunk.__tablename__}.chunk_duplicate_of_id"
+        )
+        
+        async with self.db_client() as session:
+            async with session.begin():
+                result = await session.execute(promote_sql, {"asset_id": asset_id})
+                promoted_ids = [ record.chunk_id for record in result.all() if record.chunk_duplicate_of_id is None ]
+                
+                stmt = delete(DataChunk).where(DataChunk.chunk_asset_id == asset_id)
+                result = await session.execute(stmt)
+        
+        return result.rowcount, promoted_ids
+
     async def get_project_chunks(self, project_id: str, page_no: int = 1, page_size: int = 100):
         
         async with self.db_client() as session:
@@ -62,6 +197,167 @@ class ChunkModel(BaseDataModel):
         
         return records
     
+    async def iter_project_chunks(self, project_id: str, page_size: int = 100, after_chunk_id: int = 0,
+                                  until_chunk_id: Optional[int] = None, unindexed_generation: Optional[int] = None):
+        """
+        Stream the project chunks in pages ordered by chunk_id using keyset pagination,
+        so every page costs the same no matter how deep into the project it is.
+        Rows are lightweight (chunk_id, chunk_text, chunk_metadata, chunk_asset_id, chunk_hash) tuples,
+        where chunk_hash is an md5 of the text and metadata computed by Postgres.
+        Chunks collapsed into a duplicate of another chunk are skipped, they are never embedded.
+        `until_chunk_id` (inclusive) bounds the stream to a single chunk-id range.
+        With `unindexed_generation`, chunks already embedded in that generation are skipped.
+        """
+        
+        last_chunk_id = after_chunk_id
+        while True:
+            async with self.db_client() as session:
+                stmt = select(
+                    DataChunk.chunk_id,
+                    DataChunk.chunk_text,
+                    DataChunk.chunk_metadata,
+                    DataChunk.chunk_asset_id,
+                    self.get_chunk_hash_expression().label("chunk_hash"),
+                ).where(
+                    DataChunk.chunk_project_id == project_id,
+                    DataChunk.chunk_id > last_chunk_id,
+                    DataChunk.chunk_duplicate_of_id.is_(None),
+                )
+                if until_chunk_id is not None:
+                    stmt = stmt.where(DataChunk.chunk_id <= until_chunk_id)
+                if unindexed_generation is not None:
+                    stmt = stmt.where(self.get_unindexed_condition(unindexed_generation))
+                stmt = stmt.order_by(DataChunk.chunk_id).limit(page_size)
+                result = await session.execute(stmt)
+                records = result.all()
+            
+            if len(records) == 0:
+                break
+            
+            yield records
+            
+            if len(records) < page_size:
+                break
+            
+            last_chunk_id = records[-1].chunk_id
+    
+    async def iter_project_chunk_signatures(self, project_id: str, exclude_asset_ids: List[int] = None,
+                                            page_size: int = 5000):
+        """
+        Stream (chunk_id, chunk_text_hash, chunk_minhash) of the project's original chunks
+        with keyset pagination, to seed the deduplication index of a processing run.
+        """
+        
+        last_chunk_id = 0
+        while True:
+            async with self.db_client() as session:
+                stmt = select(
+                    DataChunk.chunk_id,
+                    DataChunk.chunk_text_hash,
+                    DataChunk.chunk_minhash,
+                ).where(
+                    DataChunk.chunk_project_id == project_id,
+                    DataChunk.chunk_id > last_chunk_id,
+                    DataChunk.chunk_duplicate_of_id.is_(None),
+                    DataChunk.chunk_text_hash.is_not(None),
+                )
+                if exclude_asset_ids:
+                    stmt = stmt.where(DataChunk.chunk_asset_id.not_in(exclude_asset_ids))
+                stmt = stmt.order_by(DataChunk.chunk_id).limit(page_size)
+                result = await session.execute(stmt)
+                records = result.all()
+            
+            if len(records) == 0:
+                break
+            
+            yield records
+            
+            if len(records) < page_size:
+                break
+            
+            last_chunk_id = records[-1].chunk_id
+    
+    def get_unindexed_condition(self, generation: int):
+        return or_(
+            DataChunk.chunk_indexed_generation.is_(None),
+            DataChunk.chunk_indexed_generation != generation,
+        )
+    
+    async def mark_chunks_indexed(self, chunk_ids: List[int], generation: int):
+        
+        if not chunk_ids:
+            return 0
+        
+        async with self.db_client() as session:
+            stmt = update(DataChunk).where(DataChunk.chunk_id.in_(chunk_ids)).values(
+                chunk_indexed_generation=generation,
+            )
+            result = await session.execute(stmt)
+            await session.commit()
+        
+        return result.rowcount
+    
+    def get_chunk_hash_expression(self):
+        return func.md5(DataChunk.chunk_text + cast(DataChunk.chunk_metadata, String))
+    
+    async def get_existing_chunk_ids(self, project_id: str, chunk_ids: List[int]) -> set:
+        
+        if not chunk_ids:
+            return set()
+        
+        async with self.db_client() as session:
+            stmt = select(DataChunk.chunk_id).where(
+                DataChunk.chunk_project_id == project_id,
+                DataChunk.chunk_id.in_(chunk_ids),
+                DataChunk.chunk_duplicate_of_id.is_(None),
+            )
+            result = await session.execute(stmt)
+            existing_ids = set(result.scalars().all())
+        
+        return existing_ids
+    
+    async def get_project_chunk_ranges(self, project_id: str, range_size: int = 10000,
+                                       unindexed_generation: Optional[int] = None) -> List[dict]:
+        """
+        Split the project chunks into consecutive chunk-id ranges of at most `range_size` rows.
+        Every range is (after_chunk_id, until_chunk_id], so ranges never overlap even when ids have gaps.
+        With `unindexed_generation`, only chunks not yet embedded in that generation are counted.
+        """
+        
+        unindexed_filter = ""
+        if unindexed_generation is not None:
+            unindexed_filter = (
+                "AND (chunk_indexed_generation IS NULL OR chunk_indexed_generation <> :unindexed_generation) "
+            )
+        
+        ranges_sql = sql_text(
+            f"SELECT MIN(chunk_id) AS first_chunk_id, MAX(chunk_id) AS last_chunk_id, COUNT(*) AS chunks_count "
+            f"FROM ("
+            f"SELECT chunk_id, (ROW_NUMBER() OVER (ORDER BY chunk_id) - 1) / :range_size AS range_no "
+            f"FROM {DataChunk.__tablename__} "
+            f"WHERE chunk_project_id = :project_id AND chunk_duplicate_of_id IS NULL "
+            f"{unindexed_filter}"
+            f") AS numbered_chunks "
+            f"GROUP BY range_no ORDER BY range_no"
+        )
+        
+        async with self.db_client() as session:
+            result = await session.execute(ranges_sql, {
+                "project_id": project_id,
+                "range_size": range_size,
+                **({"unindexed_generation": unindexed_generation} if unindexed_filter else {}),
+            })
+            records = result.all()
+        
+        return [
+            {
+                "after_chunk_id": record.first_chunk_id - 1,
+                "until_chunk_id": record.last_chunk_id,
+                "chunks_count": record.chunks_count,
+            }
+            for record in records
+        ]
+    
     async def get_total_chunks_count(self, project_id: str):
         total_count = 0
 
@@ -0,0 +1,85 @@
+from .db_schemes import IndexCheckpoint
+from .BaseDataModel import BaseDataModel
+from sqlalchemy import func, delete
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from typing import Optional
+
+class IndexCheckpointModel(BaseDataModel):
+
+    def __init__(self, db_client: async_sessionmaker):
+        super().__init__(db_client=db_client)
+    
+    @classmethod
+    async def create_instance(cls, db_client: async_sessionmaker):
+        instance = cls(db_client)
+        return instance
+    
+    async def get_range_checkpoint(self, project_id: int, collection_name: str, generation: int,
+                                   range_start: int, range_end: int) -> Optional[int]:
+        """
+        Return the last chunk id committed for exactly the range (range_start, range_end],
+        that is by an earlier attempt of the same range task.
+        """
+        
+        async with self.db_client() as session:
+            stmt = select(IndexCheckpoint.checkpoint_last_chunk_id).where(
+                IndexCheckpoint.checkpoint_project_id == project_id,
+                IndexCheckpoint.checkpoint_collection_name == collection_name,
+                IndexCheckpoint.checkpoint_generation == generation,
+                IndexCheckpoint.checkpoint_range_start == range_start,
+                IndexCheckpoint.checkpoint_range_end == range_end,
+            )
+            result = await session.execute(stmt)
+            last_chunk_id = result.scalar_one_or_none()
+        
+        return last_chunk_id
+    
+    async def save_checkpoint(self, project_id: int, collection_name: str, generation: int,
+                              range_start: int, range_end: int, last_chunk_id: int):
+        """
+        Upsert the checkpoint of one range. The stored chunk id only moves forward,
+        so late writes from concurrent consumers can never rewind it.
+        """
+        
+        stmt = insert(IndexCheckpoint).values(
+            checkpoint_project_id=project_id,
+            checkpoint_collection_name=collection_name,
+            checkpoint_generation=generation,
+            checkpoint_range_start=range_start,
+            checkpoint_range_end=range_end,
+            checkpoint_last_chunk_id=last_chunk_id,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                IndexCheckpoint.checkpoint_project_id,
+                IndexCheckpoint.checkpoint_collection_name,
+                IndexCheckpoint.checkpoint_generation,
+                IndexCheckpoint.checkpoint_range_start,
+            ],
+            set_={
+                "checkpoint_range_end": func.greatest(
+                    IndexCheckpoint.checkpoint_range_end,
+                    stmt.excluded.checkpoint_range_end,
+                ),
+                "checkpoint_last_chunk_id": func.greatest(
+                    IndexCheckpoint.checkpoint_last_chunk_id,
+                    stmt.excluded.checkpoint_last_chunk_id,
+                ),
+                "updated_at": func.now(),
+            },
+        )
+        
+        async with self.db_client() as session:
+            async with session.begin():
+                await session.execute(stmt)
+    
+    async def delete_project_checkpoints(self, project_id: int):
+        
+        async with self.db_client() as session:
+            stmt = delete(IndexCheckpoint).where(IndexCheckpoint.checkpoint_project_id == project_id)
+            result = await session.execute(stmt)
+            await session.commit()
+        
+        return result.rowcount
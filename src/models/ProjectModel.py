@@ -1,6 +1,6 @@
 from .db_schemes import Project
 from .BaseDataModel import BaseDataModel
-from sqlalchemy import func
+from sqlalchemy import func, update
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
@@ -37,6 +37,18 @@ class ProjectModel(BaseDataModel):
                 
                 return project
         
+    async def bump_index_generation(self, project_id: int) -> int:
+        
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = update(Project).where(Project.project_id == project_id).values(
+                    project_index_generation=Project.project_index_generation + 1,
+                ).returning(Project.project_index_generation)
+                result = await session.execute(stmt)
+                index_generation = result.scalar_one()
+        
+        return index_generation
+    
     async def get_all_projects(self, page: int = 1, page_size: int = 10):
 
         async with self.db_client() as session:
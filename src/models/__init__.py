@@ -1,7 +1,8 @@
 from .enums.ResponseEnums import ResponseSignal
-from .enums.ProcessingEnums import ProcessingEnums
+from .enums.ProcessingEnums import ProcessingEnums, ChunkSizeUnitEnums
 from .enums.DataBaseEnums import DataBaseEnums
 from .enums.AssetTypeEnums import AssetTypeEnums
 from .ProjectModel import ProjectModel
 from .ChunkModel import ChunkModel
 from .AssetModel import AssetModel
+from .IndexCheckpointModel import IndexCheckpointModel
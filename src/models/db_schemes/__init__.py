@@ -2,4 +2,4 @@
 # from .data_chunk import DataChunk, RetrievedDocument
 # from .asset import Asset
 
-from .minirag.schemes import Project, Asset, DataChunk, RetrievedDocument
+from .minirag.schemes import Project, Asset, DataChunk, RetrievedDocument, IndexCheckpoint
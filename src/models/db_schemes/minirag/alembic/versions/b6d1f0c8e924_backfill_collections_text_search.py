@@ -0,0 +1,58 @@
+"""Backfill collections text search
+
+Revision ID: b6d1f0c8e924
+Revises: a3c8e1f5b720
+Create Date: 2026-10-19 11:05:12.630418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import os
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1f0c8e924'
+down_revision: Union[str, None] = 'a3c8e1f5b720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# must match VECTOR_DB_PGVEC_TEXT_SEARCH_CONFIG of the application
+TEXT_SEARCH_CONFIG = os.getenv("VECTOR_DB_PGVEC_TEXT_SEARCH_CONFIG", "simple")
+
+
+def get_collections(with_text_search: bool) -> list:
+    # pgvector collections created by the application, see NLPController.create_collection_name
+    return op.get_bind().execute(sa.text(
+        "SELECT t.tablename FROM pg_tables t "
+        "WHERE t.schemaname = current_schema() AND t.tablename LIKE 'collection\\_%' "
+        "AND EXISTS (SELECT 1 FROM information_schema.columns c "
+        "WHERE c.table_name = t.tablename AND c.column_name = 'vector') "
+        f"AND {'' if with_text_search else 'NOT '}EXISTS (SELECT 1 FROM information_schema.columns c "
+        "WHERE c.table_name = t.tablename AND c.column_name = 'text_search')"
+    )).scalars().all()
+
+
+def upgrade() -> None:
+    # collections created before hybrid search lack the lexical column. Adding a stored
+    # generated column rewrites the table, which is why it runs here and not on first use.
+    for collection_name in get_collections(with_text_search=False):
+        op.execute(
+            f"ALTER TABLE {collection_name} ADD COLUMN IF NOT EXISTS text_search tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, coalesce(text, ''))) STORED"
+        )
+    
+    # build the GIN indexes without blocking writes, CONCURRENTLY can not run in a transaction
+    collection_names = get_collections(with_text_search=True)
+    with op.get_context().autocommit_block():
+        for collection_name in collection_names:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {collection_name}_text_search_idx "
+                f"ON {collection_name} USING gin (text_search)"
+            )
+
+
+def downgrade() -> None:
+    # the lexical column and index are part of every collection the application creates
+    pass
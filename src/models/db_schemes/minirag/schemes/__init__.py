@@ -2,3 +2,4 @@ from .minirag_base import SQLAlchemyBase
 from .asset import Asset
 from .project import Project
 from .data_chunk import DataChunk, RetrievedDocument
+from .index_checkpoint import IndexCheckpoint
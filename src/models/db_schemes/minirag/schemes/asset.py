@@ -13,6 +13,7 @@ class Asset(SQLAlchemyBase):
     asset_type = Column(String, nullable=False)
     asset_name = Column(String, nullable=False)
     asset_size = Column(Integer, nullable=False)
+    asset_hash = Column(String, nullable=True)
     asset_config = Column(JSONB, nullable=True)
     
     asset_project_id = Column(Integer, ForeignKey("projects.project_id"), nullable=False)
@@ -1,5 +1,5 @@
 from .minirag_base import SQLAlchemyBase
-from sqlalchemy import Index, Integer, String, Column, DateTime, func, ForeignKey
+from sqlalchemy import Index, Integer, String, Column, DateTime, func, ForeignKey, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel
@@ -18,6 +18,16 @@ class DataChunk(SQLAlchemyBase):
     chunk_project_id = Column(Integer, ForeignKey("projects.project_id"), nullable=False)
     chunk_asset_id = Column(Integer, ForeignKey("assets.asset_id"), nullable=False)
     
+    # near-duplicate elimination: duplicates keep their own asset and page, point to the
+    # chunk that is actually embedded and are skipped by indexing
+    chunk_text_hash = Column(String, nullable=True)
+    chunk_minhash = Column(LargeBinary, nullable=True)
+    chunk_duplicate_of_id = Column(Integer, ForeignKey("chunks.chunk_id", ondelete="SET NULL"), nullable=True)
+    
+    # project index generation the chunk was last embedded in, NULL until it is embedded;
+    # unlike a chunk-id watermark this does not depend on the order chunks are committed in
+    chunk_indexed_generation = Column(Integer, nullable=True)
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     
@@ -27,6 +37,8 @@ class DataChunk(SQLAlchemyBase):
     __table_args__ = (
         Index("ix_chunk_project_id", chunk_project_id),
         Index("ix_chunk_asset_id", chunk_asset_id),
+        Index("ix_chunk_project_id_chunk_id", chunk_project_id, chunk_id),
+        Index("ix_chunk_duplicate_of_id", chunk_duplicate_of_id),
     )
 
 class RetrievedDocument(BaseModel):
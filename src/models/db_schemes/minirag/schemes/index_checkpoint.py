@@ -0,0 +1,29 @@
+from .minirag_base import SQLAlchemyBase
+from sqlalchemy import Index, String, Column, Integer, DateTime, func, ForeignKey
+from sqlalchemy.orm import relationship
+
+class IndexCheckpoint(SQLAlchemyBase):
+    
+    __tablename__ = "index_checkpoints"
+    checkpoint_id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # one row per chunk-id range (range_start, range_end] of a collection, so any job indexing
+    # the same collection continues from it; the generation is bumped by every reset
+    checkpoint_collection_name = Column(String, nullable=False)
+    checkpoint_generation = Column(Integer, nullable=False, default=0)
+    checkpoint_range_start = Column(Integer, nullable=False)
+    checkpoint_range_end = Column(Integer, nullable=False)
+    checkpoint_last_chunk_id = Column(Integer, nullable=False)
+    
+    checkpoint_project_id = Column(Integer, ForeignKey("projects.project_id"), nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    
+    project = relationship("Project", back_populates="index_checkpoints")
+    
+    __table_args__ = (
+        Index("ix_index_checkpoint_project_id", checkpoint_project_id),
+        Index("ix_index_checkpoint_collection_range_start", checkpoint_project_id, checkpoint_collection_name,
+              checkpoint_generation, checkpoint_range_start, unique=True),
+    )
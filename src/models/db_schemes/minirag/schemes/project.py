@@ -10,8 +10,12 @@ class Project(SQLAlchemyBase):
     project_id = Column(Integer, primary_key=True, autoincrement=True)
     project_uuid = Column(UUID(as_uuid=True), default=uuid.uuid4, unique=True, nullable=False)
     
+    # bumped by every indexing reset, so checkpoints of earlier runs are never resumed
+    project_index_generation = Column(Integer, nullable=False, default=0, server_default="0")
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
 
     chunks = relationship("DataChunk", back_populates="project")
     assets = relationship("Asset", back_populates="project")
+    index_checkpoints = relationship("IndexCheckpoint", back_populates="project")
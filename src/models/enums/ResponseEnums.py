@@ -20,3 +20,4 @@ class ResponseSignal(Enum):
     RAG_ANSWER_ERROR = "rag_answer_error"
     RAG_ANSWER_SUCCESS = "rag_answer_success"
     DATA_PUSH_TASK_READY="data_push_task_ready"
+    DATA_INDEXING_IN_PROGRESS="data_indexing_in_progress"
@@ -8,6 +8,7 @@ from models.db_schemes import DataChunk, Asset
 from controllers import NLPController
 from tasks.file_processing import process_project_files
 import aiofiles
+import hashlib
 import logging
 import os
 
@@ -49,9 +50,12 @@ async def upload_data(request: Request, project_id: int, file: UploadFile,
         project_id=project_id
     )
     
+    # hash while writing, so unchanged files can be skipped at processing time
+    file_hash = hashlib.sha256()
     try:
         async with aiofiles.open(file_path, "wb") as f:
             while chunck := await file.read(app_settings.FILE_DEFAULT_CHUNCK_SIZE):
+                file_hash.update(chunck)
                 await f.write(chunck)
     except Exception as e:
         
@@ -73,7 +77,8 @@ async def upload_data(request: Request, project_id: int, file: UploadFile,
         asset_project_id=project.project_id,
         asset_type=AssetTypeEnums.FILE.value,
         asset_name=file_id,
-        asset_size=os.path.getsize(file_path)
+        asset_size=os.path.getsize(file_path),
+        asset_hash=file_hash.hexdigest(),
     )
     
     asset_record = await asset_model.create_asset(asset_resource)
@@ -99,6 +104,7 @@ async def process_endpoint(request: Request, project_id: int, process_request: P
         chunk_size=chunk_size,
         overlap_size=overlap_size,
         do_reset=do_reset,
+        chunk_size_unit=process_request.chunk_size_unit.value,
     )
     
     return JSONResponse(
@@ -1,11 +1,14 @@
 from fastapi import FastAPI, APIRouter, Depends, UploadFile, status, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from .schemes.nlp import PushRequest, SearchRequest
 from models import ProjectModel, ChunkModel, ResponseSignal
 from tasks.data_indexing import index_data_content
 from controllers import NLPController
+from utils.metrics import RAG_TIME_TO_FIRST_TOKEN
 from tqdm.auto import tqdm
 import logging
+import time
+import json
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -21,6 +24,7 @@ async def index_project(request: Request, project_id: int, push_request: PushReq
     task = index_data_content.delay(
         project_id=project_id,
         do_reset=push_request.do_reset,
+        incremental=push_request.incremental,
     )
     
     return JSONResponse(
@@ -73,12 +77,15 @@ async def search_index(request: Request, project_id: int, search_request: Search
         generation_client=request.app.state.generation_client,
         embedding_client=request.app.state.embedding_client,
         template_parser=request.app.state.template_parser,
+        single_flight=request.app.state.single_flight,
     )
     
     results = await nlp_controller.search_vector_db_collection(
         project=project,
         text=search_request.text,
         limit=search_request.limit,
+        ef_search=search_request.ef_search,
+        hybrid=search_request.hybrid,
     )
     
     if not results:
@@ -112,12 +119,17 @@ async def answer_rag(request: Request, project_id: int, search_request: SearchRe
         generation_client=request.app.state.generation_client,
         embedding_client=request.app.state.embedding_client,
         template_parser=request.app.state.template_parser,
+        answer_cache=request.app.state.answer_cache,
+        single_flight=request.app.state.single_flight,
+        context_builder=request.app.state.context_builder,
     )
     
-    answer, full_prompt, chat_history = await nlp_controller.answer_rag_query(
+    answer, full_prompt, chat_history, retrived_documents = await nlp_controller.answer_rag_query(
         project=project,
         query=search_request.text,
         limit=search_request.limit,
+        ef_search=search_request.ef_search,
+        hybrid=search_request.hybrid,
     )
     
     if not answer:
@@ -134,5 +146,78 @@ async def answer_rag(request: Request, project_id: int, search_request: SearchRe
             "answer": answer,
             "full_prompt": full_prompt,
             "chat_history": chat_history,
+            "results": [ doc.dict() for doc in retrived_documents or [] ],
         }
-    )
\ No newline at end of file
+    )
+
+def format_sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@nlp_router.post("/index/answer/stream/{project_id}")
+async def answer_rag_stream(request: Request, project_id: int, search_request: SearchRequest):
+    
+    start_time = time.perf_counter()
+    
+    project_model = await ProjectModel.create_instance(
+        db_client=request.app.state.db_client,
+    )
+    
+    project = await project_model.get_project_or_create_one(
+        project_id=project_id,
+    )
+    
+    nlp_controller = NLPController(
+        vector_db_client=request.app.state.vector_db_client,
+        generation_client=request.app.state.generation_client,
+        embedding_client=request.app.state.embedding_client,
+        template_parser=request.app.state.template_parser,
+        answer_cache=request.app.state.answer_cache,
+        single_flight=request.app.state.single_flight,
+        context_builder=request.app.state.context_builder,
+    )
+    
+    retrived_documents, token_stream = await nlp_controller.answer_rag_query_stream(
+        project=project,
+        query=search_request.text,
+        limit=search_request.limit,
+        ef_search=search_request.ef_search,
+        hybrid=search_request.hybrid,
+    )
+    
+    if token_stream is None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.RAG_ANSWER_ERROR.value,
+            }
+        )
+    
+    async def event_stream():
+        # a client disconnect cancels this generator, closing the upstream stream in the finally
+        try:
+            yield format_sse_event("retrieval", {
+                "results": [ doc.dict() for doc in retrived_documents ],
+            })
+            
+            is_first_token = True
+            async for token in token_stream:
+                if is_first_token:
+                    RAG_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start_time)
+                    is_first_token = False
+                
+                yield format_sse_event("token", {"text": token})
+            
+            yield format_sse_event("done", {
+                "signal": ResponseSignal.RAG_ANSWER_SUCCESS.value,
+            })
+        finally:
+            await token_stream.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -1,8 +1,10 @@
 from pydantic import BaseModel
 from typing import Optional
+from models import ChunkSizeUnitEnums
 
 class ProcessRequest(BaseModel):
     file_id: str = None
     chunk_size: Optional[int] = 100
     overlap_size: Optional[int] = 20
+    chunk_size_unit: Optional[ChunkSizeUnitEnums] = ChunkSizeUnitEnums.CHAR
     do_reset: Optional[int] = 0
@@ -3,7 +3,10 @@ from typing import Optional
 
 class PushRequest(BaseModel):
     do_reset: Optional[int] = 0
+    incremental: Optional[bool] = False
 
 class SearchRequest(BaseModel):
     text: str
     limit: Optional[int] = 5
+    ef_search: Optional[int] = None
+    hybrid: Optional[bool] = False
@@ -0,0 +1,139 @@
+from stores.llm.LLMEnums import DocumentTypeEnums
+from utils.metrics import EMBEDDING_CACHE_HITS, EMBEDDING_CACHE_MISSES
+from collections import OrderedDict
+from typing import Optional, List, Union
+from array import array
+import unicodedata
+import hashlib
+import logging
+
+class EmbeddingCache:
+    """
+    Content-addressed cache in front of an embedding client.
+    Lookups go to an in-process LRU first, then to Redis (when configured),
+    and only the remaining misses are sent to the provider in a single call.
+    """
+    
+    def __init__(self, embedding_client, provider: str, redis_client=None,
+                 lru_size: int = 10000, ttl: Optional[int] = None,
+                 key_prefix: str = "minirag:emb"):
+        self.embedding_client = embedding_client
+        self.provider = provider
+        self.redis_client = redis_client
+        self.lru_size = lru_size
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.key_prefix = key_prefix
+        
+        self.lru = OrderedDict()
+        self.logger = logging.getLogger(__name__)
+    
+    def __getattr__(self, name: str):
+        # behave like the wrapped client for everything that is not cached
+        return getattr(self.embedding_client, name)
+    
+    def normalize_text(self, text: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", text).split())
+    
+    def create_cache_key(self, text: str, document_type: str) -> str:
+        text_hash = hashlib.sha256(self.normalize_text(text).encode("utf-8")).hexdigest()
+        return ":".join([
+            self.key_prefix,
+            self.provider,
+            str(self.embedding_client.embedding_model_id),
+            str(self.embedding_client.embedding_size),
+            document_type,
+            text_hash,
+        ])
+    
+    def _lru_get(self, key: str):
+        vector = self.lru.get(key)
+        if vector is not None:
+            self.lru.move_to_end(key)
+        return vector
+    
+    def _lru_set(self, key: str, vector: List[float]):
+        self.lru[key] = vector
+        self.lru.move_to_end(key)
+        while len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+    
+    def _encode_vector(self, vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+    
+    def _decode_vector(self, payload: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(payload)
+        return vector.tolist()
+    
+    async def _redis_get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        if not self.redis_client or not keys:
+            return [None] * len(keys)
+        
+        try:
+            payloads = await self.redis_client.mget(keys)
+        except Exception as e:
+            self.logger.error(f"Error while reading embedding cache: {e}")
+            return [None] * len(keys)
+        
+        return [ self._decode_vector(p) if p else None for p in payloads ]
+    
+    async def _redis_set_many(self, items: dict):
+        if not self.redis_client or not items:
+            return None
+        
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, vector in items.items():
+                    pipe.set(key, self._encode_vector(vector), ex=self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            self.logger.error(f"Error while writing embedding cache: {e}")
+    
+    async def embed_text(self, text: Union[str, List[str]], document_type: Optional[str] = None) -> Optional[List[List[float]]]:
+        
+        if isinstance(text, str):
+            text = [text]
+        
+        document_type = document_type if document_type else DocumentTypeEnums.DOCUMENT.value
+        keys = [ self.create_cache_key(t, document_type) for t in text ]
+        vectors = [ self._lru_get(k) for k in keys ]
+        
+        lru_hits = sum(1 for v in vectors if v is not None)
+        
+        # durable tier for whatever the LRU did not have
+        missing_idx = [ i for i, v in enumerate(vectors) if v is None ]
+        redis_vectors = await self._redis_get_many([ keys[i] for i in missing_idx ])
+        redis_hits = 0
+        for i, vector in zip(missing_idx, redis_vectors):
+            if vector is not None:
+                vectors[i] = vector
+                self._lru_set(keys[i], vector)
+                redis_hits += 1
+        
+        # one provider call for the unique misses
+        misses = OrderedDict()
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                misses.setdefault(keys[i], text[i])
+        
+        EMBEDDING_CACHE_HITS.labels(tier="memory").inc(lru_hits)
+        EMBEDDING_CACHE_HITS.labels(tier="redis").inc(redis_hits)
+        EMBEDDING_CACHE_MISSES.inc(len(misses))
+        
+        if len(misses) > 0:
+            new_vectors = await self.embedding_client.embed_text(
+                text=list(misses.values()),
+                document_type=document_type,
+            )
+            
+            if not new_vectors or len(new_vectors) != len(misses):
+                return None
+            
+            fetched = dict(zip(misses.keys(), new_vectors))
+            for key, vector in fetched.items():
+                self._lru_set(key, vector)
+            await self._redis_set_many(fetched)
+            
+            vectors = [ v if v is not None else fetched[k] for k, v in zip(keys, vectors) ]
+        
+        return vectors
@@ -0,0 +1,127 @@
+from utils.metrics import ANSWER_CACHE_HITS, ANSWER_CACHE_MISSES
+from typing import Optional, List
+import numpy as np
+import hashlib
+import logging
+import json
+import uuid
+
+class SemanticAnswerCache:
+    """
+    Per-project cache of RAG answers shared by every API replica through Redis.
+    A lookup compares the query embedding with the embeddings of the `lookup_window` most
+    recent cached queries of the same project and request scope, and returns the stored
+    answer when the cosine similarity reaches `threshold`. Older queries are trimmed from
+    the list, as a lookup would never read them.
+    Every project has a version counter that is part of all its keys; bumping it on
+    re-index or reset invalidates the whole project at once, old entries just expire.
+    """
+
+    VECTOR_DTYPE = np.float32
+    ENTRY_ID_SIZE = 16
+
+    def __init__(self, redis_client, threshold: float = 0.95, lookup_window: int = 32,
+                 ttl: Optional[int] = None, key_prefix: str = "minirag:answer"):
+        self.redis_client = redis_client
+        self.threshold = threshold
+        self.lookup_window = max(1, lookup_window)
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.key_prefix = key_prefix
+
+        self.logger = logging.getLogger(__name__)
+
+    def create_version_key(self, project_id: int) -> str:
+        return f"{self.key_prefix}:{project_id}:version"
+
+    def create_scope_key(self, project_id: int, version: int, scope: dict) -> str:
+        scope_hash = hashlib.sha256(json.dumps(scope, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        return f"{self.key_prefix}:{project_id}:{version}:{scope_hash}"
+
+    def _encode_vector(self, vector: List[float]) -> bytes:
+        vector = np.asarray(vector, dtype=self.VECTOR_DTYPE)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm > 0 else vector).tobytes()
+
+    async def get_version(self, project_id: int) -> Optional[int]:
+        if not self.redis_client:
+            return None
+
+        try:
+            version = await self.redis_client.get(self.create_version_key(project_id))
+        except Exception as e:
+            self.logger.error(f"Error while reading answer cache version: {e}")
+            return None
+
+        return int(version) if version else 0
+
+    async def get(self, project_id: int, version: Optional[int], scope: dict,
+                  query_vector: List[float]) -> Optional[dict]:
+
+        if not self.redis_client or version is None or not query_vector:
+            return None
+
+        scope_key = self.create_scope_key(project_id, version, scope)
+        try:
+            # every lookup transfers and scores the whole window, keep it small
+            records = await self.redis_client.lrange(f"{scope_key}:vectors", 0, self.lookup_window - 1)
+        except Exception as e:
+            self.logger.error(f"Error while reading answer cache: {e}")
+            return None
+
+        query = np.frombuffer(self._encode_vector(query_vector), dtype=self.VECTOR_DTYPE)
+        records = [ r for r in records if len(r) == self.ENTRY_ID_SIZE + query.nbytes ]
+        if not records:
+            ANSWER_CACHE_MISSES.inc()
+            return None
+
+        # every record is the entry id followed by the normalized query vector
+        matrix = np.frombuffer(b"".join(r[self.ENTRY_ID_SIZE:] for r in records), dtype=self.VECTOR_DTYPE)
+        similarities = matrix.reshape(len(records), -1) @ query
+        best = int(np.argmax(similarities))
+
+        if similarities[best] < self.threshold:
+            ANSWER_CACHE_MISSES.inc()
+            return None
+
+        entry_id = uuid.UUID(bytes=records[best][:self.ENTRY_ID_SIZE]).hex
+        try:
+            payload = await self.redis_client.get(f"{scope_key}:entry:{entry_id}")
+        except Exception as e:
+            self.logger.error(f"Error while reading answer cache: {e}")
+            return None
+
+        if not payload:
+            ANSWER_CACHE_MISSES.inc()
+            return None
+
+        ANSWER_CACHE_HITS.inc()
+        return json.loads(payload)
+
+    async def set(self, project_id: int, version: Optional[int], scope: dict,
+                  query_vector: List[float], payload: dict):
+
+        if not self.redis_client or version is None or not query_vector:
+            return None
+
+        scope_key = self.create_scope_key(project_id, version, scope)
+        entry_id = uuid.uuid4()
+
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.set(f"{scope_key}:entry:{entry_id.hex}", json.dumps(payload, ensure_ascii=False), ex=self.ttl)
+                pipe.lpush(f"{scope_key}:vectors", entry_id.bytes + self._encode_vector(query_vector))
+                pipe.ltrim(f"{scope_key}:vectors", 0, self.lookup_window - 1)
+                if self.ttl:
+                    pipe.expire(f"{scope_key}:vectors", self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            self.logger.error(f"Error while writing answer cache: {e}")
+
+    async def invalidate(self, project_id: int):
+        if not self.redis_client:
+            return None
+
+        try:
+            return await self.redis_client.incr(self.create_version_key(project_id))
+        except Exception as e:
+            self.logger.error(f"Error while invalidating answer cache: {e}")
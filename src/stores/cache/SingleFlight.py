@@ -0,0 +1,130 @@
+from utils.metrics import SINGLE_FLIGHT_COALESCED
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+import time
+import uuid
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls into one computation.
+    Inside a process, callers with the same key await the same task. Across processes,
+    the first caller takes a Redis lock and publishes the encoded result on a channel;
+    the others subscribe and decode it instead of computing it again. Followers fall back
+    to computing themselves when the leader fails or does not answer within `timeout`.
+    """
+
+    RELEASE_LOCK_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, redis_client=None, timeout: int = 60, result_ttl: int = 5,
+                 key_prefix: str = "minirag:flight"):
+        self.redis_client = redis_client
+        self.timeout = timeout
+        self.result_ttl = result_ttl
+        self.key_prefix = key_prefix
+
+        self.in_flight = {}
+        self.logger = logging.getLogger(__name__)
+
+    async def run(self, key: str, func: Callable[[], Awaitable[Any]],
+                  encode: Optional[Callable[[Any], Optional[str]]] = None,
+                  decode: Optional[Callable[[str], Any]] = None) -> Any:
+        """
+        Return the result of `func()`, shared with every concurrent call of the same key.
+        Results are only shared across processes when `encode` and `decode` are given;
+        `encode` returning None marks a result that must not be shared.
+        """
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            SINGLE_FLIGHT_COALESCED.labels(scope="local").inc()
+        else:
+            task = asyncio.ensure_future(self._run_shared(key, func, encode, decode))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+
+        # a cancelled caller must not cancel the computation the others are waiting for
+        return await asyncio.shield(task)
+
+    async def _run_shared(self, key: str, func: Callable[[], Awaitable[Any]],
+                          encode: Optional[Callable[[Any], Optional[str]]],
+                          decode: Optional[Callable[[str], Any]]) -> Any:
+
+        if not self.redis_client or encode is None or decode is None:
+            return await func()
+
+        lock_key = f"{self.key_prefix}:{key}:lock"
+        result_key = f"{self.key_prefix}:{key}:result"
+        channel = f"{self.key_prefix}:{key}:channel"
+        token = uuid.uuid4().hex
+
+        try:
+            is_leader = await self.redis_client.set(lock_key, token, nx=True, ex=self.timeout)
+        except Exception as e:
+            self.logger.error(f"Error while taking single flight lock: {e}")
+            return await func()
+
+        if not is_leader:
+            payload = await self._wait_for_result(lock_key, result_key, channel)
+            if payload is not None:
+                SINGLE_FLIGHT_COALESCED.labels(scope="redis").inc()
+                return decode(payload)
+
+            return await func()
+
+        try:
+            result = await func()
+            payload = encode(result)
+
+            if payload is not None:
+                try:
+                    async with self.redis_client.pipeline(transaction=False) as pipe:
+                        pipe.set(result_key, payload, ex=self.result_ttl)
+                        pipe.publish(channel, payload)
+                        await pipe.execute()
+                except Exception as e:
+                    self.logger.error(f"Error while publishing single flight result: {e}")
+
+            return result
+        finally:
+            try:
+                await self.redis_client.eval(self.RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                self.logger.error(f"Error while releasing single flight lock: {e}")
+
+    async def _wait_for_result(self, lock_key: str, result_key: str, channel: str) -> Optional[str]:
+
+        deadline = time.monotonic() + self.timeout
+        pubsub = self.redis_client.pubsub()
+
+        try:
+            await pubsub.subscribe(channel)
+
+            # the leader may have published before the subscription was active
+            payload = await self.redis_client.get(result_key)
+            if payload is not None:
+                return payload
+
+            while time.monotonic() < deadline:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.5)
+                if message is not None and message.get("type") == "message":
+                    return message["data"]
+
+                # the leader gave up without a result
+                if not await self.redis_client.exists(lock_key):
+                    return await self.redis_client.get(result_key)
+        except Exception as e:
+            self.logger.error(f"Error while waiting for single flight result: {e}")
+        finally:
+            try:
+                await pubsub.unsubscribe(channel)
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+        return None
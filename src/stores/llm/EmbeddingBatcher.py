@@ -0,0 +1,100 @@
+from .LLMEnums import DocumentTypeEnums
+from utils.metrics import EMBEDDING_BATCH_SIZE
+from typing import Optional, List, Union
+import asyncio
+import logging
+
+class EmbeddingBatcher:
+    """
+    Micro-batcher in front of an embedding client.
+    Concurrent query embeddings are collected for up to `max_wait_ms` or `max_batch_size`
+    texts, sent to the provider in one call, and the vectors are handed back to every
+    waiting caller. Other document types are already batched by their callers and pass through.
+    """
+
+    def __init__(self, embedding_client, max_wait_ms: int = 5, max_batch_size: int = 32,
+                 batched_document_types: Optional[List[str]] = None):
+        self.embedding_client = embedding_client
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self.max_batch_size = max_batch_size
+        self.batched_document_types = batched_document_types or [ DocumentTypeEnums.QUERY.value ]
+
+        self.pending = {}
+        self.pending_sizes = {}
+        self.flush_handles = {}
+        self.batch_tasks = set()
+        self.logger = logging.getLogger(__name__)
+
+    def __getattr__(self, name: str):
+        # behave like the wrapped client for everything that is not batched
+        return getattr(self.embedding_client, name)
+
+    async def embed_text(self, text: Union[str, List[str]], document_type: Optional[str] = None) -> Optional[List[List[float]]]:
+
+        if isinstance(text, str):
+            text = [text]
+
+        document_type = document_type if document_type else DocumentTypeEnums.DOCUMENT.value
+
+        if (self.max_wait == 0 or self.max_batch_size <= 1
+                or document_type not in self.batched_document_types
+                or len(text) >= self.max_batch_size):
+            return await self.embedding_client.embed_text(text=text, document_type=document_type)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self.pending.setdefault(document_type, []).append((text, future))
+        self.pending_sizes[document_type] = self.pending_sizes.get(document_type, 0) + len(text)
+
+        if self.pending_sizes[document_type] >= self.max_batch_size:
+            self.flush(document_type)
+        elif document_type not in self.flush_handles:
+            self.flush_handles[document_type] = loop.call_later(self.max_wait, self.flush, document_type)
+
+        return await future
+
+    def flush(self, document_type: str):
+        handle = self.flush_handles.pop(document_type, None)
+        if handle is not None:
+            handle.cancel()
+
+        batch = self.pending.pop(document_type, [])
+        self.pending_sizes.pop(document_type, None)
+        if not batch:
+            return
+
+        # keep a reference so the task is not collected while in flight
+        task = asyncio.ensure_future(self.send_batch(document_type, batch))
+        self.batch_tasks.add(task)
+        task.add_done_callback(self.batch_tasks.discard)
+
+    async def send_batch(self, document_type: str, batch: list):
+
+        # callers that gave up while waiting do not need a vector
+        batch = [ (texts, future) for texts, future in batch if not future.done() ]
+        if not batch:
+            return
+
+        unique_texts = list(dict.fromkeys(t for texts, _ in batch for t in texts))
+        EMBEDDING_BATCH_SIZE.observe(len(unique_texts))
+
+        try:
+            vectors = await self.embedding_client.embed_text(text=unique_texts, document_type=document_type)
+        except Exception as e:
+            self.logger.error(f"Error while embedding a batch of {len(unique_texts)} texts: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if not vectors or len(vectors) != len(unique_texts):
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+            return
+
+        text_vectors = dict(zip(unique_texts, vectors))
+        for texts, future in batch:
+            if not future.done():
+                future.set_result([ text_vectors[t] for t in texts ])
@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List, Union
+from typing import Optional, List, Union, AsyncIterator
+import math
+import re
 
 class LLMInterface(ABC):
     
+    # word or single punctuation mark, used to estimate tokens without a local tokenizer
+    TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+    
     @abstractmethod
     def set_generation_model(self, model_id: str):
         pass
@@ -12,15 +17,33 @@ class LLMInterface(ABC):
         pass
     
     @abstractmethod
-    def generate_text(self, prompt: str, chat_history: list=[], 
-                      max_output_tokens: Optional[int] = None,
-                      temperature: Optional[float] = None) -> Optional[str]:
+    async def generate_text(self, prompt: str, chat_history: list=[], 
+                            max_output_tokens: Optional[int] = None,
+                            temperature: Optional[float] = None) -> Optional[str]:
+        pass
+    
+    @abstractmethod
+    def generate_text_stream(self, prompt: str, chat_history: list=[], 
+                             max_output_tokens: Optional[int] = None,
+                             temperature: Optional[float] = None) -> AsyncIterator[str]:
         pass
     
     @abstractmethod
-    def embed_text(self, text: Union[str, List[str]], document_type: Optional[str] = None) -> Optional[List[float]]:
+    async def embed_text(self, text: Union[str, List[str]], document_type: Optional[str] = None) -> Optional[List[float]]:
         pass
 
     @abstractmethod
     def construct_prompt(self, prompt: str, role: str) -> dict:
         pass
+
+    def load_tokenizer(self):
+        # providers with a local tokenizer load it here, once at startup
+        return None
+
+    def get_tokenizer_name(self) -> Optional[str]:
+        # name of the loaded tiktoken encoding, so file chunking can size chunks with it
+        return None
+
+    def count_tokens(self, text: str) -> int:
+        # providers with a local tokenizer override this with an exact count
+        return max(len(self.TOKEN_PATTERN.findall(text)), math.ceil(len(text) / 4))
@@ -1,10 +1,30 @@
 from .LLMEnums import LLMEnums
 from .providers import OpenAIProvider, CoHereProvider
 from helpers.config import Settings
+import httpx
 
 class LLMProviderFactory:
     def __init__(self, config: Settings):
         self.config = config
+        self.http_client = None
+    
+    def get_http_client(self) -> httpx.AsyncClient:
+        # one bounded connection pool shared by every provider created by this factory
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.config.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=self.config.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=self.config.LLM_HTTP_TIMEOUT,
+            )
+        
+        return self.http_client
+    
+    async def disconnect(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
     
     def create(self, provider: str):
         if provider == LLMEnums.OPENAI.value:
@@ -14,6 +34,8 @@ class LLMProviderFactory:
                 default_input_max_charactrers=self.config.INPUT_DEFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.GENERATION_DEFAULT_MAX_TOKENS,
                 default_generation_temperature=self.config.GENERATION_DEFAULT_TEMPERATURE,
+                http_client=self.get_http_client(),
+                max_concurrency=self.config.OPENAI_MAX_CONCURRENCY,
             )
         
         if provider == LLMEnums.COHERE.value:
@@ -22,6 +44,8 @@ class LLMProviderFactory:
                 default_input_max_charactrers=self.config.INPUT_DEFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.GENERATION_DEFAULT_MAX_TOKENS,
                 default_generation_temperature=self.config.GENERATION_DEFAULT_TEMPERATURE,
+                http_client=self.get_http_client(),
+                max_concurrency=self.config.COHERE_MAX_CONCURRENCY,
             )
         
         return None
\ No newline at end of file
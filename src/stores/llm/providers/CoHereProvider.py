@@ -1,7 +1,9 @@
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import CoHereEnums, DocumentTypeEnums
 import cohere
-from typing import Optional, List, Union
+from typing import Optional, List, Union, AsyncIterator
+import asyncio
+import httpx
 import logging
 
 class CoHereProvider(LLMInterface):
@@ -9,7 +11,9 @@ class CoHereProvider(LLMInterface):
     def __init__(self, api_key: str,
                        default_input_max_charactrers: int = 1000,
                        default_generation_max_output_tokens: int = 1000,
-                       default_generation_temperature: float = 0.1):
+                       default_generation_temperature: float = 0.1,
+                       http_client: Optional[httpx.AsyncClient] = None,
+                       max_concurrency: int = 16):
         
         self.api_key = api_key
         self.default_input_max_charactrers = default_input_max_charactrers
@@ -20,7 +24,10 @@ class CoHereProvider(LLMInterface):
         self.embedding_model_id = None
         self.embedding_size = None
         
-        self.client = cohere.Client(api_key=self.api_key)
+        self.client = cohere.AsyncClient(api_key=self.api_key, httpx_client=http_client)
+        
+        # caps the in-flight requests to CoHere from this process
+        self.semaphore = asyncio.Semaphore(max_concurrency)
         
         self.enums = CoHereEnums
         self.logger = logging.getLogger(__name__)
@@ -35,9 +42,9 @@ class CoHereProvider(LLMInterface):
     def _process_text(self, text: str) -> str:
         return text[:self.default_input_max_charactrers].strip()
     
-    def generate_text(self, prompt: str, chat_history: list=[], 
-                      max_output_tokens: Optional[int] = None,
-                      temperature: Optional[float] = None) -> Optional[str]:
+    async def generate_text(self, prompt: str, chat_history: list=[], 
+                            max_output_tokens: Optional[int] = None,
+                            temperature: Optional[float] = None) -> Optional[str]:
         
         if not self.client:
             self.logger.error("CoHere client was not set")
@@ -50,21 +57,54 @@ class CoHereProvider(LLMInterface):
         max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
         temperature = temperature if temperature else self.default_generation_temperature
         
-        response = self.client.chat(
-            model = self.generation_model_id,
-            chat_history=chat_history,
-            message=self._process_text(prompt),
-            temperature=temperature,
-            max_tokens=max_output_tokens
-        )
+        async with self.semaphore:
+            response = await self.client.chat(
+                model = self.generation_model_id,
+                chat_history=chat_history,
+                message=self._process_text(prompt),
+                temperature=temperature,
+                max_tokens=max_output_tokens
+            )
         
         if not response or not response.text:
             self.logger.error("Error while generating text with CoHere")
             return None
         
         return response.text
+    
+    async def generate_text_stream(self, prompt: str, chat_history: list=[], 
+                                   max_output_tokens: Optional[int] = None,
+                                   temperature: Optional[float] = None) -> AsyncIterator[str]:
+        
+        if not self.client:
+            self.logger.error("CoHere client was not set")
+            return
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for CoHere was not set")
+            return
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
         
-    def embed_text(self, text: Union[str, List[str]], document_type: Optional[str] = None) -> Optional[List[float]]:
+        async with self.semaphore:
+            stream = self.client.chat_stream(
+                model = self.generation_model_id,
+                chat_history=chat_history,
+                message=self._process_text(prompt),
+                temperature=temperature,
+                max_tokens=max_output_tokens
+            )
+            
+            try:
+                async for event in stream:
+                    if event.event_type == "text-generation" and event.text:
+                        yield event.text
+            finally:
+                # also runs when the consumer is cancelled, which aborts the upstream request
+                await stream.aclose()
+        
+    async def embed_text(self, text: Union[str, List[str]], document_type: Optional[str] = None) -> Optional[List[float]]:
         
         if not self.client:
             self.logger.error("CoHere client was not set")
@@ -81,12 +121,13 @@ class CoHereProvider(LLMInterface):
         if document_type == DocumentTypeEnums.QUERY.value:
             input_type = CoHereEnums.QUERY.value
         
-        response = self.client.embed(
-            model = self.embedding_model_id,
-            texts = [self._process_text(t) for t in text],
-            input_type = input_type,
-            embedding_types=['float']
-        )
+        async with self.semaphore:
+            response = await self.client.embed(
+                model = self.embedding_model_id,
+                texts = [self._process_text(t) for t in text],
+                input_type = input_type,
+                embedding_types=['float']
+            )
         
         if not response or not response.embeddings or not response.embeddings.float or len(response.embeddings.float) == 0:
             self.logger.error("Error while embedding text with CoHere")
@@ -1,15 +1,24 @@
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import OpenAIEnums
-from openai import OpenAI
-from typing import Optional, List, Union
+from openai import AsyncOpenAI
+from typing import Optional, List, Union, AsyncIterator
+import asyncio
+import httpx
 import logging
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 class OpenAIProvider(LLMInterface):
     
     def __init__(self, api_key: str, api_url: Optional[str] = None,
                        default_input_max_charactrers: int = 1000,
                        default_generation_max_output_tokens: int = 1000,
-                       default_generation_temperature: float = 0.1):
+                       default_generation_temperature: float = 0.1,
+                       http_client: Optional[httpx.AsyncClient] = None,
+                       max_concurrency: int = 16):
         self.api_key = api_key
         self.api_url = api_url
         self.default_input_max_charactrers = default_input_max_charactrers
@@ -19,18 +28,24 @@ class OpenAIProvider(LLMInterface):
         self.generation_model_id = None
         self.embedding_model_id = None
         self.embedding_size = None
+        self.tokenizer = None
         
-        self.client = OpenAI(
+        self.client = AsyncOpenAI(
             api_key=self.api_key,
             base_url=self.api_url if self.api_url and len(self.api_url) else None,
+            http_client=http_client,
         )
         
+        # caps the in-flight requests to OpenAI from this process
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        
         self.enums = OpenAIEnums
         self.logger = logging.getLogger(__name__)
 
 
     def set_generation_model(self, model_id: str):
         self.generation_model_id = model_id
+        self.tokenizer = None
     
     
     def set_embedding_model(self, model_id: str, embedding_size: int):
@@ -40,9 +55,40 @@ class OpenAIProvider(LLMInterface):
     def _process_text(self, text: str) -> str:
         return text[:self.default_input_max_charactrers].strip()
 
-    def generate_text(self, prompt: str, chat_history: list=[], 
-                      max_output_tokens: Optional[int] = None,
-                      temperature: Optional[float] = None):
+    def load_tokenizer(self):
+        """
+        Load the tiktoken encoding of the generation model. tiktoken downloads the BPE file
+        on first use unless it is already in TIKTOKEN_CACHE_DIR, so call this once at startup,
+        off the event loop. Without the encoding, tokens are estimated.
+        """
+        
+        if tiktoken is None or self.tokenizer is not None:
+            return self.tokenizer
+        
+        try:
+            try:
+                self.tokenizer = tiktoken.encoding_for_model(self.generation_model_id)
+            except KeyError:
+                self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            self.logger.warning(f"Can not load the tiktoken encoding, token counts are estimated: {e}")
+            self.tokenizer = None
+        
+        return self.tokenizer
+
+    def get_tokenizer_name(self) -> Optional[str]:
+        return self.tokenizer.name if self.tokenizer is not None else None
+
+    def count_tokens(self, text: str) -> int:
+        # never load the encoding here, this runs on the event loop
+        if self.tokenizer is None:
+            return super().count_tokens(text)
+        
+        return len(self.tokenizer.encode(text, disallowed_special=()))
+
+    async def generate_text(self, prompt: str, chat_history: list=[], 
+                            max_output_tokens: Optional[int] = None,
+                            temperature: Optional[float] = None):
         
         if not self.client:
             self.logger.error("OpenAI client was not set")
@@ -59,12 +105,13 @@ class OpenAIProvider(LLMInterface):
             self.construct_prompt(prompt=prompt, role=OpenAIEnums.USER.value)
         )    
 
-        response = self.client.chat.completions.create(
-            model = self.generation_model_id,
-            messages = chat_history,
-            max_tokens = max_output_tokens,
-            temperature = temperature
-        )
+        async with self.semaphore:
+            response = await self.client.chat.completions.create(
+                model = self.generation_model_id,
+                messages = chat_history,
+                max_tokens = max_output_tokens,
+                temperature = temperature
+            )
         
         if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message:
             self.logger.error("Error while generating text with OpenAI")
@@ -73,7 +120,47 @@ class OpenAIProvider(LLMInterface):
         return response.choices[0].message.content
 
 
-    def embed_text(self, text: Union[str, List[str]], document_type: Optional[str] = None) -> Optional[List[float]]:
+    async def generate_text_stream(self, prompt: str, chat_history: list=[], 
+                                   max_output_tokens: Optional[int] = None,
+                                   temperature: Optional[float] = None) -> AsyncIterator[str]:
+        
+        if not self.client:
+            self.logger.error("OpenAI client was not set")
+            return
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for OpenAI was not set")
+            return
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+        
+        chat_history.append(
+            self.construct_prompt(prompt=prompt, role=OpenAIEnums.USER.value)
+        )
+        
+        async with self.semaphore:
+            stream = await self.client.chat.completions.create(
+                model = self.generation_model_id,
+                messages = chat_history,
+                max_tokens = max_output_tokens,
+                temperature = temperature,
+                stream = True,
+            )
+            
+            try:
+                async for chunk in stream:
+                    if not chunk.choices or len(chunk.choices) == 0:
+                        continue
+                    
+                    token = chunk.choices[0].delta.content
+                    if token:
+                        yield token
+            finally:
+                # also runs when the consumer is cancelled, which aborts the upstream request
+                await stream.close()
+
+    async def embed_text(self, text: Union[str, List[str]], document_type: Optional[str] = None) -> Optional[List[float]]:
         
         if not self.client:
             self.logger.error("OpenAI client was not set")
@@ -86,10 +173,11 @@ class OpenAIProvider(LLMInterface):
             self.logger.error("Embedding model for OpenAI was not set")
             return None
         
-        response = self.client.embeddings.create(
-            model=self.embedding_model_id,
-            input=text,
-        )
+        async with self.semaphore:
+            response = await self.client.embeddings.create(
+                model=self.embedding_model_id,
+                input=text,
+            )
         
         if not response or not response.data or len(response.data) == 0 or not response.data[0].embedding:
             self.logger.error("Error while embedding text with OpenAI")
@@ -1,45 +1,185 @@
+from string import Template
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+import importlib
+import logging
+import time
 import os
-from typing import Optional
+
+class CompiledTemplate:
+    """
+    A string.Template split once into literal parts and placeholder slots,
+    so rendering is a single join instead of a regex substitution.
+    """
+
+    __slots__ = ("parts", "slots")
+
+    def __init__(self, template: Template):
+        self.parts = []
+        self.slots = []
+
+        source = template.template
+        position = 0
+        for match in template.pattern.finditer(source):
+            self.parts.append(source[position:match.start()])
+            position = match.end()
+
+            if match.group("escaped") is not None:
+                self.parts.append(template.delimiter)
+                continue
+
+            name = match.group("named") or match.group("braced")
+            if name is None:
+                raise ValueError(f"Invalid placeholder in template: {source[match.start():match.end() + 10]!r}")
+
+            self.slots.append((len(self.parts), name))
+            self.parts.append("")
+
+        self.parts.append(source[position:])
+        self.parts = tuple(self.parts)
+        self.slots = tuple(self.slots)
+
+    def render(self, vars: Mapping) -> str:
+        if not self.slots:
+            return "".join(self.parts)
+
+        # a missing variable raises KeyError, like Template.substitute
+        parts = list(self.parts)
+        for index, name in self.slots:
+            parts[index] = str(vars[name])
+
+        return "".join(parts)
 
 class TemplateParser:
-    
-    def __init__(self, language: Optional[str], default_language: str = "en"):
+    """
+    Loads the templates of every locale once into an immutable registry of compiled
+    templates. The registry of the active language already holds the default language
+    templates it lacks, so a lookup is a single dict access.
+    With `reload_interval` > 0 the locale files are checked for changes at most once per
+    interval and the registry is rebuilt and swapped in without a restart.
+    """
+
+    LOCALES_PACKAGE = "stores.llm.templates.locales"
+
+    def __init__(self, language: Optional[str], default_language: str = "en", reload_interval: int = 0):
         self.current_path = os.path.dirname(os.path.abspath(__file__))
+        self.locales_path = os.path.join(self.current_path, "locales")
         self.default_language = default_language
         self.language = default_language
+        self.reload_interval = reload_interval
+        self.logger = logging.getLogger(__name__)
+
+        self.registry = MappingProxyType({})
+        self.templates = MappingProxyType({})
+        self.files_mtimes = {}
+        self.next_reload_check = 0
 
+        self.load()
         self.set_language(language=language)
-        
-    def set_language(self, language: Optional[str]):
-        if not language:
-            self.language = self.default_language
-            return None
 
-        language_path = os.path.join(self.current_path, "locales", language)
-        
-        if os.path.exists(language_path):
+    def set_language(self, language: Optional[str]):
+        if language and language in self.registry:
             self.language = language
         else:
             self.language = self.default_language
-    
+
+        self.templates = self.get_language_templates(self.language)
+
+    def get_locale_files(self) -> dict:
+        locale_files = {}
+        for language in sorted(os.listdir(self.locales_path)):
+            language_path = os.path.join(self.locales_path, language)
+            if not os.path.isdir(language_path) or language.startswith("__"):
+                continue
+
+            for file_name in sorted(os.listdir(language_path)):
+                if file_name.endswith(".py") and not file_name.startswith("__"):
+                    file_path = os.path.join(language_path, file_name)
+                    locale_files[(language, file_name[:-3])] = file_path
+
+        return locale_files
+
+    def load(self, reload_modules: bool = False):
+        """
+        Import and compile every template of every locale, then swap the registry in one assignment.
+        """
+
+        locale_files = self.get_locale_files()
+
+        registry = {}
+        for (language, group), file_path in locale_files.items():
+            module = importlib.import_module(f"{self.LOCALES_PACKAGE}.{language}.{group}")
+            if reload_modules:
+                module = importlib.reload(module)
+
+            group_templates = registry.setdefault(language, {})
+            for key, value in vars(module).items():
+                if isinstance(value, Template):
+                    group_templates[(group, key)] = CompiledTemplate(value)
+
+        self.files_mtimes = {
+            file_path: os.path.getmtime(file_path)
+            for file_path in locale_files.values()
+        }
+        self.registry = MappingProxyType({
+            language: MappingProxyType(templates)
+            for language, templates in registry.items()
+        })
+        self.templates = self.get_language_templates(self.language)
+
+    def get_language_templates(self, language: str) -> Mapping:
+        templates = dict(self.registry.get(self.default_language, {}))
+        templates.update(self.registry.get(language, {}))
+        return MappingProxyType(templates)
+
+    def reload_if_changed(self):
+        if self.reload_interval <= 0 or time.monotonic() < self.next_reload_check:
+            return False
+
+        self.next_reload_check = time.monotonic() + self.reload_interval
+
+        locale_files = self.get_locale_files()
+        files_mtimes = {
+            file_path: os.path.getmtime(file_path)
+            for file_path in locale_files.values()
+        }
+        if files_mtimes == self.files_mtimes:
+            return False
+
+        try:
+            self.load(reload_modules=True)
+        except Exception as e:
+            # keep serving the previous templates until the files are fixed
+            self.files_mtimes = files_mtimes
+            self.logger.error(f"Error while reloading templates: {e}")
+            return False
+
+        return True
+
     def get(self, group: str, key: str, vars: dict={}):
         if not group or not key:
             return None
-        
-        group_path = os.path.join(self.current_path, "locales", self.language, f"{group}.py")
-        targeted_language = self.language
-        if not os.path.exists(group_path):
-            group_path = os.path.join(self.current_path, "locales", self.default_language, f"{group}.py")
-            targeted_language = self.default_language
-        
-        if not os.path.exists(group_path):
+
+        self.reload_if_changed()
+
+        template = self.templates.get((group, key))
+        if template is None:
             return None
-        
-        # import group module
-        module = __import__(f"stores.llm.templates.locales.{targeted_language}.{group}", fromlist=[group])
-        
-        if not module:
+
+        return template.render(vars)
+
+    def get_joined(self, group: str, key: str, vars_list: Iterable[dict], separator: str = "\n"):
+        """
+        Render the same template once per vars dict and join the results.
+        """
+
+        if not group or not key:
             return None
-        
-        key_attribute = getattr(module, key)
-        return key_attribute.substitute(vars)
+
+        self.reload_if_changed()
+
+        template = self.templates.get((group, key))
+        if template is None:
+            return None
+
+        return separator.join([ template.render(vars) for vars in vars_list ])
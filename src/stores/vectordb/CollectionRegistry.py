@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+from typing import Optional, Dict
+
+@dataclass
+class CollectionMetadata:
+    existed: bool = False
+    embedding_size: Optional[int] = None
+    has_index: Optional[bool] = None
+    has_lexical_index: Optional[bool] = None
+    has_chunk_id_index: Optional[bool] = None
+    approx_count: Optional[int] = None
+
+class CollectionRegistry:
+    """
+    Process-local cache of vector collection metadata, so the hot paths do not
+    need a catalog lookup per call. Unknown fields are None and must be fetched.
+    """
+    
+    def __init__(self):
+        self.collections: Dict[str, CollectionMetadata] = {}
+    
+    def get(self, collection_name: str) -> Optional[CollectionMetadata]:
+        return self.collections.get(collection_name)
+    
+    def set(self, collection_name: str, **fields) -> CollectionMetadata:
+        metadata = self.collections.setdefault(collection_name, CollectionMetadata())
+        for key, value in fields.items():
+            setattr(metadata, key, value)
+        return metadata
+    
+    def increment_count(self, collection_name: str, count: int):
+        metadata = self.collections.get(collection_name)
+        if metadata and metadata.approx_count is not None:
+            metadata.approx_count += count
+    
+    def invalidate(self, collection_name: str):
+        self.collections.pop(collection_name, None)
+    
+    def clear(self):
+        self.collections.clear()
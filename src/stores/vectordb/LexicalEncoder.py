@@ -0,0 +1,33 @@
+from collections import Counter
+from typing import List, Tuple
+import zlib
+import re
+
+class LexicalEncoder:
+    """
+    Turns text into sparse term vectors for lexical retrieval. Tokens are hashed
+    into a 32-bit index space and weighted with BM25 term-frequency saturation;
+    the IDF part is applied by the vector DB at query time.
+    """
+    
+    token_pattern = re.compile(r"\w+", re.UNICODE)
+    
+    def __init__(self, k1: float = 1.2):
+        self.k1 = k1
+    
+    def tokenize(self, text: str) -> List[str]:
+        return [ token.lower() for token in self.token_pattern.findall(text or "") ]
+    
+    def token_index(self, token: str) -> int:
+        # crc32 is stable across processes, unlike hash()
+        return zlib.crc32(token.encode("utf-8"))
+    
+    def encode_document(self, text: str) -> Tuple[List[int], List[float]]:
+        counts = Counter(self.token_index(t) for t in self.tokenize(text))
+        indices = list(counts.keys())
+        values = [ tf * (self.k1 + 1) / (tf + self.k1) for tf in counts.values() ]
+        return indices, values
+    
+    def encode_query(self, text: str) -> Tuple[List[int], List[float]]:
+        indices = list(dict.fromkeys(self.token_index(t) for t in self.tokenize(text)))
+        return indices, [1.0] * len(indices)
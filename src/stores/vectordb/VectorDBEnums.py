@@ -14,12 +14,26 @@ class PgVectorTableSchemesEnums(Enum):
     VECTOR = "vector"
     CHUNK_ID = "chunk_id"
     METADATA = "metadata"
+    TEXT_SEARCH = "text_search"
     _PREFIX = "pgvector"
 
 class PgVectorDistanceMethodEnums(Enum):
     COSINE = "vector_cosine_ops"
-    DOT = "vector_l2_ops"
+    DOT = "vector_ip_ops"
+
+class PgVectorDistanceOperatorEnums(Enum):
+    COSINE = "<=>"
+    DOT = "<#>"
     
 class PgVectorIndexTypeEnums(Enum):
     HNSW = "hnsw"
     IVFFLAT = "ivfflat"
+
+class VectorRecordMetadataEnums(Enum):
+    # bookkeeping keys stored next to the chunk metadata of every vector record
+    CHUNK_HASH = "_chunk_hash"
+    ASSET_ID = "_asset_id"
+
+class QdrantVectorNamesEnums(Enum):
+    DENSE = ""
+    LEXICAL = "lexical"
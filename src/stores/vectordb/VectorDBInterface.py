@@ -1,9 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Dict
 from models.db_schemes import RetrievedDocument
 
 class VectorDBInterface(ABC):
     
+    # providers whose collections reference chunks(chunk_id) can never hold the vector
+    # of a deleted chunk, so incremental indexing skips the stale vectors pass for them
+    ENFORCES_CHUNK_FOREIGN_KEY = False
+    
     @abstractmethod
     async def connect(self):
         pass
@@ -44,9 +48,37 @@ class VectorDBInterface(ABC):
     async def insert_many(self, collection_name: str, texts: list, vectors: list,
                           metadata: Optional[list] = None,
                           record_ids: Optional[list] = None,
-                          batch_size: int = 50) -> bool:
+                          batch_size: int = 50,
+                          create_index: bool = True) -> bool:
+        pass
+    
+    @abstractmethod
+    async def create_vector_index(self, collection_name: str) -> bool:
+        pass
+    
+    @abstractmethod
+    async def list_record_ids(self, collection_name: str, after_record_id: int = 0,
+                              limit: int = 1000) -> List[int]:
+        pass
+    
+    @abstractmethod
+    async def get_record_hashes(self, collection_name: str, record_ids: list) -> Dict[int, Optional[str]]:
         pass
     
     @abstractmethod
-    async def search_by_vector(self, collection_name: str, vector: list, limit: int) -> Optional[List[RetrievedDocument]]:
+    async def delete_by_record_ids(self, collection_name: str, record_ids: list) -> bool:
+        pass
+    
+    @abstractmethod
+    async def delete_by_asset_ids(self, collection_name: str, asset_ids: list) -> bool:
+        pass
+    
+    @abstractmethod
+    async def search_by_vector(self, collection_name: str, vector: list, limit: int,
+                               ef_search: Optional[int] = None) -> Optional[List[RetrievedDocument]]:
+        pass
+
+    @abstractmethod
+    async def hybrid_search(self, collection_name: str, text: str, vector: list, limit: int,
+                            ef_search: Optional[int] = None) -> Optional[List[RetrievedDocument]]:
         pass
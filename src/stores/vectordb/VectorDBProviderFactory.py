@@ -23,6 +23,7 @@ class VectorDBProviderFactory:
                 distance_method=self.config.VECOTR_DB_DISTANCE_METHOD,
                 default_vector_size=self.config.EMBEDDING_SIZE,
                 index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD,
+                hybrid_candidates=self.config.VECTOR_DB_HYBRID_CANDIDATES,
             )
         
         if provider == VectorDBEnums.PGVECTOR.value:
@@ -32,6 +33,12 @@ class VectorDBProviderFactory:
                 distance_method=self.config.VECOTR_DB_DISTANCE_METHOD,
                 default_vector_size=self.config.EMBEDDING_SIZE,
                 index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD,
+                use_copy=self.config.VECTOR_DB_PGVEC_USE_COPY,
+                default_ef_search=self.config.VECTOR_DB_HNSW_EF_SEARCH,
+                listen_for_changes=self.config.VECTOR_DB_PGVEC_LISTEN_CHANGES,
+                text_search_config=self.config.VECTOR_DB_PGVEC_TEXT_SEARCH_CONFIG,
+                hybrid_candidates=self.config.VECTOR_DB_HYBRID_CANDIDATES,
+                rrf_k=self.config.VECTOR_DB_HYBRID_RRF_K,
             )
         
         return None
@@ -1,31 +1,66 @@
 from ..VectorDBInterface import VectorDBInterface
+from ..CollectionRegistry import CollectionRegistry
 from ..VectorDBEnums import (DistanceMethodEnums, PgVectorTableSchemesEnums,
-                             PgVectorDistanceMethodEnums, PgVectorIndexTypeEnums)
+                             PgVectorDistanceMethodEnums, PgVectorIndexTypeEnums,
+                             PgVectorDistanceOperatorEnums, VectorRecordMetadataEnums)
 import logging
-from typing import List, Optional
+from typing import List, Optional, Dict
 from models.db_schemes import RetrievedDocument
 from sqlalchemy.sql import text as sql_text
+from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.ext.asyncio import async_sessionmaker
+import numpy as np
+import asyncio
+import struct
 import json
+import uuid
+import io
 
 class PGVectorProvider(VectorDBInterface):
     
+    # every collection table has chunk_id REFERENCES chunks(chunk_id)
+    ENFORCES_CHUNK_FOREIGN_KEY = True
+    
     def __init__(self, db_client: async_sessionmaker, default_vector_size: int = 768, 
-                 distance_method: Optional[str] = None, index_threshold: int = 100):
+                 distance_method: Optional[str] = None, index_threshold: int = 100,
+                 use_copy: bool = True, default_ef_search: Optional[int] = None,
+                 listen_for_changes: bool = False, text_search_config: str = "simple",
+                 hybrid_candidates: int = 50, rrf_k: int = 60):
         self.db_client = db_client
         self.default_vector_size = default_vector_size
+        self.use_copy = use_copy
+        self.default_ef_search = default_ef_search
         
         self.index_threshold = index_threshold
         
+        # the operator must match the index opclass, otherwise the planner falls back to a seq scan
+        self.distance_operator = PgVectorDistanceOperatorEnums.COSINE.value
         if distance_method == DistanceMethodEnums.COSINE.value:
             distance_method = PgVectorDistanceMethodEnums.COSINE.value
         elif distance_method == DistanceMethodEnums.DOT.value:
             distance_method = PgVectorDistanceMethodEnums.DOT.value
+            self.distance_operator = PgVectorDistanceOperatorEnums.DOT.value
         
         self.pgvector_table_prefix = PgVectorTableSchemesEnums._PREFIX.value
         self.distance_method = distance_method
         self.logger = logging.getLogger("uvicorn")
         self.default_index_name = lambda collection_name: f"{collection_name}_vector_idx"
+        self.default_text_search_index_name = lambda collection_name: f"{collection_name}_text_search_idx"
+        self.default_chunk_id_index_name = lambda collection_name: f"{collection_name}_chunk_id_idx"
+        self.staging_table_name = f"{self.pgvector_table_prefix}_staging"
+        
+        # lexical side of hybrid search: generated tsvector column + GIN index
+        self.text_search_config = text_search_config
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        
+        # collection metadata cache, optionally kept in sync across replicas with LISTEN/NOTIFY
+        self.collection_registry = CollectionRegistry()
+        self.listen_for_changes = listen_for_changes
+        self.listen_channel = f"{self.pgvector_table_prefix}_collections"
+        self.listen_connection = None
+        self.instance_id = uuid.uuid4().hex
+        self.index_lock = asyncio.Lock()
         
     async def connect(self):
         async with self.db_client() as session:
@@ -34,19 +69,60 @@ class PGVectorProvider(VectorDBInterface):
                     "CREATE EXTENSION IF NOT EXISTS vector"
                 ))
             await session.commit()
+        
+        if self.listen_for_changes:
+            db_engine = self.db_client.kw.get("bind")
+            self.listen_connection = await db_engine.connect()
+            raw_connection = await self.listen_connection.get_raw_connection()
+            await raw_connection.driver_connection.add_listener(
+                self.listen_channel, self.on_collection_changed
+            )
     
     async def disconnect(self):
-        pass
+        if self.listen_connection is not None:
+            raw_connection = await self.listen_connection.get_raw_connection()
+            await raw_connection.driver_connection.remove_listener(
+                self.listen_channel, self.on_collection_changed
+            )
+            await self.listen_connection.close()
+            self.listen_connection = None
+        
+        self.collection_registry.clear()
+    
+    def on_collection_changed(self, connection, pid, channel, payload):
+        message = json.loads(payload)
+        if message.get("sender") != self.instance_id:
+            self.collection_registry.invalidate(message.get("collection_name"))
+    
+    async def notify_collection_changed(self, session, collection_name: str):
+        if not self.listen_for_changes:
+            return None
+        
+        await session.execute(sql_text("SELECT pg_notify(:channel, :payload)"), {
+            "channel": self.listen_channel,
+            "payload": json.dumps({
+                "sender": self.instance_id,
+                "collection_name": collection_name,
+            }),
+        })
     
     async def is_collection_existed(self, collection_name: str) -> bool:
+        # only positive answers are cached, another process may create the table at any time
+        metadata = self.collection_registry.get(collection_name)
+        if metadata and metadata.existed:
+            return True
+        
         record = None
         async with self.db_client() as session:
             async with session.begin():
                 list_tbl = sql_text(f"SELECT * FROM pg_tables WHERE tablename = :collection_name")
                 results = await session.execute(list_tbl, {"collection_name": collection_name})
                 record = results.scalar_one_or_none()
-                
-        return record
+        
+        if record:
+            self.collection_registry.set(collection_name, existed=True)
+        
+        return bool(record)
 
     async def list_all_collections(self) -> List:
         records = []
@@ -93,8 +169,11 @@ class PGVectorProvider(VectorDBInterface):
                 self.logger.info(f"Deleting collection: {collection_name}")
                 delete_sql = sql_text(f"DROP TABLE IF EXISTS {collection_name}")
                 await session.execute(delete_sql)
+                await self.notify_collection_changed(session, collection_name)
                 await session.commit()
         
+        self.collection_registry.invalidate(collection_name)
+        
         return True
     
     async def create_collection(self, collection_name: str, embedding_size: int, do_reset: bool = False):
@@ -114,16 +193,96 @@ class PGVectorProvider(VectorDBInterface):
                             f"{PgVectorTableSchemesEnums.VECTOR.value} vector({embedding_size}), "
                             f"{PgVectorTableSchemesEnums.METADATA.value} jsonb DEFAULT \'{{}}\', "
                             f"{PgVectorTableSchemesEnums.CHUNK_ID.value} integer, "
+                            f"{self.get_text_search_column_definition()}, "
                             f"FOREIGN KEY ({PgVectorTableSchemesEnums.CHUNK_ID.value}) REFERENCES chunks(chunk_id)"
                         ")"
                     )
                     
                     await session.execute(create_sql)
+                    await self.notify_collection_changed(session, collection_name)
                     await session.commit()
+            
+            self.collection_registry.set(collection_name, existed=True, embedding_size=embedding_size,
+                                         has_index=False, approx_count=0)
+            await self.create_lexical_index(collection_name=collection_name)
+            await self.create_chunk_id_index(collection_name=collection_name)
             return True
+        
+        # collections created before hybrid search get their lexical column and index from
+        # the b6d1f0c8e924 migration, backfilling them here would rewrite the table under lock
+        
+        # collections created before upserts get their unique chunk_id index
+        metadata = self.collection_registry.get(collection_name)
+        if not metadata or not metadata.has_chunk_id_index:
+            await self.create_chunk_id_index(collection_name=collection_name)
 
         return False
 
+    def get_text_search_column_definition(self) -> str:
+        return (
+            f"{PgVectorTableSchemesEnums.TEXT_SEARCH.value} tsvector GENERATED ALWAYS AS "
+            f"(to_tsvector('{self.text_search_config}'::regconfig, "
+            f"coalesce({PgVectorTableSchemesEnums.TEXT.value}, ''))) STORED"
+        )
+
+    async def create_lexical_index(self, collection_name: str):
+        # only called on a freshly created, empty collection
+        index_name = self.default_text_search_index_name(collection_name=collection_name)
+        async with self.db_client() as session:
+            async with session.begin():
+                await session.execute(sql_text(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} ON {collection_name} "
+                    f"USING gin ({PgVectorTableSchemesEnums.TEXT_SEARCH.value})"
+                ))
+        
+        self.collection_registry.set(collection_name, has_lexical_index=True)
+        
+        return True
+
+    async def create_chunk_id_index(self, collection_name: str):
+        """
+        Unique index on chunk_id, the conflict target of every upsert. Older collections
+        may already hold duplicated chunks from retried jobs, keep the newest row of each.
+        """
+        
+        index_name = self.default_chunk_id_index_name(collection_name=collection_name)
+        async with self.db_client() as session:
+            async with session.begin():
+                check_sql = sql_text(
+                    "SELECT 1 FROM pg_indexes "
+                    "WHERE tablename = :collection_name AND indexname = :index_name"
+                )
+                result = await session.execute(check_sql, {
+                    "collection_name": collection_name,
+                    "index_name": index_name,
+                })
+                
+                if not result.scalar_one_or_none():
+                    self.logger.info(f"Creating chunk_id unique index for collection: {collection_name}")
+                    await session.execute(sql_text(
+                        f"DELETE FROM {collection_name} AS old_records "
+                        f"USING {collection_name} AS new_records "
+                        f"WHERE old_records.{PgVectorTableSchemesEnums.CHUNK_ID.value} = new_records.{PgVectorTableSchemesEnums.CHUNK_ID.value} "
+                        f"AND old_records.{PgVectorTableSchemesEnums.ID.value} < new_records.{PgVectorTableSchemesEnums.ID.value}"
+                    ))
+                    await session.execute(sql_text(
+                        f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} "
+                        f"ON {collection_name} ({PgVectorTableSchemesEnums.CHUNK_ID.value})"
+                    ))
+        
+        self.collection_registry.set(collection_name, has_chunk_id_index=True)
+        
+        return True
+
+    def get_upsert_clause(self) -> str:
+        # re-indexing a chunk replaces its row instead of adding a duplicate
+        return (
+            f"ON CONFLICT ({PgVectorTableSchemesEnums.CHUNK_ID.value}) DO UPDATE SET "
+            f"{PgVectorTableSchemesEnums.TEXT.value} = EXCLUDED.{PgVectorTableSchemesEnums.TEXT.value}, "
+            f"{PgVectorTableSchemesEnums.VECTOR.value} = EXCLUDED.{PgVectorTableSchemesEnums.VECTOR.value}, "
+            f"{PgVectorTableSchemesEnums.METADATA.value} = EXCLUDED.{PgVectorTableSchemesEnums.METADATA.value}"
+        )
+
     async def is_index_existed(self, collection_name: str) -> bool:
         index_name = self.default_index_name(collection_name=collection_name)
         async with self.db_client() as session:
@@ -140,41 +299,71 @@ class PGVectorProvider(VectorDBInterface):
                     "index_name": index_name,
                 })
                 
-                return bool(results.scalar_one_or_none())
+                is_index_existed = bool(results.scalar_one_or_none())
+        
+        self.collection_registry.set(collection_name, has_index=is_index_existed)
+        
+        return is_index_existed
 
     async def create_vector_index(self, collection_name: str, 
-                                  index_type: str = PgVectorIndexTypeEnums.HNSW.value):
-        is_index_existed = await self.is_index_existed(collection_name=collection_name)
-        if is_index_existed:
+                                  index_type: str = PgVectorIndexTypeEnums.HNSW.value,
+                                  use_cached_count: bool = False):
+        # answer from the registry when possible instead of COUNT(*) after every batch
+        metadata = self.collection_registry.get(collection_name)
+        if metadata and metadata.has_index:
             return False
         
-        async with self.db_client() as session:
-            async with session.begin():
-                count_sql = sql_text(f"SELECT COUNT(*) FROM {collection_name}")
-                result = await session.execute(count_sql)
-                records_count = result.scalar_one()
-                
-                if records_count < self.index_threshold:
-                    return False
-                
-                self.logger.info(f"START: Creating vector index for collection: {collection_name}")
+        # the cached count only tracks this process's inserts, so explicit calls always recount
+        if use_cached_count and metadata and metadata.approx_count is not None \
+                and metadata.approx_count < self.index_threshold:
+            return False
+        
+        # concurrent batches of this process must not race to build the same index
+        async with self.index_lock:
+            metadata = self.collection_registry.get(collection_name)
+            if metadata and metadata.has_index:
+                return False
+            
+            is_index_existed = await self.is_index_existed(collection_name=collection_name)
+            if is_index_existed:
+                return False
+            
+            async with self.db_client() as session:
+                async with session.begin():
+                    count_sql = sql_text(f"SELECT COUNT(*) FROM {collection_name}")
+                    result = await session.execute(count_sql)
+                    records_count = result.scalar_one()
+                    
+                    self.collection_registry.set(collection_name, approx_count=records_count)
+                    
+                    if records_count < self.index_threshold:
+                        return False
+                    
+                    self.logger.info(f"START: Creating vector index for collection: {collection_name}")
 
-                index_name = self.default_index_name(collection_name=collection_name)
-                create_idx_sql = sql_text(
-                    f"CREATE INDEX {index_name} ON {collection_name} "
-                    f"USING {index_type} ({PgVectorTableSchemesEnums.VECTOR.value} {self.distance_method})"
-                )
-                await session.execute(create_idx_sql)
+                    index_name = self.default_index_name(collection_name=collection_name)
+                    create_idx_sql = sql_text(
+                        f"CREATE INDEX IF NOT EXISTS {index_name} ON {collection_name} "
+                        f"USING {index_type} ({PgVectorTableSchemesEnums.VECTOR.value} {self.distance_method})"
+                    )
+                    await session.execute(create_idx_sql)
 
-                self.logger.info(f"END: Created vector index for collection: {collection_name}")
+                    self.logger.info(f"END: Created vector index for collection: {collection_name}")
+            
+            self.collection_registry.set(collection_name, has_index=True)
+        
+        return True
 
     async def reset_vector_index(self, collection_name: str, 
                                   index_type: str = PgVectorIndexTypeEnums.HNSW.value):
         index_name = self.default_index_name(collection_name=collection_name)
         async with self.db_client() as session:
-            async with session:
+            async with session.begin():
                 drop_sql = sql_text(f"DROP INDEX IF EXISTS {index_name}")
                 await session.execute(drop_sql)
+                await self.notify_collection_changed(session, collection_name)
+        
+        self.collection_registry.set(collection_name, has_index=False, approx_count=None)
         
         return await self.create_vector_index(collection_name=collection_name, index_type=index_type)
 
@@ -195,7 +384,8 @@ class PGVectorProvider(VectorDBInterface):
                 insert_sql = sql_text(
                     f"INSERT INTO {collection_name} "
                     f"({PgVectorTableSchemesEnums.TEXT.value}, {PgVectorTableSchemesEnums.VECTOR.value}, {PgVectorTableSchemesEnums.METADATA.value}, {PgVectorTableSchemesEnums.CHUNK_ID.value}) "
-                    f"VALUES (:text, :vector, :metadata, :chunk_id)"
+                    f"VALUES (:text, :vector, :metadata, :chunk_id) "
+                    f"{self.get_upsert_clause()}"
                 )
                 metadata_json = json.dumps(metadata, ensure_ascii=False) if metadata else "{}"
                 await session.execute(insert_sql, {
@@ -204,13 +394,15 @@ class PGVectorProvider(VectorDBInterface):
                     "metadata": metadata_json,
                     "chunk_id": record_id,
                 })
-                
-        await self.create_vector_index(collection_name=collection_name)
+        
+        self.collection_registry.increment_count(collection_name, 1)
+        await self.create_vector_index(collection_name=collection_name, use_cached_count=True)
         
         return True
 
     async def insert_many(self, collection_name: str, texts: List, vectors: List,
-                          metadata: Optional[List] = None, record_ids: Optional[List] = None, batch_size: int = 50):
+                          metadata: Optional[List] = None, record_ids: Optional[List] = None, batch_size: int = 50,
+                          create_index: bool = True):
         
         is_collections_existed = await self.is_collection_existed(collection_name=collection_name)
         if not is_collections_existed:
@@ -224,6 +416,21 @@ class PGVectorProvider(VectorDBInterface):
         if not metadata or len(metadata) == 0:
             metadata = [None] * len(texts)
         
+        if self.use_copy:
+            is_copied = False
+            try:
+                await self.copy_many(collection_name=collection_name, texts=texts, vectors=vectors,
+                                     metadata=metadata, record_ids=record_ids)
+                is_copied = True
+            except Exception as e:
+                self.logger.error(f"Binary COPY failed for collection: {collection_name}, falling back to INSERT: {e}")
+            
+            if is_copied:
+                self.collection_registry.increment_count(collection_name, len(record_ids))
+                if create_index:
+                    await self.create_vector_index(collection_name=collection_name, use_cached_count=True)
+                return True
+        
         async with self.db_client() as session:
             async with session.begin():
                 for i in range(0, len(texts), batch_size):
@@ -250,40 +457,295 @@ class PGVectorProvider(VectorDBInterface):
                         f"{PgVectorTableSchemesEnums.VECTOR.value}, "
                         f"{PgVectorTableSchemesEnums.METADATA.value}, "
                         f"{PgVectorTableSchemesEnums.CHUNK_ID.value}) "
-                        f"VALUES (:text, :vector, :metadata, :chunk_id)"
+                        f"VALUES (:text, :vector, :metadata, :chunk_id) "
+                        f"{self.get_upsert_clause()}"
                     )
                     
                     await session.execute(batch_insert_sql, values)
-                    
-        await self.create_vector_index(collection_name=collection_name)
+        
+        self.collection_registry.increment_count(collection_name, len(record_ids))
+        if create_index:
+            await self.create_vector_index(collection_name=collection_name, use_cached_count=True)
         
         return True
     
-    async def search_by_vector(self, collection_name: str, vector: List, limit: int):
+    def encode_copy_binary(self, texts: List, vectors: List, metadata: List, record_ids: List) -> io.BytesIO:
+        """
+        Build a binary COPY payload for (text, vector, metadata, chunk_id) rows.
+        Vectors use pgvector's binary format (int16 dim, int16 unused, float4[dim] big-endian)
+        straight from a float32 NumPy array, so no float is ever formatted as a string.
+        """
         
-        is_collections_existed = await self.is_collection_existed(collection_name=collection_name)
-        if not is_collections_existed:
-            self.logger.error(f"Cannot search for records in a non-existed collection: {collection_name}")
+        vectors_array = np.asarray(vectors, dtype=">f4")
+        if vectors_array.ndim != 2:
+            raise ValueError("All vectors must have the same dimension")
+        
+        dim = vectors_array.shape[1]
+        vector_header = struct.pack(">iHH", 4 + 4 * dim, dim, 0)
+        
+        buffer = io.BytesIO()
+        buffer.write(b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0))
+        
+        for _text, _vector, _metadata, _record_id in zip(texts, vectors_array, metadata, record_ids):
+            text_bytes = (_text or "").encode("utf-8")
+            metadata_bytes = b"\x01" + (json.dumps(_metadata, ensure_ascii=False) if _metadata else "{}").encode("utf-8")
+            
+            buffer.write(struct.pack(">h", 4))
+            buffer.write(struct.pack(">i", len(text_bytes)))
+            buffer.write(text_bytes)
+            buffer.write(vector_header)
+            buffer.write(_vector.tobytes())
+            buffer.write(struct.pack(">i", len(metadata_bytes)))
+            buffer.write(metadata_bytes)
+            buffer.write(struct.pack(">ii", 4, int(_record_id)))
+        
+        buffer.write(struct.pack(">h", -1))
+        buffer.seek(0)
+        
+        return buffer
+
+    async def copy_many(self, collection_name: str, texts: List, vectors: List,
+                        metadata: List, record_ids: List):
+        
+        payload = self.encode_copy_binary(texts=texts, vectors=vectors,
+                                          metadata=metadata, record_ids=record_ids)
+        
+        columns = [
+            PgVectorTableSchemesEnums.TEXT.value,
+            PgVectorTableSchemesEnums.VECTOR.value,
+            PgVectorTableSchemesEnums.METADATA.value,
+            PgVectorTableSchemesEnums.CHUNK_ID.value,
+        ]
+        columns_list = ", ".join(columns)
+        
+        async with self.db_client() as session:
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            
+            # COPY cannot resolve conflicts, so stream into a staging table and upsert from it
+            async with driver_connection.transaction():
+                await driver_connection.execute(
+                    f"CREATE TEMP TABLE {self.staging_table_name} ("
+                    f"{PgVectorTableSchemesEnums.TEXT.value} text, "
+                    f"{PgVectorTableSchemesEnums.VECTOR.value} vector, "
+                    f"{PgVectorTableSchemesEnums.METADATA.value} jsonb, "
+                    f"{PgVectorTableSchemesEnums.CHUNK_ID.value} integer"
+                    f") ON COMMIT DROP"
+                )
+                await driver_connection.copy_to_table(
+                    self.staging_table_name,
+                    source=payload,
+                    columns=columns,
+                    format="binary",
+                )
+                await driver_connection.execute(
+                    f"INSERT INTO {collection_name} ({columns_list}) "
+                    f"SELECT DISTINCT ON ({PgVectorTableSchemesEnums.CHUNK_ID.value}) {columns_list} "
+                    f"FROM {self.staging_table_name} "
+                    f"ORDER BY {PgVectorTableSchemesEnums.CHUNK_ID.value} "
+                    f"{self.get_upsert_clause()}"
+                )
+    
+    async def list_record_ids(self, collection_name: str, after_record_id: int = 0,
+                              limit: int = 1000) -> List[int]:
+        
+        if not await self.is_collection_existed(collection_name=collection_name):
+            return []
+        
+        async with self.db_client() as session:
+            list_sql = sql_text(
+                f"SELECT {PgVectorTableSchemesEnums.CHUNK_ID.value} FROM {collection_name} "
+                f"WHERE {PgVectorTableSchemesEnums.CHUNK_ID.value} > :after_record_id "
+                f"ORDER BY {PgVectorTableSchemesEnums.CHUNK_ID.value} LIMIT :limit"
+            )
+            result = await session.execute(list_sql, {
+                "after_record_id": after_record_id,
+                "limit": limit,
+            })
+            record_ids = result.scalars().all()
+        
+        return list(record_ids)
+
+    async def get_record_hashes(self, collection_name: str, record_ids: List) -> Dict[int, Optional[str]]:
+        
+        if not record_ids or not await self.is_collection_existed(collection_name=collection_name):
+            return {}
+        
+        async with self.db_client() as session:
+            hashes_sql = sql_text(
+                f"SELECT {PgVectorTableSchemesEnums.CHUNK_ID.value} AS chunk_id, "
+                f"{PgVectorTableSchemesEnums.METADATA.value} ->> '{VectorRecordMetadataEnums.CHUNK_HASH.value}' AS chunk_hash "
+                f"FROM {collection_name} "
+                f"WHERE {PgVectorTableSchemesEnums.CHUNK_ID.value} = ANY(:record_ids)"
+            )
+            result = await session.execute(hashes_sql, {"record_ids": list(record_ids)})
+            records = result.fetchall()
+        
+        return {
+            record.chunk_id: record.chunk_hash
+            for record in records
+        }
+
+    async def delete_by_record_ids(self, collection_name: str, record_ids: List) -> bool:
+        
+        if not record_ids or not await self.is_collection_existed(collection_name=collection_name):
             return False
         
-        vector_str = "[" + ",".join([ str(v) for v in vector ]) + "]"
         async with self.db_client() as session:
             async with session.begin():
-                search_sql = sql_text(
-                    f"SELECT {PgVectorTableSchemesEnums.TEXT.value} as text, 1 - ({PgVectorTableSchemesEnums.VECTOR.value} <=> :vector) as score "
-                    f"FROM {collection_name} "
-                    f"ORDER BY score DESC "
-                    f"LIMIT {limit}"
+                delete_sql = sql_text(
+                    f"DELETE FROM {collection_name} "
+                    f"WHERE {PgVectorTableSchemesEnums.CHUNK_ID.value} = ANY(:record_ids)"
                 )
-                
-                result = await session.execute(search_sql, {"vector": vector_str})
-                
-                records = result.fetchall()
-                
-                return [
-                    RetrievedDocument(
-                        text=record.text,
-                        score=record.score,
+                result = await session.execute(delete_sql, {"record_ids": list(record_ids)})
+        
+        self.collection_registry.increment_count(collection_name, -result.rowcount)
+        
+        return True
+
+    async def delete_by_asset_ids(self, collection_name: str, asset_ids: List) -> bool:
+        
+        if not asset_ids or not await self.is_collection_existed(collection_name=collection_name):
+            return False
+        
+        # chunk_id references chunks, so the asset is resolved there instead of the metadata
+        async with self.db_client() as session:
+            async with session.begin():
+                delete_sql = sql_text(
+                    f"DELETE FROM {collection_name} AS records "
+                    f"USING chunks "
+                    f"WHERE records.{PgVectorTableSchemesEnums.CHUNK_ID.value} = chunks.chunk_id "
+                    f"AND chunks.chunk_asset_id = ANY(:asset_ids)"
+                )
+                result = await session.execute(delete_sql, {"asset_ids": list(asset_ids)})
+        
+        self.collection_registry.increment_count(collection_name, -result.rowcount)
+        
+        return True
+
+    def get_score_expression(self, distance_expression: str) -> str:
+        # <#> returns the negative inner product, <=> the cosine distance
+        if self.distance_operator == PgVectorDistanceOperatorEnums.DOT.value:
+            return f"({distance_expression}) * -1"
+        return f"1 - ({distance_expression})"
+
+    async def fetch_search_records(self, collection_name: str, search_sql, search_params: dict,
+                                   limit: int, ef_search: Optional[int] = None):
+        
+        ef_search = ef_search if ef_search else self.default_ef_search
+        
+        try:
+            async with self.db_client() as session:
+                if ef_search:
+                    async with session.begin():
+                        # ef_search below the limit would truncate the result set
+                        await session.execute(sql_text(
+                            f"SET LOCAL hnsw.ef_search = {max(int(ef_search), int(limit))}"
+                        ))
+                        result = await session.execute(search_sql, search_params)
+                        records = result.fetchall()
+                else:
+                    # autocommit skips BEGIN/COMMIT, leaving a single round trip
+                    connection = await session.connection(
+                        execution_options={"isolation_level": "AUTOCOMMIT"}
                     )
-                    for record in records
-                ]
+                    result = await connection.execute(search_sql, search_params)
+                    records = result.fetchall()
+        except ProgrammingError as e:
+            # the cached collection may have been dropped by another process
+            self.logger.error(f"Error while searching collection: {collection_name}: {e}")
+            self.collection_registry.invalidate(collection_name)
+            return None
+        
+        return [
+            RetrievedDocument(
+                text=record.text,
+                score=record.score,
+            )
+            for record in records
+        ]
+
+    async def search_by_vector(self, collection_name: str, vector: List, limit: int,
+                               ef_search: Optional[int] = None):
+        
+        is_collections_existed = await self.is_collection_existed(collection_name=collection_name)
+        if not is_collections_existed:
+            self.logger.error(f"Cannot search for records in a non-existed collection: {collection_name}")
+            return False
+        
+        vector_str = "[" + ",".join([ str(v) for v in vector ]) + "]"
+        distance_expression = f"{PgVectorTableSchemesEnums.VECTOR.value} {self.distance_operator} :vector"
+        
+        # order by the raw distance operator ascending so the HNSW index is used
+        search_sql = sql_text(
+            f"SELECT {PgVectorTableSchemesEnums.TEXT.value} as text, "
+            f"{self.get_score_expression(distance_expression)} as score "
+            f"FROM {collection_name} "
+            f"ORDER BY {distance_expression} "
+            f"LIMIT :limit"
+        )
+        
+        records = await self.fetch_search_records(
+            collection_name=collection_name,
+            search_sql=search_sql,
+            search_params={"vector": vector_str, "limit": limit},
+            limit=limit,
+            ef_search=ef_search,
+        )
+        
+        return records if records is not None else False
+
+    async def hybrid_search(self, collection_name: str, text: str, vector: List, limit: int,
+                            ef_search: Optional[int] = None):
+        
+        is_collections_existed = await self.is_collection_existed(collection_name=collection_name)
+        if not is_collections_existed:
+            self.logger.error(f"Cannot search for records in a non-existed collection: {collection_name}")
+            return False
+        
+        vector_str = "[" + ",".join([ str(v) for v in vector ]) + "]"
+        distance_expression = f"{PgVectorTableSchemesEnums.VECTOR.value} {self.distance_operator} :vector"
+        lexical_rank_expression = f"ts_rank_cd({PgVectorTableSchemesEnums.TEXT_SEARCH.value}, query)"
+        
+        # both candidate lists come from their own index, then get fused with
+        # reciprocal-rank fusion: score = sum(1 / (k + rank)) over the lists a row appears in
+        hybrid_sql = sql_text(
+            "WITH semantic AS ("
+                f"SELECT {PgVectorTableSchemesEnums.ID.value} AS id, {PgVectorTableSchemesEnums.TEXT.value} AS text, "
+                f"ROW_NUMBER() OVER (ORDER BY {distance_expression}) AS rank "
+                f"FROM {collection_name} "
+                f"ORDER BY {distance_expression} "
+                "LIMIT :candidates"
+            "), lexical AS ("
+                f"SELECT {PgVectorTableSchemesEnums.ID.value} AS id, {PgVectorTableSchemesEnums.TEXT.value} AS text, "
+                f"ROW_NUMBER() OVER (ORDER BY {lexical_rank_expression} DESC) AS rank "
+                f"FROM {collection_name}, websearch_to_tsquery(CAST(:text_search_config AS regconfig), :query) query "
+                f"WHERE {PgVectorTableSchemesEnums.TEXT_SEARCH.value} @@ query "
+                f"ORDER BY {lexical_rank_expression} DESC "
+                "LIMIT :candidates"
+            ") "
+            "SELECT COALESCE(semantic.text, lexical.text) AS text, "
+            "CAST(COALESCE(1.0 / (:rrf_k + semantic.rank), 0) "
+            "+ COALESCE(1.0 / (:rrf_k + lexical.rank), 0) AS double precision) AS score "
+            "FROM semantic FULL OUTER JOIN lexical ON semantic.id = lexical.id "
+            "ORDER BY score DESC "
+            "LIMIT :limit"
+        )
+        
+        records = await self.fetch_search_records(
+            collection_name=collection_name,
+            search_sql=hybrid_sql,
+            search_params={
+                "vector": vector_str,
+                "query": text,
+                "text_search_config": self.text_search_config,
+                "candidates": max(self.hybrid_candidates, limit),
+                "rrf_k": self.rrf_k,
+                "limit": limit,
+            },
+            limit=max(self.hybrid_candidates, limit),
+            ef_search=ef_search,
+        )
+        
+        return records if records is not None else False
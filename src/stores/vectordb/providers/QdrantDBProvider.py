@@ -1,14 +1,16 @@
 from qdrant_client import models, QdrantClient
 from ..VectorDBInterface import VectorDBInterface
-from ..VectorDBEnums import DistanceMethodEnums
+from ..VectorDBEnums import DistanceMethodEnums, QdrantVectorNamesEnums, VectorRecordMetadataEnums
+from ..LexicalEncoder import LexicalEncoder
 import logging
-from typing import List, Optional
+from typing import List, Optional, Dict
 from models.db_schemes import RetrievedDocument
 
 class QdrantDBProvider(VectorDBInterface):
     
     def __init__(self, db_client: str, default_vector_size: int = 768, 
-                 distance_method: Optional[str] = None, index_threshold: int = 100):
+                 distance_method: Optional[str] = None, index_threshold: int = 100,
+                 hybrid_candidates: int = 50):
         
         self.client = None
         self.db_client = db_client
@@ -22,6 +24,11 @@ class QdrantDBProvider(VectorDBInterface):
             self.distance_method = models.Distance.DOT
     
         self.logger = logging.getLogger("uvicorn")
+        
+        # lexical side of hybrid search: hashed sparse vectors with server-side IDF
+        self.lexical_encoder = LexicalEncoder()
+        self.hybrid_candidates = hybrid_candidates
+        self.lexical_collections = {}
     
     async def connect(self):
         self.client = QdrantClient(path=self.db_client)
@@ -39,16 +46,17 @@ class QdrantDBProvider(VectorDBInterface):
         return self.client.get_collection(collection_name=collection_name)
     
     async def delete_collection(self, collection_name: str):
-        if self.is_collection_existed(collection_name=collection_name):
+        self.lexical_collections.pop(collection_name, None)
+        if await self.is_collection_existed(collection_name=collection_name):
             self.logger.info(f"Deleting collection: {collection_name}")
             return self.client.delete_collection(collection_name=collection_name)
         
     async def create_collection(self, collection_name: str, 
                           embedding_size: int, do_reset: bool = False):
         if do_reset:
-            _ = self.delete_collection(collection_name=collection_name)
+            _ = await self.delete_collection(collection_name=collection_name)
         
-        if not self.is_collection_existed(collection_name=collection_name):
+        if not await self.is_collection_existed(collection_name=collection_name):
             self.logger.info(f"Creating new Qdrant collection: {collection_name}")
             
             _ = self.client.create_collection(
@@ -57,16 +65,41 @@ class QdrantDBProvider(VectorDBInterface):
                     size=embedding_size,
                     distance=self.distance_method,    
                 ),
+                sparse_vectors_config={
+                    QdrantVectorNamesEnums.LEXICAL.value: models.SparseVectorParams(
+                        modifier=models.Modifier.IDF,
+                    ),
+                },
             )
+            self.lexical_collections[collection_name] = True
         
             return True
 
         return False
     
+    def has_lexical_vectors(self, collection_name: str) -> bool:
+        # collections created before hybrid search have no sparse vector config
+        if collection_name not in self.lexical_collections:
+            collection_info = self.client.get_collection(collection_name=collection_name)
+            sparse_vectors = collection_info.config.params.sparse_vectors or {}
+            self.lexical_collections[collection_name] = QdrantVectorNamesEnums.LEXICAL.value in sparse_vectors
+        
+        return self.lexical_collections[collection_name]
+    
+    def create_record_vector(self, collection_name: str, text: str, vector: List):
+        if not self.has_lexical_vectors(collection_name=collection_name):
+            return vector
+        
+        indices, values = self.lexical_encoder.encode_document(text)
+        return {
+            QdrantVectorNamesEnums.DENSE.value: vector,
+            QdrantVectorNamesEnums.LEXICAL.value: models.SparseVector(indices=indices, values=values),
+        }
+    
     async def insert_one(self, collection_name: str, text: str, 
                    vector: List, metadata: Optional[dict] = None, 
                    record_id: Optional[str] = None):
-        if not self.is_collection_existed(collection_name=collection_name):
+        if not await self.is_collection_existed(collection_name=collection_name):
             self.logger.error(f"Can not insert new record to non-existed collection: {collection_name}")
             return False
 
@@ -75,8 +108,8 @@ class QdrantDBProvider(VectorDBInterface):
                 collection_name=collection_name,
                 records=[
                     models.Record(
-                        id=[record_id],
-                        vector=vector,
+                        id=record_id,
+                        vector=self.create_record_vector(collection_name, text, vector),
                         payload={
                             "text": text,
                             "metadata": metadata,
@@ -92,7 +125,8 @@ class QdrantDBProvider(VectorDBInterface):
     
     async def insert_many(self, collection_name: str, texts: List, vectors: List, 
                     metadata: Optional[List] = None, 
-                    record_ids: Optional[List] = None, batch_size: int = 50):
+                    record_ids: Optional[List] = None, batch_size: int = 50,
+                    create_index: bool = True):
         
         if metadata is None:
             metadata = [None] * len(texts)
@@ -111,7 +145,7 @@ class QdrantDBProvider(VectorDBInterface):
             batch_records = [
                 models.Record(
                     id=batch_record_ids[x],
-                    vector=batch_vectors[x],
+                    vector=self.create_record_vector(collection_name, batch_texts[x], batch_vectors[x]),
                     payload={
                         "text": batch_texts[x], "metadata": batch_metadata[x],
                     },
@@ -130,12 +164,81 @@ class QdrantDBProvider(VectorDBInterface):
 
         return True
     
-    async def search_by_vector(self, collection_name: str, vector: List, limit: int):
+    async def create_vector_index(self, collection_name: str) -> bool:
+        # qdrant builds its HNSW graph in the background optimizer
+        return False
+    
+    async def list_record_ids(self, collection_name: str, after_record_id: int = 0,
+                              limit: int = 1000) -> List[int]:
+        if not await self.is_collection_existed(collection_name=collection_name):
+            return []
+        
+        # integer point ids are scrolled in ascending order
+        records, _ = self.client.scroll(
+            collection_name=collection_name,
+            offset=after_record_id + 1,
+            limit=limit,
+            with_payload=False,
+            with_vectors=False,
+        )
+        
+        return [ record.id for record in records ]
+    
+    async def get_record_hashes(self, collection_name: str, record_ids: List) -> Dict[int, Optional[str]]:
+        if not record_ids or not await self.is_collection_existed(collection_name=collection_name):
+            return {}
+        
+        records = self.client.retrieve(
+            collection_name=collection_name,
+            ids=list(record_ids),
+            with_payload=["metadata"],
+            with_vectors=False,
+        )
+        
+        return {
+            record.id: ((record.payload or {}).get("metadata") or {}).get(VectorRecordMetadataEnums.CHUNK_HASH.value)
+            for record in records
+        }
+    
+    async def delete_by_record_ids(self, collection_name: str, record_ids: List) -> bool:
+        if not record_ids or not await self.is_collection_existed(collection_name=collection_name):
+            return False
+        
+        _ = self.client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=list(record_ids)),
+        )
+        
+        return True
+    
+    async def delete_by_asset_ids(self, collection_name: str, asset_ids: List) -> bool:
+        if not asset_ids or not await self.is_collection_existed(collection_name=collection_name):
+            return False
+        
+        _ = self.client.delete(
+            collection_name=collection_name,
+            points_selector=models.FilterSelector(
+                filter=models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key=f"metadata.{VectorRecordMetadataEnums.ASSET_ID.value}",
+                            match=models.MatchAny(any=list(asset_ids)),
+                        )
+                    ]
+                )
+            ),
+        )
+        
+        return True
+    
+    async def search_by_vector(self, collection_name: str, vector: List, limit: int,
+                               ef_search: Optional[int] = None):
         
         results = self.client.search(
             collection_name=collection_name,
             query_vector=vector,
             limit=limit,
+            search_params=models.SearchParams(hnsw_ef=ef_search) if ef_search else None,
         )
 
         if not results or len(results) == 0:
@@ -148,3 +251,45 @@ class QdrantDBProvider(VectorDBInterface):
             })
             for result in results
         ]
+
+    async def hybrid_search(self, collection_name: str, text: str, vector: List, limit: int,
+                            ef_search: Optional[int] = None):
+        
+        if not self.has_lexical_vectors(collection_name=collection_name):
+            self.logger.warning(f"No lexical vectors in collection: {collection_name}, using vector search")
+            return await self.search_by_vector(collection_name=collection_name, vector=vector,
+                                               limit=limit, ef_search=ef_search)
+        
+        candidates = max(self.hybrid_candidates, limit)
+        indices, values = self.lexical_encoder.encode_query(text)
+        
+        # dense and sparse candidates fused with reciprocal-rank fusion in one query
+        results = self.client.query_points(
+            collection_name=collection_name,
+            prefetch=[
+                models.Prefetch(
+                    query=vector,
+                    limit=candidates,
+                    params=models.SearchParams(hnsw_ef=ef_search) if ef_search else None,
+                ),
+                models.Prefetch(
+                    query=models.SparseVector(indices=indices, values=values),
+                    using=QdrantVectorNamesEnums.LEXICAL.value,
+                    limit=candidates,
+                ),
+            ],
+            query=models.FusionQuery(fusion=models.Fusion.RRF),
+            limit=limit,
+            with_payload=True,
+        ).points
+        
+        if not results or len(results) == 0:
+            return None
+        
+        return [
+            RetrievedDocument(**{
+                "score": result.score,
+                "text": result.payload["text"],
+            })
+            for result in results
+        ]
@@ -1,29 +1,32 @@
-from celery_app import celery_app, get_setup_utils
-from models import ProjectModel, ChunkModel, ResponseSignal
+from celery_app import celery_app, get_worker_resources, run_in_worker_loop
+from celery import chord
+from celery.exceptions import Ignore
+from models import ProjectModel, ChunkModel, IndexCheckpointModel, ResponseSignal
 from helpers.config import get_settings
 from controllers import NLPController
-from tqdm.auto import tqdm
+from stores.cache.SemanticAnswerCache import SemanticAnswerCache
+from typing import Optional
 import asyncio
 import logging
 
 logger = logging.getLogger("celery.task")
 
+INDEXING_PROGRESS_TTL = 24 * 60 * 60
+
 @celery_app.task(bind=True, name="tasks.data_indexing.index_data_content",
                  autoretry_for=(Exception,),
                  retry_kwargs={"max_retries": 3, "countdown": 60})
-def index_data_content(self, project_id: int, do_reset: bool):
+def index_data_content(self, project_id: int, do_reset: bool, incremental: bool = False):
     
-    return asyncio.run(
-        _index_data_content(self, project_id, do_reset)
+    return run_in_worker_loop(
+        _index_data_content(self, project_id, do_reset, incremental)
     )
 
-async def _index_data_content(task_instance, project_id: int, do_reset: bool):
-    
-    db_engine, vector_db_client = None, None
+async def _index_data_content(task_instance, project_id: int, do_reset: bool, incremental: bool = False):
     
     try:
-        (db_engine, db_client, llm_provider_factory, vector_db_provider_factory,
-        generation_client, embedding_client, vector_db_client, template_parser) = await get_setup_utils()
+        (db_engine, db_client, redis_client, llm_provider_factory, vector_db_provider_factory,
+        generation_client, embedding_client, vector_db_client, template_parser) = await get_worker_resources()
 
         logger.warning("Setup utils were loaded!")
 
@@ -54,79 +57,441 @@ async def _index_data_content(task_instance, project_id: int, do_reset: bool):
             generation_client=generation_client,
             embedding_client=embedding_client,
             template_parser=template_parser,
+            answer_cache=SemanticAnswerCache(redis_client=redis_client),
+        )
+        
+        # cached answers may cite content this run is about to change
+        _ = await nlp_controller.invalidate_cached_answers(project=project)
+        
+        checkpoint_model = await IndexCheckpointModel.create_instance(
+            db_client=db_client,
         )
         
-        has_records = True
-        page_no = 1
-        inserted_items_counts = 0
-        idx = 0
+        # checkpoints only let retries of this job's ranges resume, what earlier jobs embedded
+        # is recorded per chunk, whatever order the chunks were committed in
+        _ = await checkpoint_model.delete_project_checkpoints(project_id=project.project_id)
         
         # create collection if not existed
         collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
         
-        _ = await vector_db_client.create_collection(
+        is_collection_created = await vector_db_client.create_collection(
             collection_name=collection_name, 
             embedding_size=embedding_client.embedding_size, 
             do_reset=do_reset,
         )
         
-        # setup batching
-        total_chunks_count = await chunk_model.get_total_chunks_count(project_id=project.project_id)
-        pbar = tqdm(total=total_chunks_count, desc="Vector Indexing", position=0)
+        # an empty collection starts a new generation, every chunk has to be embedded again
+        index_generation = project.project_index_generation
+        if do_reset or is_collection_created:
+            index_generation = await project_model.bump_index_generation(project_id=project.project_id)
+        
+        settings = get_settings()
+        
+        # incremental runs first drop the vectors of deleted chunks and assets
+        deleted_items_count = 0
+        if incremental and not do_reset and not vector_db_client.ENFORCES_CHUNK_FOREIGN_KEY:
+            deleted_items_count = await _delete_stale_vectors(
+                nlp_controller=nlp_controller,
+                chunk_model=chunk_model,
+                project=project,
+                page_size=settings.INDEXING_PAGE_SIZE,
+            )
+        
+        # split the project into chunk-id ranges, incremental runs compare every chunk
+        chunk_ranges = await chunk_model.get_project_chunk_ranges(
+            project_id=project.project_id,
+            range_size=settings.INDEXING_RANGE_SIZE,
+            unindexed_generation=None if incremental and not do_reset else index_generation,
+        )
+        total_chunks_count = sum(chunk_range["chunks_count"] for chunk_range in chunk_ranges)
+        
+        if len(chunk_ranges) == 0:
+            return {
+                "signal": ResponseSignal.INSERT_INTO_VECTORDB_SUCCESS.value,
+                "inserted_items_count": 0,
+                "deleted_items_count": deleted_items_count,
+            }
+        
+        parent_task_id = task_instance.request.id
+        task_instance.update_state(
+            state="PROGRESS",
+            meta={
+                "signal": ResponseSignal.DATA_INDEXING_IN_PROGRESS.value,
+                "indexed_items_count": 0,
+                "total_items_count": total_chunks_count,
+                "ranges_count": len(chunk_ranges),
+            }
+        )
         
-        while has_records:
-            page_chunks = await chunk_model.get_project_chunks(
+        # fan out one subtask per range, the callback builds the vector index once at the end
+        chord(
+            index_chunk_range.s(
                 project_id=project.project_id,
-                page_no=page_no,
+                after_chunk_id=chunk_range["after_chunk_id"],
+                until_chunk_id=chunk_range["until_chunk_id"],
+                total_chunks_count=total_chunks_count,
+                parent_task_id=parent_task_id,
+                collection_name=collection_name,
+                index_generation=index_generation,
+                incremental=incremental and not do_reset,
+            )
+            for chunk_range in chunk_ranges
+        )(
+            finalize_data_indexing.s(
+                project_id=project.project_id,
+                parent_task_id=parent_task_id,
+                deleted_items_count=deleted_items_count,
+            )
+        )
+        
+        # keep the PROGRESS state, the chord callback stores the final result of this task
+        raise Ignore()
+        
+    except Ignore:
+        raise
+    except Exception as e:
+        logger.error(f"Task failed: {str(e)}")
+        raise
+
+@celery_app.task(bind=True, name="tasks.data_indexing.index_chunk_range",
+                 autoretry_for=(Exception,),
+                 retry_kwargs={"max_retries": 3, "countdown": 60})
+def index_chunk_range(self, project_id: int, after_chunk_id: int, until_chunk_id: int,
+                      total_chunks_count: int, parent_task_id: str, collection_name: str,
+                      index_generation: int, incremental: bool = False):
+    
+    return run_in_worker_loop(
+        _index_chunk_range(self, project_id, after_chunk_id, until_chunk_id, total_chunks_count,
+                           parent_task_id, collection_name, index_generation, incremental)
+    )
+
+async def _index_chunk_range(task_instance, project_id: int, after_chunk_id: int, until_chunk_id: int,
+                             total_chunks_count: int, parent_task_id: str, collection_name: str,
+                             index_generation: int, incremental: bool = False):
+    
+    (db_engine, db_client, redis_client, llm_provider_factory, vector_db_provider_factory,
+    generation_client, embedding_client, vector_db_client, template_parser) = await get_worker_resources()
+    
+    project_model = await ProjectModel.create_instance(
+        db_client=db_client,
+    )
+    
+    chunk_model = await ChunkModel.create_instance(
+        db_client=db_client,
+    )
+    
+    project = await project_model.get_project_or_create_one(
+        project_id=project_id,
+    )
+    
+    checkpoint_model = await IndexCheckpointModel.create_instance(
+        db_client=db_client,
+    )
+    
+    nlp_controller = NLPController(
+        vector_db_client=vector_db_client,
+        generation_client=generation_client,
+        embedding_client=embedding_client,
+        template_parser=template_parser,
+    )
+    
+    # resume after the last contiguous chunk that a previous attempt of this range committed;
+    # incremental runs then let the hash comparison skip work, others skip embedded chunks
+    last_chunk_id = await checkpoint_model.get_range_checkpoint(
+        project_id=project.project_id,
+        collection_name=collection_name,
+        generation=index_generation,
+        range_start=after_chunk_id,
+        range_end=until_chunk_id,
+    )
+    resume_after_chunk_id = max(after_chunk_id, last_chunk_id or after_chunk_id)
+    if resume_after_chunk_id > after_chunk_id:
+        logger.info(f"Resuming range ({after_chunk_id}, {until_chunk_id}] after chunk {resume_after_chunk_id}")
+    
+    async def on_checkpoint(checkpoint_chunk_id: int):
+        await checkpoint_model.save_checkpoint(
+            project_id=project.project_id,
+            collection_name=collection_name,
+            generation=index_generation,
+            range_start=after_chunk_id,
+            range_end=until_chunk_id,
+            last_chunk_id=checkpoint_chunk_id,
+        )
+    
+    def on_batch_indexed(batch_count: int):
+        indexed_items_count = increment_indexing_progress(parent_task_id, batch_count)
+        if indexed_items_count is None:
+            return
+        
+        task_instance.update_state(
+            task_id=parent_task_id,
+            state="PROGRESS",
+            meta={
+                "signal": ResponseSignal.DATA_INDEXING_IN_PROGRESS.value,
+                "indexed_items_count": indexed_items_count,
+                "total_items_count": total_chunks_count,
+            }
+        )
+    
+    settings = get_settings()
+    try:
+        inserted_items_counts = await _run_indexing_pipeline(
+            nlp_controller=nlp_controller,
+            chunk_model=chunk_model,
+            project=project,
+            page_size=settings.INDEXING_PAGE_SIZE,
+            concurrency=settings.INDEXING_CONCURRENCY,
+            queue_size=settings.INDEXING_QUEUE_SIZE,
+            after_chunk_id=resume_after_chunk_id,
+            until_chunk_id=until_chunk_id,
+            create_index=False,
+            only_changed=incremental,
+            index_generation=index_generation,
+            on_batch_indexed=on_batch_indexed,
+            on_checkpoint=on_checkpoint,
+        )
+    except Exception as e:
+        logger.error(f"Range ({after_chunk_id}, {until_chunk_id}] failed: {str(e)}")
+        
+        # the chord callback never runs once a range gives up, so fail the parent here
+        if task_instance.request.retries >= task_instance.max_retries:
+            task_instance.update_state(
+                task_id=parent_task_id,
+                state="FAILURE",
+                meta={
+                    "signal": ResponseSignal.INSERT_INTO_VECTORDB_ERROR.value,
+                }
             )
+        raise
+    
+    return {
+        "inserted_items_count": inserted_items_counts,
+        "resumed_after_chunk_id": resume_after_chunk_id,
+    }
+
+@celery_app.task(bind=True, name="tasks.data_indexing.finalize_data_indexing",
+                 autoretry_for=(Exception,),
+                 retry_kwargs={"max_retries": 3, "countdown": 60})
+def finalize_data_indexing(self, ranges_results: list, project_id: int, parent_task_id: str,
+                           deleted_items_count: int = 0):
+    
+    return run_in_worker_loop(
+        _finalize_data_indexing(self, ranges_results, project_id, parent_task_id, deleted_items_count)
+    )
+
+async def _finalize_data_indexing(task_instance, ranges_results: list, project_id: int, parent_task_id: str,
+                                  deleted_items_count: int = 0):
+    
+    (db_engine, db_client, redis_client, llm_provider_factory, vector_db_provider_factory,
+    generation_client, embedding_client, vector_db_client, template_parser) = await get_worker_resources()
+    
+    project_model = await ProjectModel.create_instance(
+        db_client=db_client,
+    )
+    
+    project = await project_model.get_project_or_create_one(
+        project_id=project_id,
+    )
+    
+    nlp_controller = NLPController(
+        vector_db_client=vector_db_client,
+        generation_client=generation_client,
+        embedding_client=embedding_client,
+        template_parser=template_parser,
+        answer_cache=SemanticAnswerCache(redis_client=redis_client),
+    )
+    
+    _ = await nlp_controller.create_vector_db_index(project=project)
+    _ = await nlp_controller.invalidate_cached_answers(project=project)
+    
+    inserted_items_counts = sum(result["inserted_items_count"] for result in ranges_results)
+    clear_indexing_progress(parent_task_id)
+    
+    checkpoint_model = await IndexCheckpointModel.create_instance(
+        db_client=db_client,
+    )
+    _ = await checkpoint_model.delete_project_checkpoints(project_id=project.project_id)
+    
+    result = {
+        "signal": ResponseSignal.INSERT_INTO_VECTORDB_SUCCESS.value,
+        "inserted_items_count": inserted_items_counts,
+        "deleted_items_count": deleted_items_count,
+    }
+    
+    task_instance.update_state(
+        task_id=parent_task_id,
+        state="SUCCESS",
+        meta=result,
+    )
+    
+    return result
+
+def get_indexing_progress_key(parent_task_id: str) -> str:
+    return f"minirag:indexing:{parent_task_id}:indexed"
 
-            if not page_chunks or len(page_chunks) == 0:
-                has_records = False
-                break
+def increment_indexing_progress(parent_task_id: str, count: int) -> Optional[int]:
+    """
+    Atomically add to the indexed-chunks counter shared by all ranges of one job.
+    The counter lives next to the task results, so it needs a Redis result backend.
+    """
+    
+    backend_client = getattr(celery_app.backend, "client", None)
+    if backend_client is None:
+        return None
+    
+    key = get_indexing_progress_key(parent_task_id)
+    pipeline = backend_client.pipeline()
+    pipeline.incrby(key, count)
+    pipeline.expire(key, INDEXING_PROGRESS_TTL)
+    indexed_items_count, _ = pipeline.execute()
+    
+    return indexed_items_count
+
+def clear_indexing_progress(parent_task_id: str):
+    backend_client = getattr(celery_app.backend, "client", None)
+    if backend_client is not None:
+        backend_client.delete(get_indexing_progress_key(parent_task_id))
+
+async def _run_indexing_pipeline(nlp_controller: NLPController, chunk_model: ChunkModel, project,
+                                 page_size: int, concurrency: int, queue_size: int,
+                                 after_chunk_id: int = 0, until_chunk_id: Optional[int] = None,
+                                 create_index: bool = True, only_changed: bool = False,
+                                 index_generation: Optional[int] = None,
+                                 on_batch_indexed=None, on_checkpoint=None):
+    """
+    Bounded producer/consumer pipeline: one producer prefetches chunk pages while
+    `concurrency` consumers embed and insert them. At most `queue_size + concurrency`
+    pages are held in memory at any time.
+    With `only_changed`, chunks whose vector already carries the same content hash are skipped.
+    With `index_generation`, only chunks not yet embedded in that generation are read, and
+    every indexed page is marked as embedded in it.
+    Pages finish out of order, so `on_checkpoint` only receives the last chunk id
+    of the longest prefix of pages that are all indexed.
+    """
+    
+    queue = asyncio.Queue(maxsize=queue_size)
+    inserted_items_counts = 0
+    
+    # page number -> last chunk id, for pages indexed ahead of the checkpoint
+    indexed_pages = {}
+    next_checkpoint_page = 0
+    
+    async def produce():
+        page_no = 0
+        async for page_chunks in chunk_model.iter_project_chunks(
+            project_id=project.project_id,
+            page_size=page_size,
+            after_chunk_id=after_chunk_id,
+            until_chunk_id=until_chunk_id,
+            unindexed_generation=None if only_changed else index_generation,
+        ):
+            await queue.put((page_no, page_chunks))
+            page_no += 1
+        
+        for _ in range(concurrency):
+            await queue.put(None)
+    
+    async def advance_checkpoint(page_no: int, last_chunk_id: int):
+        nonlocal next_checkpoint_page
+        
+        indexed_pages[page_no] = last_chunk_id
+        
+        checkpoint_chunk_id = None
+        while next_checkpoint_page in indexed_pages:
+            checkpoint_chunk_id = indexed_pages.pop(next_checkpoint_page)
+            next_checkpoint_page += 1
+        
+        if checkpoint_chunk_id is not None and on_checkpoint:
+            await on_checkpoint(checkpoint_chunk_id)
+    
+    async def consume():
+        nonlocal inserted_items_counts
+        
+        while True:
+            queue_item = await queue.get()
+            if queue_item is None:
+                return
             
-            chunks_ids = [ c.chunk_id for c in page_chunks ]
-            idx += len(page_chunks)
+            page_no, page_chunks = queue_item
             
-            is_inserted = await nlp_controller.index_into_vector_db(
-                project=project,
-                chunks=page_chunks,
-                chunks_ids=chunks_ids,
-            )
+            changed_chunks = page_chunks
+            if only_changed:
+                changed_chunks = await nlp_controller.get_changed_chunks(
+                    project=project,
+                    chunks=page_chunks,
+                )
             
-            if not is_inserted:
-                task_instance.update(
-                    state="FAILURE",
-                    meta={
-                        "signal": ResponseSignal.INSERT_INTO_VECTORDB_ERROR.value,
-                    }
+            if len(changed_chunks) > 0:
+                is_inserted = await nlp_controller.index_into_vector_db(
+                    project=project,
+                    chunks=changed_chunks,
+                    chunks_ids=[ c.chunk_id for c in changed_chunks ],
+                    create_index=create_index,
                 )
                 
-                raise Exception(f"Can not insert into vectorDB | project_id: {project_id}")
+                if not is_inserted:
+                    raise Exception(f"Can not insert into vectorDB | project_id: {project.project_id}")
             
-            page_no += 1
-            pbar.update(len(page_chunks))
-            inserted_items_counts += len(page_chunks)
+            # unchanged chunks already have their vector, they count as embedded too
+            if index_generation is not None:
+                _ = await chunk_model.mark_chunks_indexed(
+                    chunk_ids=[ c.chunk_id for c in page_chunks ],
+                    generation=index_generation,
+                )
+            
+            inserted_items_counts += len(changed_chunks)
+            if on_batch_indexed:
+                on_batch_indexed(len(page_chunks))
+            
+            await advance_checkpoint(page_no, page_chunks[-1].chunk_id)
+    
+    workers = [ asyncio.create_task(produce()) ] + [
+        asyncio.create_task(consume()) for _ in range(concurrency)
+    ]
+    
+    try:
+        await asyncio.gather(*workers)
+    except Exception:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+    
+    return inserted_items_counts
+
+async def _delete_stale_vectors(nlp_controller: NLPController, chunk_model: ChunkModel, project,
+                                page_size: int) -> int:
+    """
+    Walk the collection ids in pages and bulk-delete the vectors whose chunk
+    no longer exists, which also covers every chunk of a deleted asset.
+    Only needed for Qdrant: PGVector collections reference the chunks table, so
+    a chunk can not be deleted before its vector.
+    """
+    
+    deleted_items_count = 0
+    after_record_id = 0
+    while True:
+        record_ids = await nlp_controller.list_vector_db_record_ids(
+            project=project,
+            after_record_id=after_record_id,
+            limit=page_size,
+        )
+        if len(record_ids) == 0:
+            break
         
-        task_instance.update_state(
-            state="SUCCESS",
-            meta={
-                "signal": ResponseSignal.INSERT_INTO_VECTORDB_SUCCESS.value,
-            }
+        existing_ids = await chunk_model.get_existing_chunk_ids(
+            project_id=project.project_id,
+            chunk_ids=record_ids,
         )
+        stale_ids = [ record_id for record_id in record_ids if record_id not in existing_ids ]
         
-        return {
-            "signal": ResponseSignal.INSERT_INTO_VECTORDB_SUCCESS.value,
-            "inserted_items_count": inserted_items_counts,
-        }
+        if len(stale_ids) > 0:
+            _ = await nlp_controller.delete_vector_db_records(project=project, record_ids=stale_ids)
+            deleted_items_count += len(stale_ids)
         
-    except Exception as e:
-        logger.error(f"Task failed: {str(e)}")
-    finally:
-        try:
-            if db_engine:
-                await db_engine.dispose()
-            
-            if vector_db_client:
-                await vector_db_client.disconnect()
-        except Exception as e:
-            logger.error(f"Task failed while cleaning: {str(e)}")
+        if len(record_ids) < page_size:
+            break
+        
+        after_record_id = record_ids[-1]
+    
+    return deleted_items_count
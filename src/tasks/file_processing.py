@@ -1,11 +1,20 @@
-from celery_app import celery_app, get_setup_utils
+from celery_app import (celery_app, get_worker_resources, run_in_worker_loop,
+                        get_worker_process_pool, get_worker_process_pool_size,
+                        get_worker_process_manager, reset_worker_process_pool)
 from helpers.config import get_settings
-from models import (ResponseSignal, AssetTypeEnums, 
+from models import (ResponseSignal, AssetTypeEnums, ChunkSizeUnitEnums,
                     ProjectModel, ChunkModel, AssetModel)
 from models.db_schemes import DataChunk, Asset
 from controllers import NLPController, ProcessController
-import logging
+from controllers.ProcessController import stream_file_chunks
+from utils.chunk_deduplicator import ChunkDeduplicator
+from stores.cache.SemanticAnswerCache import SemanticAnswerCache
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import aclosing
+from typing import Optional
 import asyncio
+import queue
+import logging
 
 logger = logging.getLogger("celery.task")
 
@@ -13,20 +22,20 @@ logger = logging.getLogger("celery.task")
                  autoretry_for=(Exception,),
                  retry_kwargs={"max_retries": 3, "countdown": 60})
 def process_project_files(self, project_id: int, file_id: str, chunk_size: int, 
-                          overlap_size: int, do_reset: int):
-    return asyncio.run(
+                          overlap_size: int, do_reset: int,
+                          chunk_size_unit: str = ChunkSizeUnitEnums.CHAR.value):
+    return run_in_worker_loop(
         _process_project_files(self, project_id, file_id,
-                               chunk_size, overlap_size, do_reset)
+                               chunk_size, overlap_size, do_reset, chunk_size_unit)
     )
 
 async def _process_project_files(task_instance, project_id: int, file_id: str, chunk_size: int, 
-                                    overlap_size: int, do_reset: int):
+                                    overlap_size: int, do_reset: int,
+                                    chunk_size_unit: str = ChunkSizeUnitEnums.CHAR.value):
 
-    db_engine, vector_db_client = None, None
-    
     try:
-        (db_engine, db_client, llm_provider_factory, vector_db_provider_factory,
-        generation_client, embedding_client, vector_db_client, template_parser) = await get_setup_utils()
+        (db_engine, db_client, redis_client, llm_provider_factory, vector_db_provider_factory,
+        generation_client, embedding_client, vector_db_client, template_parser) = await get_worker_resources()
         
         project_model = await ProjectModel.create_instance(
             db_client=db_client
@@ -41,6 +50,7 @@ async def _process_project_files(task_instance, project_id: int, file_id: str, c
             generation_client=generation_client,
             embedding_client=embedding_client,
             template_parser=template_parser,
+            answer_cache=SemanticAnswerCache(redis_client=redis_client),
         )
         
         chunk_model = await ChunkModel.create_instance(
@@ -53,7 +63,7 @@ async def _process_project_files(task_instance, project_id: int, file_id: str, c
         
         process_controller = ProcessController(project_id=project_id)
 
-        project_files_ids = {}
+        project_files = []
         if file_id:
             
             asset_record = await asset_model.get_asset_record(
@@ -71,9 +81,7 @@ async def _process_project_files(task_instance, project_id: int, file_id: str, c
                 
                 raise Exception(f"No assets for file: {file_id}")
             
-            project_files_ids = {
-                asset_record.asset_id : asset_record.asset_name
-            }
+            project_files = [ asset_record ]
         
         else:
             
@@ -81,13 +89,8 @@ async def _process_project_files(task_instance, project_id: int, file_id: str, c
                 asset_project_id=project.project_id,
                 asset_type=AssetTypeEnums.FILE.value
             )
-            
-            project_files_ids = {
-                record.asset_id: record.asset_name
-                for record in project_files
-            }
         
-        if len(project_files_ids) == 0:
+        if len(project_files) == 0:
             task_instance.update_state(
                 state="FAILURE",
                 meta={
@@ -104,42 +107,133 @@ async def _process_project_files(task_instance, project_id: int, file_id: str, c
             
             _ = await chunk_model.delete_chunks_by_project_id(project_id=project.project_id)
         
-        no_records = 0
-        no_files = 0
-        for asset_id, file_id in project_files_ids.items():
-                    
-            file_content = process_controller.get_file_content(file_id=file_id)
-            
-            if file_content is None:
-                logger.error(f"Error while processing file: {file_id}")
-                continue
+        # token chunks are sized with the tokenizer prompts are counted with
+        tokenizer_name = None
+        if chunk_size_unit == ChunkSizeUnitEnums.TOKEN.value:
+            tokenizer_name = generation_client.get_tokenizer_name()
+        
+        # skip assets whose file and chunking parameters match the last run
+        changed_files = []
+        no_skipped_files = 0
+        for asset_record in project_files:
             
-            file_chunks = process_controller.process_file_content(
-                file_content=file_content,
-                file_id=file_id,
+            file_hash = asset_record.asset_hash or process_controller.get_file_hash(file_id=asset_record.asset_name)
+            processing_signature = process_controller.get_processing_signature(
+                file_hash=file_hash,
                 chunk_size=chunk_size,
-                overlap_size=overlap_size
+                overlap_size=overlap_size,
+                chunk_size_unit=chunk_size_unit,
+                tokenizer_name=tokenizer_name,
             )
             
-            if file_chunks is None or len(file_chunks) == 0:
-                logger.error(f"No chunks for file_id: {file_id}")
+            asset_config = asset_record.asset_config or {}
+            if do_reset != 1 and asset_config.get("processing_signature") == processing_signature:
+                no_skipped_files += 1
                 continue
             
-            file_chunks_record = [
-                DataChunk(
-                    chunk_text=chunk.page_content,
-                    chunk_metadata=chunk.metadata,
-                    chunk_order=i + 1,
-                    chunk_project_id=project.project_id,
-                    chunk_asset_id=asset_id
+            changed_files.append((asset_record, file_hash, processing_signature))
+        
+        # a reset or a replaced asset removes vectors that cached answers may cite
+        if do_reset == 1 or len(changed_files) > 0:
+            _ = await nlp_controller.invalidate_cached_answers(project=project)
+        
+        dedup_options, chunk_deduplicator = await _load_chunk_deduplicator(
+            chunk_model=chunk_model,
+            project_id=project.project_id,
+            changed_files=changed_files,
+            do_reset=do_reset,
+        )
+        
+        no_records = 0
+        no_files = 0
+        no_duplicate_chunks = 0
+        no_promoted_chunks = 0
+        no_duplicate_characters = 0
+        no_total_characters = 0
+        files_chunks_counts = {}
+        # close the stream as soon as the writer fails, so the parsers are cancelled and the
+        # queue drained before the task retries, not whenever the loop finalizes the generator
+        streamed_chunks = _iter_streamed_chunks(
+            project_id=project.project_id,
+            changed_files=changed_files,
+            chunk_size=chunk_size,
+            overlap_size=overlap_size,
+            chunk_size_unit=chunk_size_unit,
+            dedup_options=dedup_options,
+            tokenizer_name=tokenizer_name,
+        )
+        async with aclosing(streamed_chunks):
+            async for message_type, (asset_record, file_hash, processing_signature), payload in streamed_chunks:
+                
+                asset_id, file_id = asset_record.asset_id, asset_record.asset_name
+                
+                if message_type == "chunks":
+                    
+                    # replace the previous chunks of the asset, vectors first since they reference the chunks
+                    if asset_id not in files_chunks_counts:
+                        files_chunks_counts[asset_id] = 0
+                        if do_reset != 1:
+                            _ = await nlp_controller.delete_vector_db_assets(project=project, asset_ids=[asset_id])
+                            _, promoted_ids = await chunk_model.delete_chunks_by_asset_id(asset_id=asset_id)
+                            no_promoted_chunks += len(promoted_ids)
+                    
+                    chunks_offset = files_chunks_counts[asset_id]
+                    file_chunks_record = [
+                        {
+                            "chunk_text": chunk["chunk_text"],
+                            "chunk_metadata": chunk["chunk_metadata"],
+                            "chunk_order": chunks_offset + i + 1,
+                            "chunk_project_id": project.project_id,
+                            "chunk_asset_id": asset_id,
+                            "chunk_text_hash": chunk.get("chunk_text_hash"),
+                            "chunk_minhash": chunk.get("chunk_minhash"),
+                        }
+                        for i, chunk in enumerate(payload)
+                    ]
+                    no_total_characters += sum(len(chunk["chunk_text"]) for chunk in file_chunks_record)
+                    
+                    if chunk_deduplicator is not None:
+                        chunks_ids = await chunk_model.reserve_chunk_ids(count=len(file_chunks_record))
+                        for chunk_id, chunk in zip(chunks_ids, file_chunks_record):
+                            chunk["chunk_id"] = chunk_id
+                        
+                        duplicate_chunks = _deduplicate_chunks(chunk_deduplicator, file_chunks_record)
+                        no_duplicate_chunks += len(duplicate_chunks)
+                        no_duplicate_characters += sum(len(chunk["chunk_text"]) for chunk in duplicate_chunks)
+                    
+                    chunks_ids = await chunk_model.bulk_insert_chunks(chunks=file_chunks_record)
+                    files_chunks_counts[asset_id] += len(chunks_ids)
+                    no_records += len(chunks_ids)
+                    continue
+                
+                # the file is done, payload holds its error if any
+                if payload is not None:
+                    logger.error(f"Error while processing file: {file_id}: {payload}")
+                    continue
+                
+                if files_chunks_counts.get(asset_id, 0) == 0:
+                    logger.error(f"No chunks for file_id: {file_id}")
+                    continue
+                
+                no_files += 1
+                _ = await asset_model.update_asset_processing(
+                    asset_id=asset_id,
+                    asset_hash=file_hash,
+                    asset_config={
+                        **(asset_record.asset_config or {}),
+                        "processing_signature": processing_signature,
+                    },
                 )
-                for i, chunk in enumerate(file_chunks)
-            ]
-            
-            no_records += await chunk_model.insert_many_chunks(chunks=file_chunks_record)
-            no_files += 1
-            
-            
+                
+        # duplicates of replaced chunks took over their content, the next push embeds them
+        if no_promoted_chunks > 0:
+            logger.info(f"Promoted {no_promoted_chunks} duplicate chunks to originals "
+                        f"for project_id: {project.project_id}")
+        
+        if no_duplicate_chunks > 0:
+            logger.info(f"Collapsed {no_duplicate_chunks} duplicate chunks ({no_duplicate_characters} characters) "
+                        f"for project_id: {project.project_id}")
+        
         task_instance.update_state(
             state="SUCCESS",
             meta={
@@ -149,18 +243,152 @@ async def _process_project_files(task_instance, project_id: int, file_id: str, c
         return {
             "signal": ResponseSignal.PROCESSING_SUCCESS.value,
             "inserted_chunks": no_records,
-            "processed_files": no_files
+            "processed_files": no_files,
+            "skipped_files": no_skipped_files,
+            "duplicate_chunks": no_duplicate_chunks,
+            "promoted_chunks": no_promoted_chunks,
+            "embedding_characters_saved": no_duplicate_characters,
+            "embedding_volume_saved": round(no_duplicate_characters / no_total_characters, 4) if no_total_characters else 0.0,
         }
     
     except Exception as e:
         logger.error(f"Task failed: {str(e)}")
         raise
-    finally:
+
+async def _load_chunk_deduplicator(chunk_model: ChunkModel, project_id: int, changed_files: list, do_reset: int):
+    """
+    Build the deduplication index of a processing run from the project's original chunks,
+    leaving out the assets about to be replaced. Returns (dedup_options, deduplicator),
+    both None when deduplication is disabled.
+    """
+    
+    settings = get_settings()
+    if not settings.CHUNK_DEDUP_ENABLED:
+        return None, None
+    
+    dedup_options = {
+        "threshold": settings.CHUNK_DEDUP_THRESHOLD,
+        "num_perm": settings.CHUNK_DEDUP_NUM_PERM,
+        "bands": settings.CHUNK_DEDUP_BANDS,
+    }
+    chunk_deduplicator = ChunkDeduplicator(**dedup_options)
+    
+    if do_reset == 1:
+        return dedup_options, chunk_deduplicator
+    
+    async for page_chunks in chunk_model.iter_project_chunk_signatures(
+        project_id=project_id,
+        exclude_asset_ids=[ asset_record.asset_id for asset_record, _, _ in changed_files ],
+    ):
+        for record in page_chunks:
+            signature = None
+            if record.chunk_minhash is not None:
+                signature = chunk_deduplicator.signature_from_bytes(record.chunk_minhash)
+            chunk_deduplicator.add(record.chunk_id, record.chunk_text_hash, signature)
+    
+    return dedup_options, chunk_deduplicator
+
+def _deduplicate_chunks(chunk_deduplicator: ChunkDeduplicator, chunks: list) -> list:
+    """
+    Point every chunk that repeats already seen content at the original chunk id and
+    register the rest as originals. Duplicates are still stored, as back-references to
+    their own asset and page, but never embedded. Returns the duplicate chunks.
+    """
+    
+    duplicate_chunks = []
+    for chunk in chunks:
+        if chunk.get("chunk_text_hash") is None or chunk.get("chunk_minhash") is None:
+            continue
+        
+        signature = chunk_deduplicator.signature_from_bytes(chunk["chunk_minhash"])
+        duplicate_of_id = chunk_deduplicator.find_duplicate(chunk["chunk_text_hash"], signature)
+        
+        if duplicate_of_id is None:
+            chunk_deduplicator.add(chunk["chunk_id"], chunk["chunk_text_hash"], signature)
+            continue
+        
+        chunk["chunk_duplicate_of_id"] = duplicate_of_id
+        duplicate_chunks.append(chunk)
+    
+    return duplicate_chunks
+
+async def _iter_streamed_chunks(project_id: int, changed_files: list, chunk_size: int, overlap_size: int,
+                                chunk_size_unit: str = ChunkSizeUnitEnums.CHAR.value,
+                                dedup_options: dict = None, tokenizer_name: Optional[str] = None):
+    """
+    Parse files on the worker process pool and yield ("chunks", file, batch) messages as
+    the parsers produce them, then ("done", file, error) once a file is finished.
+    Batches travel through a bounded queue, so memory stays flat no matter the file sizes.
+    """
+    
+    settings = get_settings()
+    loop = asyncio.get_running_loop()
+    process_pool = get_worker_process_pool()
+    process_manager = get_worker_process_manager()
+    
+    chunks_queue = process_manager.Queue(maxsize=settings.FILE_PROCESSING_QUEUE_SIZE)
+    cancel_event = process_manager.Event()
+    max_in_flight = get_worker_process_pool_size()
+    
+    pending_files = enumerate(changed_files)
+    in_flight = {}
+    
+    def submit_next() -> bool:
+        file_key, changed_file = next(pending_files, (None, None))
+        if changed_file is None:
+            return False
+        
+        future = process_pool.submit(stream_file_chunks, project_id, changed_file[0].asset_name,
+                                     chunk_size, overlap_size, chunk_size_unit, file_key, chunks_queue,
+                                     settings.FILE_PROCESSING_BATCH_SIZE, cancel_event, dedup_options,
+                                     tokenizer_name)
+        in_flight[file_key] = (changed_file, future)
+        return True
+    
+    def get_message():
         try:
-            if db_engine:
-                await db_engine.dispose()
+            return chunks_queue.get(timeout=1)
+        except queue.Empty:
+            return None
+    
+    def drain_queue():
+        # unblock parsers stuck on a full queue so they can see the cancel event and exit
+        while any(not future.done() for _, future in in_flight.values()):
+            get_message()
+    
+    while len(in_flight) < max_in_flight and submit_next():
+        pass
+    
+    try:
+        while in_flight:
+            message = await loop.run_in_executor(None, get_message)
+            
+            if message is None:
+                # a parser that crashed never reports done
+                for file_key, (changed_file, future) in list(in_flight.items()):
+                    if not future.done() or future.exception() is None:
+                        continue
+                    
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        reset_worker_process_pool()
+                        raise future.exception()
+                    
+                    in_flight.pop(file_key)
+                    submit_next()
+                    yield "done", changed_file, str(future.exception())
+                continue
+            
+            message_type, file_key, payload = message
+            changed_file = in_flight[file_key][0]
             
-            if vector_db_client:
-                await vector_db_client.disconnect()
-        except Exception as e:
-            logger.error(f"Task failed while cleaning: {str(e)}")
+            if message_type == "done":
+                in_flight.pop(file_key)
+                submit_next()
+            
+            yield message_type, changed_file, payload
+    finally:
+        if in_flight:
+            cancel_event.set()
+            for _, future in in_flight.values():
+                future.cancel()
+            await loop.run_in_executor(None, drain_queue)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the application modules are imported from src, like uvicorn and celery do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,98 @@
+"""
+ChunkModel tests against a real Postgres database, set TEST_POSTGRES_URL
+(postgresql+asyncpg://...) to a scratch database to run them.
+"""
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from models import ChunkModel
+from models.db_schemes import Project, Asset, DataChunk
+from models.db_schemes.minirag.schemes.minirag_base import SQLAlchemyBase
+import asyncio
+import pytest
+import os
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+async def create_db_client():
+    db_engine = create_async_engine(url=TEST_POSTGRES_URL)
+    async with db_engine.begin() as connection:
+        await connection.run_sync(SQLAlchemyBase.metadata.drop_all)
+        await connection.run_sync(SQLAlchemyBase.metadata.create_all)
+    
+    return db_engine, async_sessionmaker(bind=db_engine, class_=AsyncSession, expire_on_commit=False)
+
+async def reprocess_asset_with_duplicate_in_other_asset():
+    db_engine, db_client = await create_db_client()
+    try:
+        async with db_client() as session:
+            async with session.begin():
+                project = Project()
+                session.add(project)
+                await session.flush()
+                
+                replaced_asset = Asset(asset_project_id=project.project_id, asset_type="file",
+                                       asset_name="replaced.txt", asset_size=1)
+                other_asset = Asset(asset_project_id=project.project_id, asset_type="file",
+                                    asset_name="other.txt", asset_size=1)
+                session.add_all([ replaced_asset, other_asset ])
+                await session.flush()
+                
+                # the original was embedded, its duplicates in the other asset never were
+                original = DataChunk(chunk_text="shared text", chunk_metadata={}, chunk_order=1,
+                                     chunk_project_id=project.project_id, chunk_asset_id=replaced_asset.asset_id,
+                                     chunk_indexed_generation=0)
+                session.add(original)
+                await session.flush()
+                
+                duplicates = [
+                    DataChunk(chunk_text="shared text", chunk_metadata={}, chunk_order=order,
+                              chunk_project_id=project.project_id, chunk_asset_id=other_asset.asset_id,
+                              chunk_duplicate_of_id=original.chunk_id)
+                    for order in (1, 2)
+                ]
+                session.add_all(duplicates)
+                
+                # indexed after the duplicates were stored, its id is above theirs
+                newer = DataChunk(chunk_text="newer text", chunk_metadata={}, chunk_order=3,
+                                  chunk_project_id=project.project_id, chunk_asset_id=other_asset.asset_id,
+                                  chunk_indexed_generation=0)
+                session.add(newer)
+                await session.flush()
+                
+                project_id = project.project_id
+                replaced_asset_id = replaced_asset.asset_id
+                duplicate_ids = [ duplicate.chunk_id for duplicate in duplicates ]
+        
+        chunk_model = await ChunkModel.create_instance(db_client=db_client)
+        
+        deleted_count, promoted_ids = await chunk_model.delete_chunks_by_asset_id(asset_id=replaced_asset_id)
+        
+        unindexed_ids = [
+            record.chunk_id
+            async for page_chunks in chunk_model.iter_project_chunks(project_id=project_id, unindexed_generation=0)
+            for record in page_chunks
+        ]
+        chunk_ranges = await chunk_model.get_project_chunk_ranges(project_id=project_id, unindexed_generation=0)
+        second_duplicate = await chunk_model.get_chunk(chunk_id=duplicate_ids[1])
+        
+        return deleted_count, promoted_ids, duplicate_ids, unindexed_ids, chunk_ranges, second_duplicate
+    finally:
+        async with db_engine.begin() as connection:
+            await connection.run_sync(SQLAlchemyBase.metadata.drop_all)
+        await db_engine.dispose()
+
+def test_reprocessed_asset_promotes_duplicate_of_other_asset_for_embedding():
+    (deleted_count, promoted_ids, duplicate_ids, unindexed_ids,
+     chunk_ranges, second_duplicate) = asyncio.run(reprocess_asset_with_duplicate_in_other_asset())
+    
+    assert deleted_count == 1
+    
+    # the oldest duplicate takes over the content, the other one points to it
+    assert promoted_ids == [ duplicate_ids[0] ]
+    assert second_duplicate.chunk_duplicate_of_id == duplicate_ids[0]
+    
+    # the next push embeds the promoted chunk, although newer chunks are already indexed
+    assert unindexed_ids == [ duplicate_ids[0] ]
+    assert sum(chunk_range["chunks_count"] for chunk_range in chunk_ranges) == 1
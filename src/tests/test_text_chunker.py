@@ -0,0 +1,58 @@
+from utils.text_chunker import TextChunker
+import pytest
+
+LINES_TEXT = "\n".join([
+    "total revenue grew in the quarter",
+    "operating expenses were flat",
+    "quarterly margin improved slightly",
+    "operating income reached a record",
+    "cash flow from operating activities",
+] * 4)
+
+def assert_whole_words(chunks, text):
+    words = set(text.split())
+    for chunk, _ in chunks:
+        assert chunk.split()[0] in words, chunk
+        assert chunk.split()[-1] in words, chunk
+
+def test_char_chunks_respect_size():
+    chunks = TextChunker(chunk_size=60, overlap_size=15).chunk_text(LINES_TEXT)
+    
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 60 for chunk, _ in chunks)
+
+@pytest.mark.parametrize("chunk_size, overlap_size", [ (60, 15), (40, 10), (25, 20) ])
+def test_overlap_starts_on_a_line_break(chunk_size, overlap_size):
+    chunks = TextChunker(chunk_size=chunk_size, overlap_size=overlap_size).chunk_text(LINES_TEXT)
+    
+    assert_whole_words(chunks, LINES_TEXT)
+
+@pytest.mark.parametrize("chunk_size, overlap_size", [ (7, 4), (9, 8), (8, 3) ])
+def test_overlap_without_whitespace_is_skipped(chunk_size, overlap_size):
+    chunks = TextChunker(chunk_size=chunk_size, overlap_size=overlap_size).chunk_text("hello world")
+    
+    assert [ chunk for chunk, _ in chunks ] == [ "hello", "world" ]
+
+def test_overlap_repeats_whole_words():
+    text = "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+    chunks = TextChunker(chunk_size=24, overlap_size=12).chunk_text(text)
+    
+    assert_whole_words(chunks, text)
+    for (left, _), (right, _) in zip(chunks, chunks[1:]):
+        assert left.split()[-1] in right.split()
+
+def test_chunks_keep_page_metadata():
+    pages = [ ("first page " * 10, {"page": 1}), ("second page " * 10, {"page": 2}) ]
+    chunks = list(TextChunker(chunk_size=50, overlap_size=10).iter_chunks(pages))
+    
+    assert chunks[0][1] == {"page": 1}
+    assert chunks[-1][1]["page"] == 2
+    assert any(metadata.get("end_page") == 2 for _, metadata in chunks)
+
+def test_token_chunks_without_tokenizer():
+    text = " ".join(f"word{i}" for i in range(100))
+    chunks = TextChunker(chunk_size=10, overlap_size=2, size_unit="token").chunk_text(text)
+    
+    assert all(len(chunk.split()) <= 10 for chunk, _ in chunks)
+    assert chunks[0][0].split()[-2:] == chunks[1][0].split()[:2]
+    assert chunks[-1][0].split()[-1] == "word99"
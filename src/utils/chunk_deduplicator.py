@@ -0,0 +1,108 @@
+from typing import Dict, List, Optional
+import numpy as np
+import hashlib
+import re
+import zlib
+
+class ChunkDeduplicator:
+    """
+    In-memory exact and near-duplicate index over the chunks of one project.
+    Exact duplicates are found by the hash of the normalized text, near duplicates by
+    MinHash signatures of word shingles bucketed with LSH bands, then confirmed by the
+    estimated Jaccard similarity. Hashes and signatures are deterministic, so they can be
+    stored with the chunks and loaded back on the next run.
+    """
+
+    WORD_PATTERN = re.compile(r"\w+")
+    SIGNATURE_DTYPE = np.uint32
+    HASH_SEED = 1
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, bands: int = 8, shingle_size: int = 3):
+
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # multiply-shift hash family, fixed seed so signatures are stable across processes
+        random_state = np.random.RandomState(self.HASH_SEED)
+        self.hash_a = random_state.randint(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.hash_b = random_state.randint(0, 2**63, size=num_perm, dtype=np.uint64)
+
+        self.exact_index: Dict[str, int] = {}
+        self.band_index: List[Dict[bytes, List[int]]] = [ {} for _ in range(bands) ]
+        self.signatures: Dict[int, np.ndarray] = {}
+
+    def normalize_text(self, text: str) -> str:
+        return " ".join(self.WORD_PATTERN.findall(text.lower()))
+
+    def get_text_hash(self, text: str) -> str:
+        return hashlib.md5(self.normalize_text(text).encode("utf-8")).hexdigest()
+
+    def get_signature(self, text: str) -> np.ndarray:
+        words = self.WORD_PATTERN.findall(text.lower())
+        if len(words) >= self.shingle_size:
+            shingles = {
+                " ".join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)
+            }
+        else:
+            shingles = { " ".join(words) }
+
+        shingle_hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+
+        # (a * x + b) mod 2^64, keeping the high 32 bits
+        hashes = (shingle_hashes[:, None] * self.hash_a[None, :] + self.hash_b[None, :]) >> np.uint64(32)
+        return hashes.min(axis=0).astype(self.SIGNATURE_DTYPE)
+
+    def signature_to_bytes(self, signature: np.ndarray) -> bytes:
+        return signature.astype(self.SIGNATURE_DTYPE).tobytes()
+
+    def signature_from_bytes(self, data: bytes) -> np.ndarray:
+        return np.frombuffer(data, dtype=self.SIGNATURE_DTYPE)
+
+    def get_band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def add(self, chunk_id: int, text_hash: str, signature: Optional[np.ndarray]):
+        self.exact_index.setdefault(text_hash, chunk_id)
+
+        if signature is None or len(signature) != self.num_perm:
+            return
+
+        self.signatures[chunk_id] = signature
+        for band, band_key in enumerate(self.get_band_keys(signature)):
+            self.band_index[band].setdefault(band_key, []).append(chunk_id)
+
+    def find_duplicate(self, text_hash: str, signature: np.ndarray) -> Optional[int]:
+        """
+        Return the chunk id this chunk duplicates, or None when it is new content.
+        """
+
+        chunk_id = self.exact_index.get(text_hash)
+        if chunk_id is not None:
+            return chunk_id
+
+        checked_ids = set()
+        for band, band_key in enumerate(self.get_band_keys(signature)):
+            for candidate_id in self.band_index[band].get(band_key, []):
+                if candidate_id in checked_ids:
+                    continue
+                checked_ids.add(candidate_id)
+
+                similarity = np.count_nonzero(self.signatures[candidate_id] == signature) / self.num_perm
+                if similarity >= self.threshold:
+                    return candidate_id
+
+        return None
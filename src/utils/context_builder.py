@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+import hashlib
+
+class ContextBuilder:
+    """
+    Packs retrieved documents into a token budget for the RAG prompt.
+    Documents are taken by descending score; text already present in a picked document
+    (an exact repeat, a contained chunk, or the overlap between consecutive chunks) is
+    dropped, then documents are added greedily while they fit. Token counts come from
+    the generation model's tokenizer and are cached per chunk text.
+    """
+
+    def __init__(self, count_tokens: Callable[[str], int], token_budget: int = 3000,
+                 min_overlap_size: int = 32, min_document_tokens: int = 32, cache_size: int = 10000):
+        self.count_tokens = count_tokens
+        self.token_budget = token_budget
+        self.min_overlap_size = min_overlap_size
+        self.min_document_tokens = min_document_tokens
+        self.cache_size = cache_size
+
+        self.token_counts = OrderedDict()
+
+    def get_token_count(self, text: str) -> int:
+        key = hashlib.md5(text.encode("utf-8")).digest()
+
+        count = self.token_counts.get(key)
+        if count is not None:
+            self.token_counts.move_to_end(key)
+            return count
+
+        count = self.count_tokens(text)
+        self.token_counts[key] = count
+        while len(self.token_counts) > self.cache_size:
+            self.token_counts.popitem(last=False)
+
+        return count
+
+    def find_overlap(self, left: str, right: str) -> int:
+        # length of the longest suffix of `left` that starts `right`
+        probe = right[:self.min_overlap_size]
+        if len(probe) < self.min_overlap_size:
+            return 0
+
+        position = left.rfind(probe)
+        while position != -1:
+            if right.startswith(left[position:]):
+                return len(left) - position
+            position = left.rfind(probe, 0, position)
+
+        return 0
+
+    def remove_known_text(self, text: str, picked_texts: List[str]) -> str:
+        for picked_text in picked_texts:
+            if text in picked_text:
+                return ""
+
+            overlap = self.find_overlap(picked_text, text)
+            if overlap:
+                text = text[overlap:]
+
+            overlap = self.find_overlap(text, picked_text)
+            if overlap:
+                text = text[:-overlap]
+
+        return text.strip()
+
+    def truncate_to_budget(self, text: str, token_budget: int) -> str:
+        # scale by the token density of the text, then trim until it fits
+        token_count = self.get_token_count(text)
+        while token_count > token_budget and text:
+            text = text[:max(0, int(len(text) * token_budget / token_count) - 1)]
+            token_count = self.count_tokens(text)
+
+        return text.strip()
+
+    def pack(self, documents: list, token_budget: Optional[int] = None,
+             document_overhead_tokens: int = 0) -> List[Tuple[object, str]]:
+        """
+        Return (document, text) pairs to put in the prompt, highest score first.
+        `document_overhead_tokens` is what the prompt template adds around every document.
+        """
+
+        token_budget = token_budget if token_budget is not None else self.token_budget
+        remaining_tokens = token_budget
+
+        packed, picked_texts = [], []
+        for document in sorted(documents, key=lambda doc: doc.score, reverse=True):
+            text = self.remove_known_text(document.text.strip(), picked_texts)
+            if not text:
+                continue
+
+            cost = self.get_token_count(text) + document_overhead_tokens
+            if cost > remaining_tokens:
+                # always keep some of the best document, skip the others that do not fit
+                if packed or remaining_tokens - document_overhead_tokens < self.min_document_tokens:
+                    continue
+
+                text = self.truncate_to_budget(text, remaining_tokens - document_overhead_tokens)
+                if not text:
+                    continue
+                cost = self.get_token_count(text) + document_overhead_tokens
+
+            packed.append((document, text))
+            picked_texts.append(text)
+            remaining_tokens -= cost
+
+        return packed
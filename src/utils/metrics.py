@@ -1,7 +1,10 @@
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-from fastapi import FastAPI, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from typing import Callable, Awaitable
+from prometheus_client import Counter, Histogram, generate_latest, start_http_server, CONTENT_TYPE_LATEST
+from fastapi import FastAPI, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import event
+from contextlib import contextmanager
+from typing import AsyncIterator
+import logging
 import time
 
 # Define metrics
@@ -16,20 +19,126 @@ REQUEST_LATENCY = Histogram(
     labelnames=["method", "endpoint"],
 )
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
-        
-        start_time = time.time()
-        
-        response = await call_next(request)
+EMBEDDING_CACHE_HITS = Counter(
+    name="embedding_cache_hits_total",
+    documentation="Embedding cache hits",
+    labelnames=["tier"],
+)
+EMBEDDING_CACHE_MISSES = Counter(
+    name="embedding_cache_misses_total",
+    documentation="Embedding cache misses sent to the provider",
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    name="embedding_batch_size",
+    documentation="Texts per micro-batched query embedding call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+ANSWER_CACHE_HITS = Counter(
+    name="answer_cache_hits_total",
+    documentation="RAG answers served from the semantic answer cache",
+)
+ANSWER_CACHE_MISSES = Counter(
+    name="answer_cache_misses_total",
+    documentation="RAG answer cache lookups without a similar enough query",
+)
+
+SINGLE_FLIGHT_COALESCED = Counter(
+    name="single_flight_coalesced_total",
+    documentation="Requests served by an identical in-flight request",
+    labelnames=["scope"],
+)
+
+RAG_TIME_TO_FIRST_TOKEN = Histogram(
+    name="rag_time_to_first_token_seconds",
+    documentation="Time from request start to the first generated token of a streamed RAG answer",
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+)
+RAG_STAGE_LATENCY = Histogram(
+    name="rag_stage_duration_seconds",
+    documentation="Duration of each stage of the RAG path",
+    labelnames=["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+DB_SESSION_LATENCY = Histogram(
+    name="db_session_duration_seconds",
+    documentation="Time a database connection is checked out of the pool",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+@contextmanager
+def observe_stage(stage: str):
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        RAG_STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start_time)
+
+async def observe_stream_stage(stage: str, stream: AsyncIterator) -> AsyncIterator:
+    # the stage lasts until the stream is exhausted or closed
+    start_time = time.perf_counter()
+    try:
+        async for item in stream:
+            yield item
+    finally:
+        await stream.aclose()
+        RAG_STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start_time)
+
+def instrument_db_engine(db_engine):
+    """
+    Time every pool checkout of an (async) SQLAlchemy engine until its checkin.
+    """
+    
+    pool = db_engine.sync_engine.pool
+    
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checkout_time"] = time.perf_counter()
+    
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checkout_time = connection_record.info.pop("checkout_time", None)
+        if checkout_time is not None:
+            DB_SESSION_LATENCY.observe(time.perf_counter() - checkout_time)
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI request metrics. Requests are labelled with the matched route template
+    (e.g. /api/v1/nlp/index/search/{project_id}) so the label set stays bounded, and
+    timed with a monotonic clock until the last body chunk is sent, streaming included.
+    """
+    
+    UNMATCHED_ENDPOINT = "unmatched"
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        duration = time.time() - start_time
-        endpoint = request.url.path
+        start_time = time.perf_counter()
+        status_code = 500
         
-        REQUEST_COUNT.labels(method=request.method, endpoint=endpoint, status=response.status_code).inc()
-        REQUEST_LATENCY.labels(method=request.method, endpoint=endpoint).observe(duration)
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
         
-        return response
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start_time
+            
+            # the router stores the matched route in the shared scope
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or self.UNMATCHED_ENDPOINT
+            
+            REQUEST_COUNT.labels(method=scope["method"], endpoint=endpoint, status=status_code).inc()
+            REQUEST_LATENCY.labels(method=scope["method"], endpoint=endpoint).observe(duration)
 
 def setup_metrics(app: FastAPI):
     """
@@ -40,3 +149,21 @@ def setup_metrics(app: FastAPI):
     @app.get("/Tssldjkf_sd39fj_dlsklkj", include_in_schema=False)
     def metrics():
         return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def start_worker_metrics_server(base_port: int, process_index: int) -> bool:
+    """
+    Serve the metrics of one Celery pool process on `base_port + process_index`.
+    Every prefork child has its own registry, so each one is scraped separately.
+    """
+    if not base_port or base_port <= 0:
+        return False
+    
+    port = base_port + process_index
+    try:
+        start_http_server(port)
+    except OSError as e:
+        logging.getLogger(__name__).error(f"Can not serve worker metrics on port {port}: {e}")
+        return False
+    
+    return True
@@ -0,0 +1,197 @@
+from models.enums.ProcessingEnums import ChunkSizeUnitEnums
+from typing import Iterable, Iterator, List, Optional, Tuple
+import bisect
+import logging
+import re
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+class TextChunker:
+    """
+    Single-pass chunker over a stream of (text, metadata) pages.
+    Chunks are `chunk_size` characters or tokens long and consecutive chunks share
+    `overlap_size` of them. Only the unconsumed tail of the stream (less than one
+    chunk) is carried from one page to the next, so time and memory stay linear.
+    Every chunk keeps the metadata of the page it starts on, plus `end_page` when
+    it runs into a later page.
+    Token sizes use the tiktoken encoding `tokenizer_name`, normally the one the generation
+    provider counts prompt tokens with. Without it, tokens are approximated by words and
+    punctuation marks, which undercounts BPE tokens on long or rare words, numbers and
+    non-Latin scripts, so chunks come out larger than the prompt budget assumes.
+    """
+
+    # word or single punctuation mark, the fallback when no tokenizer can be loaded
+    TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+    PAGE_SEPARATOR = "\n"
+    WHITESPACE_PATTERN = re.compile(r"\s+")
+
+    def __init__(self, chunk_size: int, overlap_size: int = 0,
+                 size_unit: str = ChunkSizeUnitEnums.CHAR.value, tokenizer_name: Optional[str] = None):
+
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+
+        if size_unit not in [ unit.value for unit in ChunkSizeUnitEnums ]:
+            raise ValueError(f"Unsupported chunk size unit: {size_unit}")
+
+        self.chunk_size = chunk_size
+        self.overlap_size = max(0, min(overlap_size or 0, chunk_size - 1))
+        self.size_unit = size_unit
+        self.logger = logging.getLogger(__name__)
+
+        self.tokenizer = None
+        if size_unit == ChunkSizeUnitEnums.TOKEN.value:
+            self.tokenizer = self.load_tokenizer(tokenizer_name)
+
+    def load_tokenizer(self, tokenizer_name: Optional[str]):
+        if not tokenizer_name or tiktoken is None:
+            return None
+
+        try:
+            return tiktoken.get_encoding(tokenizer_name)
+        except Exception as e:
+            self.logger.warning(f"Can not load the {tokenizer_name} encoding, token sizes are approximated: {e}")
+            return None
+
+    def get_token_spans(self, text: str) -> List[Tuple[int, int]]:
+        # (start, end) character offsets of every token of `text`
+        if self.tokenizer is None:
+            return [ (match.start(), match.end()) for match in self.TOKEN_PATTERN.finditer(text) ]
+
+        _, offsets = self.tokenizer.decode_with_offsets(self.tokenizer.encode(text, disallowed_special=()))
+        return list(zip(offsets, offsets[1:] + [len(text)]))
+
+    def iter_chunks(self, pages: Iterable[Tuple[str, dict]]) -> Iterator[Tuple[str, dict]]:
+        if self.size_unit == ChunkSizeUnitEnums.TOKEN.value:
+            return self.iter_token_chunks(pages)
+
+        return self.iter_char_chunks(pages)
+
+    def chunk_text(self, text: str, metadata: dict = None) -> List[Tuple[str, dict]]:
+        return list(self.iter_chunks([ (text, metadata or {}) ]))
+
+    def get_chunk_metadata(self, page_marks: List[Tuple[int, dict]], start: int, end: int) -> dict:
+        # page_marks holds (buffer offset, page metadata) sorted by offset
+        offsets = [ offset for offset, _ in page_marks ]
+        start_page = page_marks[max(0, bisect.bisect_right(offsets, start) - 1)][1]
+        end_page = page_marks[max(0, bisect.bisect_right(offsets, max(start, end - 1)) - 1)][1]
+
+        metadata = dict(start_page)
+        if end_page is not start_page and "page" in end_page:
+            metadata["end_page"] = end_page["page"]
+
+        return metadata
+
+    def compact_page_marks(self, page_marks: List[Tuple[int, dict]], cut: int) -> List[Tuple[int, dict]]:
+        # keep the page the new buffer starts on and every later one, shifted to the new origin
+        first_mark = max(0, bisect.bisect_right([ offset for offset, _ in page_marks ], cut) - 1)
+        return [ (max(0, offset - cut), metadata) for offset, metadata in page_marks[first_mark:] ]
+
+    def iter_char_chunks(self, pages: Iterable[Tuple[str, dict]]) -> Iterator[Tuple[str, dict]]:
+
+        buffer = ""
+        page_marks = []
+        emitted_until = 0
+
+        for page_text, page_metadata in pages:
+            if buffer:
+                buffer += self.PAGE_SEPARATOR
+            page_marks.append((len(buffer), page_metadata or {}))
+            buffer += page_text
+
+            start = 0
+            while len(buffer) - start > self.chunk_size:
+                end = self.find_char_boundary(buffer, start)
+
+                chunk = buffer[start:end].strip()
+                if chunk:
+                    yield chunk, self.get_chunk_metadata(page_marks, start, end)
+                emitted_until = end
+
+                start = self.find_next_char_start(buffer, start, end)
+
+            buffer = buffer[start:]
+            page_marks = self.compact_page_marks(page_marks, start)
+            emitted_until = max(0, emitted_until - start)
+
+        # the tail is shorter than a chunk, emit it unless it is only the last overlap
+        chunk = buffer.strip()
+        if chunk and len(buffer) > emitted_until:
+            yield chunk, self.get_chunk_metadata(page_marks, 0, len(buffer))
+
+    def find_char_boundary(self, buffer: str, start: int) -> int:
+        # prefer a line break, then a space, in the second half of the window
+        limit = start + self.chunk_size
+        lower_bound = start + self.chunk_size // 2
+
+        for separator in ("\n", " "):
+            boundary = buffer.rfind(separator, lower_bound, limit + 1)
+            if boundary > start:
+                return boundary
+
+        return limit
+
+    def find_next_char_start(self, buffer: str, start: int, end: int) -> int:
+        if self.overlap_size == 0:
+            return end
+
+        # start the overlap on a word boundary without going back past the previous chunk
+        next_start = max(start + 1, end - self.overlap_size)
+        if buffer[next_start - 1].isspace() and not buffer[next_start].isspace():
+            return next_start
+
+        # PDF text is mostly separated by line breaks, any whitespace marks a word boundary
+        whitespace = self.WHITESPACE_PATTERN.search(buffer, next_start, end)
+        if whitespace is None or whitespace.end() >= end:
+            # no word starts inside the overlap window, skip the overlap rather than cut a word
+            return end
+
+        return whitespace.end()
+
+    def iter_token_chunks(self, pages: Iterable[Tuple[str, dict]]) -> Iterator[Tuple[str, dict]]:
+
+        buffer = ""
+        page_marks = []
+        token_spans = []
+        emitted_until = 0
+        step = self.chunk_size - self.overlap_size
+
+        for page_text, page_metadata in pages:
+            if buffer:
+                buffer += self.PAGE_SEPARATOR
+            page_offset = len(buffer)
+            page_marks.append((page_offset, page_metadata or {}))
+            buffer += page_text
+
+            token_spans.extend(
+                (page_offset + start, page_offset + end)
+                for start, end in self.get_token_spans(page_text)
+            )
+
+            first_token = 0
+            while len(token_spans) - first_token > self.chunk_size:
+                last_token = first_token + self.chunk_size - 1
+                start, end = token_spans[first_token][0], token_spans[last_token][1]
+
+                # BPE tokens carry their leading whitespace
+                chunk = buffer[start:end].strip()
+                if chunk:
+                    yield chunk, self.get_chunk_metadata(page_marks, start, end)
+                emitted_until = last_token + 1
+
+                first_token += step
+
+            cut = token_spans[first_token][0] if first_token < len(token_spans) else len(buffer)
+            buffer = buffer[cut:]
+            page_marks = self.compact_page_marks(page_marks, cut)
+            token_spans = [ (start - cut, end - cut) for start, end in token_spans[first_token:] ]
+            emitted_until = max(0, emitted_until - first_token)
+
+        if len(token_spans) > emitted_until:
+            start, end = token_spans[0][0], token_spans[-1][1]
+            chunk = buffer[start:end].strip()
+            if chunk:
+                yield chunk, self.get_chunk_metadata(page_marks, start, end)